@@ -5,10 +5,17 @@ Optimized for Fedora OS
 
 import subprocess
 import os
+import glob
+import shutil
+import time
+import threading
 import uuid
 from datetime import datetime
-from config.settings import app_aliases
+from config.settings import app_aliases, readiness_probes, READINESS_CONFIG, DESKTOP_INDEX_CONFIG
+from actions.desktop_index import get_desktop_index
 from utils.helpers import is_app_available, ensure_directory_exists
+from utils.executables import get_executable_index
+from utils.tracing import traced
 
 # Track the most recent VSCode window information
 vscode_info = {
@@ -17,6 +24,31 @@ vscode_info = {
     "timestamp": None
 }
 
+# Processes started by open_app, keyed by app name
+launched_apps = {}
+
+# Alias commands split into argument lists once at import
+_alias_commands = {name: cmd.split() for name, cmd in app_aliases.items()}
+
+def _resolve_command(app_name):
+    """Return the command for an app name as a new argument list."""
+    cmd = _alias_commands.get(app_name)
+    if cmd is None:
+        # If not a known alias, use the app name directly (without special characters)
+        cmd = ''.join(c for c in app_name if c.isalnum() or c in ' -_.').split()
+        if DESKTOP_INDEX_CONFIG.get("enabled", True) and not (cmd and is_app_available(cmd[0])):
+            # Not a binary either, so look for an installed app with a similar name
+            entry = get_desktop_index().lookup(app_name)
+            if entry:
+                print(f"Resolved {app_name} to {entry['name']} ({entry['id']}.desktop)")
+                cmd = entry['command']
+    cmd = list(cmd)
+    if cmd:
+        # Binaries outside PATH (e.g. /opt/brave.com/brave) must be run by full path
+        cmd[0] = get_executable_index().command_path(cmd[0]) or cmd[0]
+    return cmd
+
+@traced("open_app")
 def open_app(app_name, reuse_window=False):
     """Open an application based on the provided name."""
     global vscode_info
@@ -25,31 +57,22 @@ def open_app(app_name, reuse_window=False):
     app_name = app_name.lower().strip()
     
     # Check if it's a known alias
-    app_cmd = app_aliases.get(app_name)
-    
-    if not app_cmd:
-        # If not a known alias, use the app name directly (without special characters)
-        app_cmd = ''.join(c for c in app_name if c.isalnum() or c in ' -_.')
+    cmd = _resolve_command(app_name)
+    app_cmd = ' '.join(cmd)
     
     print(f"Attempting to launch {app_name} with command: {app_cmd}")
     
     # Handle special case for Flatpak commands
-    if app_cmd and 'flatpak run' in app_cmd:
+    if cmd[:2] == ['flatpak', 'run']:
         try:
-            subprocess.Popen(app_cmd.split())
+            _record_launch(app_name, cmd, subprocess.Popen(cmd))
             return f"Opened {app_name}"
         except Exception as e:
             print(f"Error launching app with flatpak: {str(e)}")
             return f"Error opening {app_name}: {str(e)}"
     
     # Normal case: Verify app exists before attempting to run
-    if app_cmd and (is_app_available(app_cmd.split()[0]) or os.path.exists(app_cmd.split()[0])):
-        cmd = [app_cmd.split()[0]]  # Use only the command, not arguments
-        
-        # Add additional arguments if needed
-        if len(app_cmd.split()) > 1:
-            cmd.extend(app_cmd.split()[1:])
-            
+    if cmd and is_app_available(cmd[0]):
         # Special handling for VSCode
         if app_name == 'vscode' and not reuse_window:
             # Create a more permanent workspace folder in the home directory
@@ -74,7 +97,7 @@ def open_app(app_name, reuse_window=False):
             cmd.extend(["--new-window", session_folder])
             
             try:
-                subprocess.Popen(cmd)
+                _record_launch(app_name, cmd, subprocess.Popen(cmd))
                 print(f"Opened VSCode with workspace: {session_folder}")
                 return f"Opened {app_name} with new workspace"
             except Exception as e:
@@ -83,7 +106,7 @@ def open_app(app_name, reuse_window=False):
             cmd.append('--reuse-window')
         
         try:
-            subprocess.Popen(cmd)
+            _record_launch(app_name, cmd, subprocess.Popen(cmd))
             print(f"Successfully launched: {' '.join(cmd)}")
             return f"Opened {app_name}"
         except Exception as e:
@@ -91,4 +114,143 @@ def open_app(app_name, reuse_window=False):
             return f"Error opening {app_name}: {str(e)}"
     
     print(f"Application not found or not executable: {app_cmd}")
-    return f"Application '{app_name}' not found or not executable"
\ No newline at end of file
+    return f"Application '{app_name}' not found or not executable"
+
+def _record_launch(app_name, cmd, process):
+    """Remember a launched process so readiness can be probed later."""
+    launched_apps[app_name] = {
+        "process": process,
+        "command": cmd,
+        "launched_at": time.monotonic()
+    }
+
+def _probe_config(app_name):
+    """Return the readiness probes for an app, deriving defaults from its command."""
+    probes = readiness_probes.get(app_name)
+    if probes:
+        return probes
+    launch = launched_apps.get(app_name)
+    cmd = launch["command"] if launch else _resolve_command(app_name)
+    if cmd and cmd[0] == 'flatpak':
+        # Flatpak apps run under their application ID, e.g. com.brave.Browser
+        app_id = cmd[-1]
+        return {'process': None, 'socket': None, 'window_class': app_id}
+    name = os.path.basename(cmd[0]) if cmd else app_name
+    return {'process': name, 'socket': None, 'window_class': name}
+
+def _process_running(name):
+    """Check whether a process with the given name is running."""
+    # /proc/<pid>/comm is truncated to 15 characters
+    name = name[:15]
+    for comm_path in glob.glob('/proc/[0-9]*/comm'):
+        try:
+            with open(comm_path) as f:
+                if f.read().strip() == name:
+                    return True
+        except OSError:
+            continue
+    return False
+
+def _socket_available(pattern):
+    """Check whether an IPC socket matching the pattern exists."""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or '/tmp'
+    return bool(glob.glob(os.path.join(runtime_dir, pattern)))
+
+def _window_mapped(window_class):
+    """
+    Check whether a visible window with the given class exists.
+
+    Returns None when no window query tool is installed (e.g. on Wayland
+    without XWayland tools), in which case the check is skipped.
+    """
+    if shutil.which('xdotool'):
+        result = subprocess.run(['xdotool', 'search', '--onlyvisible', '--class', window_class],
+                                capture_output=True, text=True)
+        return bool(result.stdout.strip())
+    if shutil.which('wmctrl'):
+        result = subprocess.run(['wmctrl', '-lx'], capture_output=True, text=True)
+        return window_class.lower() in result.stdout.lower()
+    return None
+
+def is_app_ready(app_name):
+    """
+    Check once whether an application is ready to be used.
+
+    Args:
+        app_name (str): Name the app was opened with
+
+    Returns:
+        bool: True if every available probe passes
+    """
+    app_name = app_name.lower().strip()
+    probes = _probe_config(app_name)
+
+    if probes.get('process'):
+        launch = launched_apps.get(app_name)
+        # Launcher commands such as `code` exit once they hand off to the
+        # real process, so look for the process by name as well
+        still_running = launch is not None and launch["process"].poll() is None
+        if not still_running and not _process_running(probes['process']):
+            return False
+
+    if probes.get('socket') and not _socket_available(probes['socket']):
+        return False
+
+    if probes.get('window_class') and _window_mapped(probes['window_class']) is False:
+        return False
+
+    return True
+
+def _launch_failed(app_name):
+    """
+    Check whether an app can no longer become ready, so waiting is pointless.
+
+    That is the case if it was never launched, or if its launcher exited
+    with an error and no process of the app is running.
+    """
+    launch = launched_apps.get(app_name)
+    if launch is None:
+        return True
+    exit_code = launch["process"].poll()
+    if exit_code is None or exit_code == 0:
+        return False
+    process_name = _probe_config(app_name).get('process')
+    return not (process_name and _process_running(process_name))
+
+@traced("wait_until_ready")
+def wait_until_ready(app_name, timeout=None, cancel_event=None):
+    """
+    Wait for an application to become ready, probing with exponential backoff.
+
+    Args:
+        app_name (str): Name the app was opened with
+        timeout (float, optional): Seconds to wait, defaults to READINESS_CONFIG["timeout"]
+        cancel_event (threading.Event, optional): Stops waiting when set
+
+    Returns:
+        bool: True if the app became ready, False on timeout, cancellation
+        or a failed launch
+    """
+    app_name = app_name.lower().strip()
+    if timeout is None:
+        timeout = READINESS_CONFIG.get("timeout", 15)
+    if cancel_event is None:
+        cancel_event = threading.Event()
+    delay = READINESS_CONFIG.get("initial_delay", 0.05)
+    max_delay = READINESS_CONFIG.get("max_delay", 1.0)
+    start = time.monotonic()
+
+    while True:
+        if is_app_ready(app_name):
+            print(f"{app_name} ready after {time.monotonic() - start:.2f}s")
+            return True
+        if _launch_failed(app_name):
+            print(f"{app_name} was not launched or its launcher failed, not waiting for it")
+            return False
+        remaining = timeout - (time.monotonic() - start)
+        if remaining <= 0:
+            print(f"Timed out waiting for {app_name} to become ready")
+            return False
+        if cancel_event.wait(min(delay, remaining)):
+            return False
+        delay = min(delay * 2, max_delay)
@@ -0,0 +1,281 @@
+"""
+Desktop entry index for CommandCompanion
+
+Builds a searchable index over the .desktop files installed on the system
+(including Flatpak exports) so application names such as "image editor"
+or "gimp" can be resolved to a launch command without asking Gemini.
+Matching uses trigram similarity over each entry's Name, GenericName,
+Keywords and Exec binary.
+"""
+
+import os
+import re
+import shlex
+import threading
+from collections import Counter, defaultdict
+from config.settings import DESKTOP_INDEX_CONFIG
+
+def desktop_dirs():
+    """
+    Return the application directories in XDG lookup order, highest precedence first.
+
+    XDG_DATA_HOME comes before XDG_DATA_DIRS, so a user's own .desktop files
+    override the system ones. The Flatpak export directories are added
+    after the user's data dir when the session has not put them on
+    XDG_DATA_DIRS already.
+    """
+    data_home = os.environ.get('XDG_DATA_HOME') or os.path.expanduser('~/.local/share')
+    data_dirs = [d for d in (os.environ.get('XDG_DATA_DIRS') or '/usr/local/share:/usr/share').split(':') if d]
+    flatpak_dirs = [os.path.join(data_home, 'flatpak/exports/share'), '/var/lib/flatpak/exports/share']
+    ordered = [data_home] + [d for d in flatpak_dirs if d not in data_dirs] + data_dirs
+    directories = []
+    for directory in ordered:
+        path = os.path.join(directory, 'applications')
+        if path not in directories:
+            directories.append(path)
+    return directories
+
+DESKTOP_DIRS = desktop_dirs()
+
+# How much a match on each field counts towards an entry's score
+FIELD_WEIGHTS = {
+    'name': 1.0,
+    'exec': 1.0,
+    'generic_name': 0.9,
+    'keyword': 0.8
+}
+
+# Terms scored exactly per requested result
+CANDIDATES_PER_RESULT = 20
+
+# Minimum number of query trigrams used to gather candidates
+CANDIDATE_GRAMS = 4
+
+# Exec field codes and Flatpak file-forwarding markers that are not part of the command
+_FIELD_CODE_RE = re.compile(r'^(%[a-zA-Z%]|@@[a-z]?)$')
+
+def _normalize(text):
+    return ' '.join(re.sub(r'[^a-z0-9+]+', ' ', text.lower()).split())
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def parse_exec(exec_line):
+    """
+    Turn a desktop entry Exec value into an argument list.
+
+    Args:
+        exec_line (str): The Exec value, e.g. "gimp-2.10 %U"
+
+    Returns:
+        list: The command without field codes
+    """
+    try:
+        args = shlex.split(exec_line)
+    except ValueError:
+        args = exec_line.split()
+    return [arg for arg in args if not _FIELD_CODE_RE.match(arg)]
+
+def parse_desktop_file(path):
+    """
+    Read the [Desktop Entry] section of a .desktop file.
+
+    Returns:
+        dict: The entry's fields, or None if it is not a visible application
+    """
+    fields = {}
+    in_entry = False
+    try:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith('['):
+                    if in_entry:
+                        break
+                    in_entry = line == '[Desktop Entry]'
+                    continue
+                if in_entry and '=' in line and not line.startswith('#'):
+                    key, value = line.split('=', 1)
+                    # Localized keys such as Name[de] are ignored
+                    fields.setdefault(key.strip(), value.strip())
+    except OSError:
+        return None
+
+    if fields.get('Type', 'Application') != 'Application' or 'Exec' not in fields:
+        return None
+    if fields.get('NoDisplay') == 'true' or fields.get('Hidden') == 'true':
+        return None
+
+    command = parse_exec(fields['Exec'])
+    if not command:
+        return None
+    return {
+        'id': os.path.basename(path)[:-len('.desktop')],
+        'name': fields.get('Name', ''),
+        'generic_name': fields.get('GenericName', ''),
+        'keywords': [k for k in fields.get('Keywords', '').split(';') if k],
+        'command': command
+    }
+
+class DesktopIndex:
+    def __init__(self, directories=None):
+        """
+        Initialize an empty index over the given application directories.
+
+        Args:
+            directories (list, optional): Directories holding .desktop files
+        """
+        self.directories = directories or DESKTOP_DIRS
+        self.entries = []
+        self._terms = []                    # (normalized text, entry index, weight)
+        self._exact = {}                    # normalized text -> entry index
+        self._postings = defaultdict(list)  # trigram -> term indexes
+        self._term_grams = []
+        self._dir_mtimes = None
+        self._lock = threading.Lock()
+
+    def _current_mtimes(self):
+        mtimes = {}
+        for directory in self.directories:
+            try:
+                mtimes[directory] = os.stat(directory).st_mtime
+            except OSError:
+                mtimes[directory] = None
+        return mtimes
+
+    def build(self, entries=None):
+        """
+        (Re)build the index from the desktop directories or the given entries.
+
+        Args:
+            entries (list, optional): Parsed entries to index instead of scanning
+        """
+        mtimes = self._current_mtimes()
+        if entries is None:
+            entries = []
+            # Earlier directories take precedence, like XDG_DATA_DIRS lookups
+            for directory in reversed(self.directories):
+                try:
+                    names = sorted(os.listdir(directory))
+                except OSError:
+                    continue
+                for name in names:
+                    if name.endswith('.desktop'):
+                        entry = parse_desktop_file(os.path.join(directory, name))
+                        if entry:
+                            entries.append(entry)
+            unique = {}
+            for entry in entries:
+                unique[entry['id']] = entry
+            entries = list(unique.values())
+
+        terms, exact = [], {}
+        for i, entry in enumerate(entries):
+            command = entry['command']
+            # Flatpak entries run "flatpak run ... <app id>", so index the app ID
+            binary = command[-1] if os.path.basename(command[0]) == 'flatpak' else command[0]
+            texts = [('name', entry['name']), ('generic_name', entry['generic_name']),
+                     ('exec', os.path.basename(binary))]
+            texts += [('keyword', k) for k in entry['keywords']]
+            for field, text in texts:
+                text = _normalize(text)
+                if text:
+                    terms.append((text, i, FIELD_WEIGHTS[field]))
+                    exact.setdefault(text, i)
+
+        postings = defaultdict(list)
+        term_grams = []
+        for term_index, (text, _, _) in enumerate(terms):
+            grams = frozenset(_trigrams(text))
+            term_grams.append(grams)
+            for gram in grams:
+                postings[gram].append(term_index)
+
+        with self._lock:
+            self.entries, self._terms, self._exact = entries, terms, exact
+            self._postings, self._term_grams = postings, term_grams
+            self._dir_mtimes = mtimes
+
+    def ensure_built(self):
+        """Build the index on first use or when a desktop directory changed."""
+        if self._dir_mtimes is None or self._dir_mtimes != self._current_mtimes():
+            self.build()
+
+    def search(self, query, limit=5):
+        """
+        Find the entries most similar to a query.
+
+        Args:
+            query (str): Application name or description, e.g. "image editor"
+            limit (int): Maximum number of results
+
+        Returns:
+            list: (score, entry) tuples, best match first
+        """
+        query = _normalize(query)
+        if not query:
+            return []
+
+        exact = self._exact.get(query)
+        grams = _trigrams(query)
+        # Candidates are gathered from the rarest trigrams only; trigrams shared
+        # by many terms carry little information and dominate the cost
+        postings = sorted((self._postings.get(gram, ()) for gram in grams), key=len)
+        overlap = Counter()
+        for posting in postings[:max(CANDIDATE_GRAMS, len(postings) // 2)]:
+            overlap.update(posting)
+
+        scores = {}
+        for term_index, _ in overlap.most_common(limit * CANDIDATES_PER_RESULT):
+            _, entry_index, weight = self._terms[term_index]
+            # Jaccard similarity of the trigram sets
+            term_grams = self._term_grams[term_index]
+            shared = len(grams & term_grams)
+            similarity = shared / (len(grams) + len(term_grams) - shared)
+            score = similarity * weight
+            if score > scores.get(entry_index, 0):
+                scores[entry_index] = score
+        if exact is not None:
+            scores[exact] = max(scores.get(exact, 0), 1.0)
+
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [(score, self.entries[i]) for i, score in best]
+
+    def lookup(self, query, min_score=None):
+        """
+        Return the best matching entry if it scores at least min_score.
+
+        Args:
+            query (str): Application name or description
+            min_score (float, optional): Defaults to DESKTOP_INDEX_CONFIG["min_score"]
+
+        Returns:
+            dict: The matching entry, or None
+        """
+        if min_score is None:
+            min_score = DESKTOP_INDEX_CONFIG.get("min_score", 0.5)
+        exact = self.lookup_exact(query)
+        if exact:
+            return exact
+        results = self.search(query, limit=1)
+        if results and results[0][0] >= min_score:
+            return results[0][1]
+        return None
+
+    def lookup_exact(self, query):
+        """Return the entry whose name, generic name, keyword or binary equals the query."""
+        index = self._exact.get(_normalize(query))
+        return self.entries[index] if index is not None else None
+
+_desktop_index = None
+_desktop_index_lock = threading.Lock()
+
+def get_desktop_index():
+    """Return the shared desktop entry index, building or refreshing it as needed."""
+    global _desktop_index
+    with _desktop_index_lock:
+        if _desktop_index is None:
+            _desktop_index = DesktopIndex()
+        _desktop_index.ensure_built()
+    return _desktop_index
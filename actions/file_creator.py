@@ -4,23 +4,33 @@ File creation functionality for CommandCompanion
 
 import os
 import subprocess
-import google.generativeai as genai
-from config.settings import AI_MODEL, PYTHON_PROMPT_TEMPLATE, WEBSITE_PROMPT_TEMPLATE
+import time
+from config.settings import AI_MODEL, PYTHON_PROMPT_TEMPLATE, WEBSITE_PROMPT_TEMPLATE, FILE_CREATION_CONFIG
+from core.cache import generated_file_key, get_file_cache
+from core.clients import get_model
 from utils.helpers import sanitize_filename
+from utils.tracing import span, traced
 from actions.app_launcher import vscode_info  # Import the global vscode_info
 
+# Prompt template, file extension and description for each content type
+CONTENT_TYPES = {
+    'python': (PYTHON_PROMPT_TEMPLATE, '.py', 'Python code'),
+    'website': (WEBSITE_PROMPT_TEMPLATE, '.html', 'website content')
+}
+
+@traced("generate_content")
 def generate_content(prompt):
     """
     Generate content using Gemini with detailed debugging.
-    
+
     Args:
         prompt (str): The prompt to send to Gemini
-        
+
     Returns:
         str: The generated content or None if failed
     """
     try:
-        model = genai.GenerativeModel(AI_MODEL)
+        model = get_model(AI_MODEL)
         print(f"Sending prompt to Gemini: {prompt}")
         response = model.generate_content(prompt)
         content = response.text.strip()
@@ -33,97 +43,271 @@ def generate_content(prompt):
         print(f"Error generating content: {str(e)}")
         return None
 
-def create_file(content_type, topic, reuse_vscode=False):
+def generate_content_stream(prompt):
+    """
+    Generate content using Gemini, yielding text chunks as they arrive.
+
+    Args:
+        prompt (str): The prompt to send to Gemini
+
+    Yields:
+        str: Chunks of generated text
+    """
+    model = get_model(AI_MODEL)
+    print(f"Streaming prompt to Gemini: {prompt}")
+    with span("generate_content", stream=True) as s:
+        start = time.perf_counter()
+        chunks = 0
+        for chunk in model.generate_content(prompt, stream=True):
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks that only carry the finish reason have no text
+                continue
+            if text:
+                if not chunks:
+                    s.set(first_chunk=round(time.perf_counter() - start, 6))
+                chunks += 1
+                yield text
+        s.set(chunks=chunks)
+
+class CodeFenceStripper:
+    """
+    Remove markdown code fences from streamed text.
+
+    Complete lines are passed through as they arrive. If the content opens
+    with a ```lang line, that line is dropped and everything from its
+    closing ``` onwards is ignored. Fences inside the content, such as a
+    usage example in a docstring, are kept: in unfenced content they are
+    ordinary lines, and in fenced content a ```lang line opens a nested
+    block that its own ``` closes.
+    """
+
+    def __init__(self):
+        self._pending = ""
+        self._started = False
+        self._fenced = False    # Whether an opening fence was consumed
+        self._nested = 0        # Fenced blocks opened inside the content
+        self._closed = False
+
+    def feed(self, text):
+        """Add a chunk of text and return the part that is safe to write."""
+        if self._closed:
+            return ""
+        self._pending += text
+        lines = self._pending.split('\n')
+        self._pending = lines.pop()
+        return ''.join(self._filter(line) for line in lines)
+
+    def finish(self):
+        """Return whatever is left once the stream has ended."""
+        pending, self._pending = self._pending, ""
+        if self._closed or not pending:
+            return ""
+        return self._filter(pending).rstrip('\n')
+
+    def strip(self, chunks):
+        """Yield the writable text for an iterable of chunks, including the tail."""
+        for chunk in chunks:
+            yield self.feed(chunk)
+        yield self.finish()
+
+    def _filter(self, line):
+        if self._closed:
+            return ""
+        stripped = line.strip()
+        if stripped.startswith('```'):
+            if not self._started:
+                self._started = True
+                self._fenced = True
+                return ""
+            if self._fenced:
+                if stripped != '```':
+                    self._nested += 1
+                elif self._nested:
+                    self._nested -= 1
+                else:
+                    self._closed = True
+                    return ""
+        if not self._started and not line.strip():
+            # Skip blank lines before the content starts
+            return ""
+        self._started = True
+        return line + '\n'
+
+def _target_path(filename):
+    """Decide where to save a generated file, preferring the tracked VSCode folder."""
+    folder_path = vscode_info.get("folder")
+    if folder_path and os.path.exists(folder_path):
+        filepath = os.path.join(folder_path, filename)
+        print(f"Creating file in tracked VSCode folder: {filepath}")
+        return os.path.abspath(filepath), True
+    # Fallback to current directory
+    filepath = os.path.abspath(filename)
+    print(f"Creating file in current directory: {filepath}")
+    return filepath, False
+
+def _open_file(content_type, abs_filepath, filename, in_workspace, reuse_vscode):
+    """Open a created file in VSCode or the browser and return a status message."""
+    if content_type == 'website':
+        # Open the HTML file in the default browser (xdg-open for Fedora)
+        subprocess.Popen(['xdg-open', abs_filepath])
+        return f"Created and opened {filename} in browser"
+
+    if in_workspace:
+        # File was already created in the VSCode workspace folder
+        # It should appear automatically, but we'll open it explicitly just to be sure
+        try:
+            subprocess.Popen(['code', '--goto', abs_filepath])
+        except Exception as e:
+            print(f"Warning: Could not open file in VSCode: {str(e)}")
+        return f"Created {filename} in the VSCode workspace"
+
+    # No tracked VSCode session, open normally
+    cmd = ['code', abs_filepath]
+    if reuse_vscode:
+        cmd.append('--reuse-window')
+    subprocess.Popen(cmd)
+    return f"Created and opened {filename}"
+
+def _store(cache_key, content):
+    """Keep generated content for the next request for the same topic."""
+    cache = get_file_cache() if cache_key else None
+    if cache is None:
+        return
+    try:
+        cache.put(cache_key, content)
+    except Exception as e:
+        print(f"Could not cache generated content: {str(e)}")
+
+def _create_buffered(content_type, prompt, filename, reuse_vscode, wait_for=None, cache_key=None):
+    """Generate the whole file, then write and open it."""
+    content = generate_content(prompt)
+    if not content:
+        return None
+    _store(cache_key, content)
+    return _write_file(content_type, content, filename, reuse_vscode, wait_for)
+
+def _write_file(content_type, content, filename, reuse_vscode, wait_for=None):
+    """Write already generated content to the target folder and open it."""
+    if wait_for:
+        wait_for()
+    abs_filepath, in_workspace = _target_path(filename)
+    try:
+        # Write the content to the file
+        with open(abs_filepath, 'w') as f:
+            f.write(content)
+        print(f"Successfully wrote to {abs_filepath}")
+        return _open_file(content_type, abs_filepath, filename, in_workspace, reuse_vscode)
+    except Exception as e:
+        print(f"Error writing file {abs_filepath}: {str(e)}")
+        return f"Failed to write file {filename}: {str(e)}"
+
+def _create_streamed(content_type, prompt, filename, reuse_vscode, wait_for=None, cache_key=None):
+    """Write the file as chunks arrive and open it as soon as the first one lands."""
+    start = time.perf_counter()
+    first_byte = None
+    status = None
+    f = None
+    abs_filepath = filename
+    written = []
+
+    try:
+        for text in CodeFenceStripper().strip(generate_content_stream(prompt)):
+            if not text:
+                continue
+            if f is None:
+                # The target folder may depend on an app that is still launching
+                if wait_for:
+                    wait_for()
+                abs_filepath, in_workspace = _target_path(filename)
+                f = open(abs_filepath, 'w')
+            f.write(text)
+            f.flush()
+            written.append(text)
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+                print(f"First chunk written to {abs_filepath} after {first_byte:.2f}s")
+                try:
+                    status = _open_file(content_type, abs_filepath, filename, in_workspace, reuse_vscode)
+                except Exception as e:
+                    # The file is still worth finishing, and caching, without a viewer
+                    print(f"Warning: Could not open {abs_filepath}: {str(e)}")
+                    status = f"Created {filename} but could not open it: {str(e)}"
+    except Exception as e:
+        print(f"Error streaming content to {abs_filepath}: {str(e)}")
+        if first_byte is None:
+            return None
+        return f"Failed to finish {filename}: {str(e)}"
+    finally:
+        if f is not None:
+            f.close()
+
+    if first_byte is None:
+        print("Gemini returned empty content")
+        return None
+
+    # Only a complete response is cached, never one cut short by an error
+    _store(cache_key, ''.join(written))
+    total = time.perf_counter() - start
+    print(f"Successfully streamed to {abs_filepath} in {total:.2f}s")
+    return f"{status} (first byte {first_byte:.2f}s, total {total:.2f}s)"
+
+def _create_cached(content_type, content, filename, reuse_vscode, wait_for=None):
+    """Write content served from the generated file cache and open it."""
+    print(f"Serving {filename} from the generated file cache")
+    status = _write_file(content_type, content, filename, reuse_vscode, wait_for)
+    if status.startswith("Failed"):
+        return status
+    return f"{status} (from cache)"
+
+def create_file(content_type, topic, reuse_vscode=False, stream=None, wait_for=None, regenerate=False):
     """
     Create a file with generated content and open it.
-    
+
     Args:
         content_type (str): Type of content to generate ('python' or 'website')
         topic (str): The topic/purpose of the file
         reuse_vscode (bool): Whether to reuse an existing VSCode window
-        
+        stream (bool, optional): Write the file while it is generated,
+            defaults to FILE_CREATION_CONFIG["stream"]
+        wait_for (function, optional): Called after content generation has
+            started and before the file is placed and opened, so generation
+            can overlap with launching the editor
+        regenerate (bool): Ask Gemini again even if content for this topic
+            is cached, replacing the cached copy
+
     Returns:
         str: Status message about the operation
     """
-    if content_type == 'python':
-        prompt = PYTHON_PROMPT_TEMPLATE.format(topic=topic)
-        content = generate_content(prompt)
-        if content:
-            filename = f"{sanitize_filename(topic)}.py"
-            
-            # Determine where to save the file
-            folder_path = vscode_info.get("folder")
-            if folder_path and os.path.exists(folder_path):
-                filepath = os.path.join(folder_path, filename)
-                print(f"Creating file in tracked VSCode folder: {filepath}")
-            else:
-                # Fallback to current directory
-                filepath = os.path.abspath(filename)
-                print(f"Creating file in current directory: {filepath}")
-                
-            try:
-                # Make sure we have absolute paths
-                abs_filepath = os.path.abspath(filepath)
-                
-                # Write the content to the file
-                with open(abs_filepath, 'w') as f:
-                    f.write(content)
-                print(f"Successfully wrote to {abs_filepath}")
-                
-                if folder_path and os.path.exists(folder_path):
-                    # File was already created in the VSCode workspace folder
-                    # It should appear automatically, but we'll open it explicitly just to be sure
-                    try:
-                        subprocess.run(['code', '--goto', abs_filepath])
-                        return f"Created {filename} in the VSCode workspace"
-                    except Exception as e:
-                        print(f"Warning: Could not open file in VSCode: {str(e)}")
-                        return f"Created {filename} in the VSCode workspace"
-                else:
-                    # No tracked VSCode session, open normally
-                    cmd = ['code', abs_filepath]
-                    if reuse_vscode:
-                        cmd.append('--reuse-window')
-                    subprocess.Popen(cmd)
-                    return f"Created and opened {filename}"
-            except Exception as e:
-                print(f"Error writing file {filepath}: {str(e)}")
-                return f"Failed to write file {filename}: {str(e)}"
-        else:
-            print(f"Failed to generate content for topic: {topic}")
-            return "Failed to generate Python code - check console for details"
-            
-    elif content_type == 'website':
-        prompt = WEBSITE_PROMPT_TEMPLATE.format(topic=topic)
-        content = generate_content(prompt)
-        if content:
-            filename = f"{sanitize_filename(topic)}.html"
-            
-            # Determine where to save the file
-            folder_path = vscode_info.get("folder")
-            if folder_path and os.path.exists(folder_path):
-                filepath = os.path.join(folder_path, filename)
-                print(f"Creating file in tracked VSCode folder: {filepath}")
+    if content_type not in CONTENT_TYPES:
+        return f"Unsupported content type: {content_type}"
+
+    template, extension, description = CONTENT_TYPES[content_type]
+    prompt = template.format(topic=topic)
+    filename = f"{sanitize_filename(topic)}{extension}"
+    if stream is None:
+        stream = FILE_CREATION_CONFIG.get("stream", True)
+
+    cache = get_file_cache()
+    cache_key = generated_file_key(content_type, topic, template) if cache else None
+    with span("file_cache", regenerate=regenerate) as s:
+        content = None
+        if cache is not None:
+            if regenerate:
+                cache.record_regeneration()
             else:
-                # Fallback to current directory
-                filepath = os.path.abspath(filename)
-                print(f"Creating file in current directory: {filepath}")
-                
-            try:
-                # Make sure we have absolute paths
-                abs_filepath = os.path.abspath(filepath)
-                
-                # Write the content to the file
-                with open(abs_filepath, 'w') as f:
-                    f.write(content)
-                print(f"Successfully wrote to {abs_filepath}")
-                
-                # Open the HTML file in the default browser (xdg-open for Fedora)
-                subprocess.Popen(['xdg-open', abs_filepath])
-                return f"Created and opened {filename} in browser"
-            except Exception as e:
-                print(f"Error writing file {filepath}: {str(e)}")
-                return f"Failed to write file {filename}: {str(e)}"
-        return "Failed to generate website content - check console for details"
-        
-    return f"Unsupported content type: {content_type}"
\ No newline at end of file
+                content = cache.get(cache_key)
+        s.set(hit=content is not None)
+    if content is not None:
+        return _create_cached(content_type, content, filename, reuse_vscode, wait_for)
+
+    if stream:
+        status = _create_streamed(content_type, prompt, filename, reuse_vscode, wait_for, cache_key)
+    else:
+        status = _create_buffered(content_type, prompt, filename, reuse_vscode, wait_for, cache_key)
+
+    if status is None:
+        print(f"Failed to generate content for topic: {topic}")
+        return f"Failed to generate {description} - check console for details"
+    return status
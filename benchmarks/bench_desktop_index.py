@@ -0,0 +1,90 @@
+"""
+Benchmark for the desktop entry index
+
+Generates a few thousand synthetic .desktop files, builds the index over
+them and measures lookup latency for exact, fuzzy and misspelled queries.
+
+Run from the repository root:
+    python -m benchmarks.bench_desktop_index --entries 5000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from actions.desktop_index import DesktopIndex
+
+WORDS = [
+    'image', 'photo', 'video', 'audio', 'music', 'text', 'code', 'web', 'mail', 'chat',
+    'editor', 'viewer', 'player', 'browser', 'manager', 'studio', 'office', 'terminal',
+    'paint', 'draw', 'sync', 'backup', 'note', 'task', 'game', 'map', 'scan', 'print'
+]
+
+def write_entries(directory, count, rng):
+    """Write count synthetic .desktop files and return their names."""
+    names = []
+    for i in range(count):
+        words = rng.sample(WORDS, 2)
+        name = f"{words[0].title()}{words[1].title()} {i}"
+        binary = f"{words[0]}-{words[1]}-{i}"
+        with open(os.path.join(directory, f"org.example.{binary}.desktop"), 'w') as f:
+            f.write(
+                "[Desktop Entry]\n"
+                "Type=Application\n"
+                f"Name={name}\n"
+                f"GenericName={words[0].title()} {words[1].title()}\n"
+                f"Keywords={';'.join(rng.sample(WORDS, 3))};\n"
+                f"Exec={binary} %U\n"
+            )
+        names.append((name, binary))
+    return names
+
+def misspell(text, rng):
+    """Swap two adjacent characters of text."""
+    if len(text) < 3:
+        return text
+    i = rng.randrange(len(text) - 1)
+    return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+
+def time_queries(index, queries):
+    """Return per-query latencies in microseconds."""
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        index.lookup(query)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+def report(label, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<12} mean {statistics.mean(timings):8.1f} us   "
+          f"p50 {statistics.median(timings):8.1f} us   p95 {p95:8.1f} us")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=3000, help="number of synthetic entries")
+    parser.add_argument('--queries', type=int, default=500, help="queries per category")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as directory:
+        names = write_entries(directory, args.entries, rng)
+        index = DesktopIndex([directory])
+
+        start = time.perf_counter()
+        index.build()
+        print(f"Indexed {len(index.entries)} entries in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        sample = [rng.choice(names) for _ in range(args.queries)]
+        report("exact", time_queries(index, [name for name, _ in sample]))
+        report("binary", time_queries(index, [binary for _, binary in sample]))
+        report("misspelled", time_queries(index, [misspell(name, rng) for name, _ in sample]))
+        report("generic", time_queries(index, [f"{a} {b}" for a, b in
+                                                (rng.sample(WORDS, 2) for _ in range(args.queries))]))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Compare the scraped and structured interpretation modes
+
+Runs the same commands through interpret_command with
+INTERPRETER_CONFIG["structured_output"] off and on, and reports prompt
+and output tokens (from the responses' usage metadata), latency and how
+many responses could not be turned into valid actions. Uses the real API
+with --live (GENAI_API_KEY must be set), the local FakeModel otherwise,
+whose token counts are word counts.
+
+Run from the repository root:
+    python -m benchmarks.bench_interpretation --live --requests 20
+"""
+
+import argparse
+import os
+import statistics
+import time
+from dotenv import load_dotenv
+from config.settings import INTERPRETER_CONFIG, FILE_CACHE_CONFIG
+from core import clients
+from core.interpreter import interpret_command
+from utils.tracing import Trace, activate, deactivate
+from benchmarks.fake_gemini import FakeModel
+from benchmarks.bench_throughput import COMMANDS, _percentile
+
+# Apostrophes in topics broke the quote rewrite in extract_json
+EXTRA_COMMANDS = [
+    "make a python script for my mom's recipe collection",
+    "create a website for Joe's coffee shop and open it"
+]
+
+def run_mode(structured, commands):
+    """Interpret every command in one mode and print its figures."""
+    INTERPRETER_CONFIG["structured_output"] = structured
+    latencies, prompt_tokens, output_tokens, failures = [], [], [], 0
+    for command in commands:
+        # A trace collects the token counts the interpreter attaches to its Gemini span
+        trace = Trace(command)
+        token = activate(trace)
+        start = time.perf_counter()
+        try:
+            actions = interpret_command(command)
+        finally:
+            deactivate(token)
+        latencies.append(time.perf_counter() - start)
+        failures += any(a.get('action') == 'error' for a in actions)
+        for span in trace.spans:
+            if span["name"] == "gemini":
+                if span.get("prompt_tokens") is not None:
+                    prompt_tokens.append(span["prompt_tokens"])
+                if span.get("output_tokens") is not None:
+                    output_tokens.append(span["output_tokens"])
+
+    label = "structured" if structured else "scraped"
+    print(f"{label:<11} prompt tokens {statistics.mean(prompt_tokens or [0]):7.1f}   "
+          f"output tokens {statistics.mean(output_tokens or [0]):6.1f}   "
+          f"p50 {_percentile(latencies, 0.5):.3f}s   p95 {_percentile(latencies, 0.95):.3f}s   "
+          f"invalid {failures}/{len(commands)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--live', action='store_true', help="call the real Gemini API")
+    parser.add_argument('--requests', type=int, default=len(COMMANDS) + len(EXTRA_COMMANDS))
+    parser.add_argument('--latency', type=float, default=0.3, help="fake model latency in seconds")
+    args = parser.parse_args()
+
+    if args.live:
+        load_dotenv()
+        clients.configure(os.getenv('GENAI_API_KEY'), warm=False)
+    else:
+        clients.set_model_factory(lambda name: FakeModel(name, latency=args.latency, response_format='mixed'))
+    # Every command has to reach the model
+    INTERPRETER_CONFIG["local_fast_path"] = False
+    INTERPRETER_CONFIG["cache_enabled"] = False
+    FILE_CACHE_CONFIG["enabled"] = False
+
+    pool = COMMANDS + EXTRA_COMMANDS
+    commands = [pool[i % len(pool)] for i in range(args.requests)]
+    run_mode(False, commands)
+    run_mode(True, commands)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Speculative interpretation benchmark against a local Gemini stand-in
+
+Types each command into a SpeculativeInterpreter keystroke by keystroke,
+debounced the way the GUI entry is, with a pause after some words and
+before Enter. Reports how long the plan takes to be ready once Enter is
+pressed, with and without speculation, along with the speculation hit
+rate and the Gemini calls that were wasted on text that changed.
+
+Run from the repository root:
+    python -m benchmarks.bench_speculation --latency 0.6 --requests 12
+"""
+
+import argparse
+import random
+import threading
+import time
+from config.settings import INTERPRETER_CONFIG, FILE_CACHE_CONFIG, SPECULATION_CONFIG
+from core import clients
+from core.interpreter import interpret_command
+from core.speculation import SpeculativeInterpreter
+from benchmarks.fake_gemini import FakeModel
+from benchmarks.bench_throughput import COMMANDS, _percentile
+
+def type_command(speculator, command, char_interval, word_pause, think, rng):
+    """Feed a command to the speculator as a typist would, firing it after each debounced pause."""
+    debounce = SPECULATION_CONFIG.get("debounce_ms", 400) / 1000
+    timer = None
+    for i in range(1, len(command) + 1):
+        if timer is not None:
+            timer.cancel()
+        text = command[:i]
+        timer = threading.Timer(debounce, speculator.update, args=(text,))
+        timer.start()
+        pause = char_interval
+        if command[i - 1] == ' ' and rng.random() < 0.3:
+            pause += rng.uniform(0, word_pause)
+        time.sleep(pause)
+    time.sleep(think)
+    timer.cancel()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=len(COMMANDS))
+    parser.add_argument('--latency', type=float, default=0.6, help="fake model latency in seconds")
+    parser.add_argument('--cps', type=float, default=12.0, help="characters typed per second")
+    parser.add_argument('--word-pause', type=float, default=0.8, help="longest pause after a word")
+    parser.add_argument('--think', type=float, default=0.6, help="pause before pressing Enter")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    model = FakeModel(latency=args.latency, jitter=0.1, seed=args.seed)
+    clients.set_model_factory(lambda name: model)
+    # Every command has to reach the model
+    INTERPRETER_CONFIG["local_fast_path"] = False
+    INTERPRETER_CONFIG["cache_enabled"] = False
+    FILE_CACHE_CONFIG["enabled"] = False
+
+    commands = [COMMANDS[i % len(COMMANDS)] for i in range(args.requests)]
+    rng = random.Random(args.seed)
+
+    baseline = []
+    for command in commands:
+        start = time.perf_counter()
+        interpret_command(command)
+        baseline.append(time.perf_counter() - start)
+
+    speculator = SpeculativeInterpreter()
+    speculative = []
+    for command in commands:
+        type_command(speculator, command, 1 / args.cps, args.word_pause, args.think, rng)
+        start = time.perf_counter()
+        speculation = speculator.claim(command)
+        actions = speculation.result()[0] if speculation else None
+        if actions is None:
+            interpret_command(command)
+        speculative.append(time.perf_counter() - start)
+    speculator.shutdown()
+
+    for name, latencies in (("without", baseline), ("speculative", speculative)):
+        print(f"{name:<12} plan ready after Enter: p50 {_percentile(latencies, 0.5):.3f}s   "
+              f"p95 {_percentile(latencies, 0.95):.3f}s")
+    stats = speculator.get_stats()
+    print(f"hit rate {stats['hit_rate']:.0%}   Gemini calls {stats['gemini_calls']} "
+          f"for {len(commands)} commands   wasted {stats['wasted_calls']} ({stats['wasted_rate']:.0%})   "
+          f"stale {stats['stale']}")
+
+if __name__ == "__main__":
+    main()
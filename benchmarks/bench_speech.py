@@ -0,0 +1,168 @@
+"""
+Benchmark for the full speech path
+
+Replays recordings through a fake microphone into SpeechRecognizer, so the
+real capture thread, wake word loop and command recognition run exactly as
+they do live, without audio hardware. Reports how long after the wake word
+detection fired, how long recognition took, CPU time per second of audio
+and, when the expected results are known, wake word and command accuracy.
+
+Recordings are given directly or in a JSON lines manifest:
+    {"audio": "open_terminal.wav", "wake_at": 0.8, "command": "open terminal"}
+where wake_at is the second at which the wake word ends (null if the
+recording has none, so any detection is a false accept).
+
+Run from the repository root:
+    python -m benchmarks.bench_speech --manifest recordings.jsonl --speed 4
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import time
+from config.settings import SPEECH_CONFIG
+from speech.recognition import SpeechRecognizer
+from speech.wake_word import DECODER_SAMPLE_RATE
+from benchmarks.bench_wake_word import load_audio
+from benchmarks.fake_microphone import FakeMicrophone
+
+def _normalize(text):
+    return ' '.join(re.sub(r'[^a-z0-9 ]+', ' ', (text or '').lower()).split())
+
+def run_recording(case, speed):
+    """
+    Play one recording through a SpeechRecognizer.
+
+    Args:
+        case (dict): 'audio' path, optional 'wake_at' and 'command'
+        speed (float): Playback speed relative to real time
+
+    Returns:
+        dict: Measurements for the recording
+    """
+    pcm = load_audio(case['audio'])
+    microphone = FakeMicrophone(pcm, DECODER_SAMPLE_RATE, speed=speed)
+    detections, commands = [], []
+    processing_started = []
+
+    def on_status(status):
+        if status == "Listening for command...":
+            detections.append(microphone.audio_time)
+        elif status == "Processing speech...":
+            processing_started.append(time.monotonic())
+
+    def on_command(text):
+        started = processing_started[-1] if processing_started else time.monotonic()
+        commands.append((text, time.monotonic() - started))
+
+    recognizer = SpeechRecognizer(on_command, on_status, microphone=microphone)
+    cpu_start = time.process_time()
+    recognizer.start_wake_detection()
+    microphone.finished.wait()
+    # Let a command that is still being recognized finish
+    deadline = time.monotonic() + 30
+    while recognizer.is_listening and time.monotonic() < deadline:
+        time.sleep(0.05)
+    recognizer.stop()
+    cpu = time.process_time() - cpu_start
+
+    audio_seconds = microphone.audio_time
+    result = {
+        'audio': case['audio'],
+        'detections': detections,
+        'commands': commands,
+        'cpu_per_audio_second': cpu / audio_seconds,
+        'wake_cpu_per_audio_second': recognizer.wake_detector.get_stats()['cpu_per_audio_second']
+    }
+    if 'wake_at' in case:
+        wake_at = case['wake_at']
+        if wake_at is None:
+            result['false_accepts'] = len(detections)
+        else:
+            hits = [t - wake_at for t in detections if t >= wake_at]
+            result['false_accepts'] = len(detections) - len(hits[:1])
+            result['detected'] = bool(hits)
+            result['detection_latency'] = hits[0] if hits else None
+    if case.get('command') is not None:
+        result['correct'] = any(_normalize(text) == _normalize(case['command']) for text, _ in commands)
+    return result
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def summarize(results):
+    """Print per-recording results and the aggregate figures."""
+    for r in results:
+        latency = r.get('detection_latency')
+        line = f"{os.path.basename(r['audio']):<30} detections {len(r['detections'])}"
+        if latency is not None:
+            line += f"   latency {latency:.2f}s"
+        for text, seconds in r['commands']:
+            line += f"   '{text}' in {seconds:.2f}s"
+        if 'correct' in r:
+            line += "   ok" if r['correct'] else "   WRONG"
+        print(line)
+
+    print()
+    print(f"cpu/audio-second       {statistics.mean(r['cpu_per_audio_second'] for r in results):.3f}"
+          f" (wake word {statistics.mean(r['wake_cpu_per_audio_second'] for r in results):.3f})")
+    latencies = [r['detection_latency'] for r in results if r.get('detection_latency') is not None]
+    if latencies:
+        print(f"detection latency      p50 {_percentile(latencies, 0.5):.2f}s   "
+              f"p95 {_percentile(latencies, 0.95):.2f}s")
+    recognition = [seconds for r in results for _, seconds in r['commands']]
+    if recognition:
+        print(f"recognition time       p50 {_percentile(recognition, 0.5):.2f}s   "
+              f"p95 {_percentile(recognition, 0.95):.2f}s")
+    with_wake = [r for r in results if 'detected' in r]
+    if with_wake:
+        print(f"wake word recall       {sum(r['detected'] for r in with_wake)}/{len(with_wake)}")
+    if any('false_accepts' in r for r in results):
+        print(f"false accepts          {sum(r.get('false_accepts', 0) for r in results)}")
+    judged = [r for r in results if 'correct' in r]
+    if judged:
+        print(f"command accuracy       {sum(r['correct'] for r in judged)}/{len(judged)}")
+
+def load_manifest(path):
+    base = os.path.dirname(os.path.abspath(path))
+    cases = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                case = json.loads(line)
+                case['audio'] = os.path.join(base, case['audio'])
+                cases.append(case)
+    return cases
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('audio', nargs='*', help="recordings to replay")
+    parser.add_argument('--manifest', help="JSON lines file of recordings and expected results")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="playback speed relative to real time (default: 1)")
+    parser.add_argument('--service', choices=['grammar', 'google', 'sphinx'],
+                        help="command recognition service (default: from settings)")
+    args = parser.parse_args()
+
+    cases = [{'audio': path} for path in args.audio]
+    if args.manifest:
+        cases += load_manifest(args.manifest)
+    if not cases:
+        parser.error("no recordings given")
+
+    # Run headless: no spoken feedback, and nothing else touches audio devices
+    SPEECH_CONFIG['enable_audio_feedback'] = False
+    if args.service:
+        SPEECH_CONFIG['recognition_service'] = args.service
+
+    results = []
+    for case in cases:
+        print(f"Replaying {case['audio']}...")
+        results.append(run_recording(case, args.speed))
+    summarize(results)
+
+if __name__ == "__main__":
+    main()
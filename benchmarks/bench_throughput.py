@@ -0,0 +1,141 @@
+"""
+Throughput benchmark against a local Gemini stand-in
+
+Installs FakeModel through core.clients.set_model_factory and drives
+interpret_command, create_file and the command pipeline that on_submit
+feeds, reporting commands per second and latency percentiles. Files are
+written to a temporary directory and are not opened. The interpretation
+and generated file caches are off unless --cache is given, and are kept
+in that directory too, so FakeModel output never reaches the user's cache.
+
+Run from the repository root:
+    python -m benchmarks.bench_throughput --suite all --latency 0.4 --requests 40
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from config.settings import INTERPRETER_CONFIG, FILE_CACHE_CONFIG
+from core import clients
+from core.interpreter import interpret_command
+from core.pipeline import CommandPipeline
+import actions.file_creator as file_creator
+from benchmarks.fake_gemini import FakeModel, RESPONSE_FORMATS
+
+# Commands the local parser does not handle, so each one reaches the model
+COMMANDS = [
+    "write me something that scrapes weather data",
+    "I need a script to rename photos by date",
+    "set up a small flask api for notes",
+    "make a tool that watches a folder and backs it up",
+    "code a snake game and a tetris clone",
+    "put together a csv to json converter"
+]
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def report(name, latencies, elapsed, errors=0):
+    """Print throughput and the latency distribution of a suite."""
+    print(f"{name:<18} {len(latencies) / elapsed:7.2f} commands/s   "
+          f"mean {statistics.mean(latencies):.3f}s   "
+          f"p50 {_percentile(latencies, 0.5):.3f}s   p95 {_percentile(latencies, 0.95):.3f}s   "
+          f"p99 {_percentile(latencies, 0.99):.3f}s   errors {errors}")
+
+def bench_interpret(requests):
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    for i in range(requests):
+        call_start = time.perf_counter()
+        actions = interpret_command(COMMANDS[i % len(COMMANDS)])
+        latencies.append(time.perf_counter() - call_start)
+        errors += any(a.get('action') == 'error' for a in actions)
+    report("interpret_command", latencies, time.perf_counter() - start, errors)
+
+def bench_create_file(requests, stream):
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    for i in range(requests):
+        call_start = time.perf_counter()
+        status = file_creator.create_file('python', f"benchmark {i}", stream=stream)
+        latencies.append(time.perf_counter() - call_start)
+        errors += status.startswith("Failed")
+    report(f"create_file {'stream' if stream else 'buffer'}", latencies,
+           time.perf_counter() - start, errors)
+
+def bench_pipeline(requests, workers):
+    """Submit commands the way on_submit does and wait for all of them."""
+    finished = threading.Semaphore(0)
+    results = []
+
+    def dispatch(event, job, payload):
+        if event in ("done", "cancelled", "quit"):
+            results.append((time.perf_counter() - job.submitted, payload))
+            finished.release()
+
+    pipeline = CommandPipeline(dispatch, workers=workers)
+    start = time.perf_counter()
+    for i in range(requests):
+        # A full queue is what the GUI reports as "please wait"; retry like a user would
+        while pipeline.submit(COMMANDS[i % len(COMMANDS)]) is None:
+            time.sleep(0.01)
+    for _ in range(requests):
+        finished.acquire()
+    elapsed = time.perf_counter() - start
+    pipeline.shutdown()
+
+    latencies = [latency for latency, _ in results]
+    errors = sum("Error" in (payload or "") or "Failed" in (payload or "") for _, payload in results)
+    report(f"pipeline x{pipeline.workers}", latencies, elapsed, errors)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--suite', choices=['interpret', 'create_file', 'pipeline', 'all'], default='all')
+    parser.add_argument('--requests', type=int, default=20, help="commands per suite")
+    parser.add_argument('--latency', type=float, default=0.5, help="mean model latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0.3, help="latency variation as a fraction")
+    parser.add_argument('--chunk-interval', type=float, default=0.05, help="seconds between streamed chunks")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of model calls that fail")
+    parser.add_argument('--format', choices=sorted(RESPONSE_FORMATS) + ['mixed'], default='mixed',
+                        help="format of interpretation responses")
+    parser.add_argument('--workers', type=int, default=None, help="pipeline workers (default: from settings)")
+    parser.add_argument('--cache', action='store_true',
+                        help="keep the interpretation and generated file caches enabled")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    models = []
+
+    def factory(model_name):
+        model = FakeModel(model_name, latency=args.latency, jitter=args.jitter,
+                          chunk_interval=args.chunk_interval, error_rate=args.error_rate,
+                          response_format=args.format, seed=args.seed)
+        models.append(model)
+        return model
+
+    clients.set_model_factory(factory)
+    INTERPRETER_CONFIG["cache_enabled"] = args.cache
+    FILE_CACHE_CONFIG["enabled"] = args.cache
+    # Write generated files and caches somewhere disposable and do not launch editors or browsers
+    os.chdir(tempfile.mkdtemp(prefix="commandcompanion-bench-"))
+    os.environ["XDG_CACHE_HOME"] = os.path.join(os.getcwd(), "cache")
+    file_creator._open_file = lambda content_type, path, filename, *rest: f"Created {filename}"
+
+    print(f"Fake model latency {args.latency}s +/-{args.jitter:.0%}, error rate {args.error_rate:.0%}, "
+          f"writing to {os.getcwd()}")
+    if args.suite in ('interpret', 'all'):
+        bench_interpret(args.requests)
+    if args.suite in ('create_file', 'all'):
+        bench_create_file(args.requests, stream=False)
+        bench_create_file(args.requests, stream=True)
+    if args.suite in ('pipeline', 'all'):
+        bench_pipeline(args.requests, args.workers)
+    for model in models:
+        print(f"Model calls: {model.stats}")
+
+if __name__ == "__main__":
+    main()
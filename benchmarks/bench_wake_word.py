@@ -0,0 +1,78 @@
+"""
+Benchmark for the wake word backends
+
+Feeds a recording through each wake word backend frame by frame, with
+and without the voice activity gate, and reports CPU time per second of
+audio, the number of detections and, when the position of the wake word
+is known, how long after it the detection fired (in audio time).
+
+Run from the repository root:
+    python -m benchmarks.bench_wake_word recording.wav --wake-at 1.2
+"""
+
+import argparse
+import time
+import speech_recognition as sr
+from speech.vad import VoiceActivityDetector
+from speech.wake_word import BACKENDS, DECODER_SAMPLE_RATE, WakeWordDetector
+
+FRAME_SAMPLES = 1024
+
+def load_audio(path):
+    """Read a WAV/AIFF/FLAC file as 16 kHz 16-bit mono PCM."""
+    with sr.AudioFile(path) as source:
+        audio = sr.Recognizer().record(source)
+    return audio.get_raw_data(convert_rate=DECODER_SAMPLE_RATE, convert_width=2)
+
+def run_backend(backend, pcm, wake_at=None, use_vad=False):
+    detector = WakeWordDetector(backend=backend)
+    vad = VoiceActivityDetector(DECODER_SAMPLE_RATE) if use_vad else None
+    frame_bytes = FRAME_SAMPLES * 2
+    detections = []
+    vad_cpu = 0.0
+    for offset in range(0, len(pcm) - frame_bytes + 1, frame_bytes):
+        frame = pcm[offset:offset + frame_bytes]
+        frames, segment_ended = [frame], False
+        if vad:
+            start = time.process_time()
+            frames, segment_ended = vad.filter(frame)
+            vad_cpu += time.process_time() - start
+        if any([detector.process(f) for f in frames]):
+            detections.append((offset + frame_bytes) / (2 * DECODER_SAMPLE_RATE))
+        if segment_ended:
+            detector.reset()
+    stats = detector.get_stats()
+    audio_seconds = len(pcm) / (2 * DECODER_SAMPLE_RATE)
+    cpu = (stats['cpu_seconds'] + vad_cpu) / audio_seconds
+
+    label = f"{detector.backend_name}{'+vad' if vad else ''}"
+    print(f"{label:<14} cpu/audio-second {cpu:.3f}   detections {stats['detections']}")
+    if vad:
+        print(f"{'':<14} skipped {vad.get_stats()['skipped_ratio']:.0%} of frames")
+    if wake_at is not None:
+        after = [t for t in detections if t >= wake_at]
+        if after:
+            print(f"{'':<14} first detection {after[0] - wake_at:.2f}s after the wake word")
+        else:
+            print(f"{'':<14} wake word missed")
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('audio', help="recording to process")
+    parser.add_argument('--wake-at', type=float, help="second at which the wake word ends")
+    parser.add_argument('--backend', choices=sorted(BACKENDS), action='append',
+                        help="backend to run (default: all)")
+    parser.add_argument('--no-vad', action='store_true',
+                        help="skip the runs with the voice activity gate")
+    args = parser.parse_args()
+
+    pcm = load_audio(args.audio)
+    print(f"Loaded {len(pcm) / (2 * DECODER_SAMPLE_RATE):.1f}s of audio")
+    for backend in args.backend or sorted(BACKENDS):
+        run_backend(backend, pcm, args.wake_at)
+        if not args.no_vad:
+            run_backend(backend, pcm, args.wake_at, use_vad=True)
+
+if __name__ == "__main__":
+    main()
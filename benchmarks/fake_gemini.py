@@ -0,0 +1,148 @@
+"""
+Local stand-in for the Gemini model interface
+
+FakeModel implements the parts of genai.GenerativeModel CommandCompanion
+uses (generate_content with and without stream=True, count_tokens) with
+configurable latency, streaming pace and error injection, so the
+interpreter, file creator and pipeline can be measured without an API
+key or network. Install it with:
+    core.clients.set_model_factory(lambda name: FakeModel(name, latency=0.4))
+
+Command interpretation prompts are answered with canned actions in the
+formats extract_json has to cope with; file generation prompts with
+generated code of a configurable length.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+
+# Formats command interpretations are returned in, as Gemini has been seen to reply
+RESPONSE_FORMATS = {
+    'json': lambda data: json.dumps(data),
+    'fenced': lambda data: f"```json\n{json.dumps(data, indent=2)}\n```",
+    'python': lambda data: repr(data),
+    'prose': lambda data: f"Here is the interpretation of your command:\n{json.dumps(data)}\nLet me know if you need anything else."
+}
+
+_COMMAND_RE = re.compile(r"Command: '(.*)'\s*$", re.DOTALL)
+
+class InjectedError(Exception):
+    """Raised by FakeModel to simulate a failed API call."""
+
+class _Usage:
+    def __init__(self, prompt, text):
+        self.prompt_token_count = len(prompt.split())
+        self.candidates_token_count = len(text.split())
+        self.total_token_count = self.prompt_token_count + self.candidates_token_count
+
+class FakeResponse:
+    def __init__(self, prompt, text):
+        self.text = text
+        self.usage_metadata = _Usage(prompt, text)
+
+class _TokenCount:
+    def __init__(self, total_tokens):
+        self.total_tokens = total_tokens
+
+class FakeModel:
+    def __init__(self, model_name="fake", latency=0.5, jitter=0.3, chunk_interval=0.05,
+                 chunk_chars=80, error_rate=0.0, response_format='json', file_lines=60,
+                 responses=None, seed=None):
+        """
+        Initialize the stand-in.
+
+        Args:
+            model_name (str): Reported model name
+            latency (float): Mean seconds until the response (or first chunk) arrives
+            jitter (float): Latency varies uniformly by this fraction either way
+            chunk_interval (float): Seconds between streamed chunks
+            chunk_chars (int): Characters per streamed chunk
+            error_rate (float): Share of calls that raise InjectedError
+            response_format (str): Key of RESPONSE_FORMATS, or 'mixed' to rotate
+                through all of them
+            file_lines (int): Lines of code returned for file generation prompts
+            responses (dict, optional): Prompt substring -> response text, checked
+                before the built-in answers
+            seed (int, optional): Seed for latency jitter and error injection
+        """
+        self.model_name = model_name
+        self.latency = latency
+        self.jitter = jitter
+        self.chunk_interval = chunk_interval
+        self.chunk_chars = chunk_chars
+        self.error_rate = error_rate
+        self.response_format = response_format
+        self.file_lines = file_lines
+        self.responses = responses or {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "streamed_calls": 0, "errors": 0, "count_tokens": 0}
+
+    def _delay(self):
+        with self._lock:
+            factor = 1 + self._random.uniform(-self.jitter, self.jitter)
+            failed = self._random.random() < self.error_rate
+        time.sleep(max(0.0, self.latency * factor))
+        if failed:
+            with self._lock:
+                self.stats["errors"] += 1
+            raise InjectedError("Injected API error")
+
+    def _interpretation(self, command, structured=False):
+        """Canned actions for a command: one create_file per 'and'-separated part."""
+        parts = [part.strip() for part in re.split(r'\band\b', command) if part.strip()]
+        data = [{'action': 'create_file', 'type': 'python', 'topic': part} for part in parts]
+        if structured:
+            # Schema-constrained output is always a bare JSON array
+            return json.dumps(data)
+        if len(data) == 1:
+            data = data[0]
+        response_format = self.response_format
+        if response_format == 'mixed':
+            formats = sorted(RESPONSE_FORMATS)
+            response_format = formats[self.stats["calls"] % len(formats)]
+        return RESPONSE_FORMATS[response_format](data)
+
+    def _file_content(self, prompt):
+        if 'HTML' in prompt:
+            body = '\n'.join(f"    <p>Paragraph {i}</p>" for i in range(self.file_lines))
+            return f"<!DOCTYPE html>\n<html>\n<body>\n{body}\n</body>\n</html>"
+        body = '\n'.join(f"    value_{i} = {i} * 2" for i in range(self.file_lines))
+        return f"```python\ndef main():\n{body}\n\nif __name__ == '__main__':\n    main()\n```"
+
+    def respond(self, prompt, structured=False):
+        """Return the text the model answers prompt with."""
+        for key, text in self.responses.items():
+            if key in prompt:
+                return text
+        match = _COMMAND_RE.search(prompt)
+        if match:
+            return self._interpretation(match.group(1), structured)
+        return self._file_content(prompt)
+
+    def generate_content(self, prompt, stream=False, generation_config=None, **kwargs):
+        with self._lock:
+            self.stats["calls"] += 1
+            if stream:
+                self.stats["streamed_calls"] += 1
+        structured = (generation_config or {}).get("response_mime_type") == "application/json"
+        text = self.respond(prompt, structured)
+        if stream:
+            return self._stream(prompt, text)
+        self._delay()
+        return FakeResponse(prompt, text)
+
+    def _stream(self, prompt, text):
+        self._delay()
+        for start in range(0, len(text), self.chunk_chars):
+            if start:
+                time.sleep(self.chunk_interval)
+            yield FakeResponse(prompt, text[start:start + self.chunk_chars])
+
+    def count_tokens(self, contents):
+        with self._lock:
+            self.stats["count_tokens"] += 1
+        return _TokenCount(len(str(contents).split()))
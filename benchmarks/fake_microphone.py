@@ -0,0 +1,74 @@
+"""
+Fake microphone that replays recordings
+
+Implements the parts of the sr.Microphone interface CommandCompanion uses
+(SAMPLE_RATE, SAMPLE_WIDTH, CHUNK, the context manager and stream.read),
+so SpeechRecognizer and AudioStream can run on recorded audio with no
+audio hardware. Reads are paced like a real device, optionally sped up.
+"""
+
+import threading
+import time
+
+class _FakeStream:
+    def __init__(self, microphone):
+        self.microphone = microphone
+
+    def read(self, size):
+        return self.microphone._read(size)
+
+    def close(self):
+        pass
+
+class FakeMicrophone:
+    def __init__(self, pcm, sample_rate=16000, chunk_size=1024, speed=1.0, tail_seconds=3.0):
+        """
+        Initialize a fake microphone.
+
+        Args:
+            pcm (bytes): 16-bit mono audio to play back
+            sample_rate (int): Sample rate of pcm
+            chunk_size (int): Samples per read, like sr.Microphone's chunk_size
+            speed (float): Playback speed relative to real time; 0 reads as fast
+                as the caller asks (only safe when the reader keeps up)
+            tail_seconds (float): Silence played after the recording before
+                the microphone reports it has finished
+        """
+        self.SAMPLE_RATE = sample_rate
+        self.SAMPLE_WIDTH = 2
+        self.CHUNK = chunk_size
+        self.pcm = pcm + bytes(int(tail_seconds * sample_rate) * 2)
+        self.speed = speed
+        self.stream = None
+        self.finished = threading.Event()
+        self.samples_read = 0
+        self._started_at = None
+
+    @property
+    def audio_time(self):
+        """Seconds of audio delivered so far."""
+        return self.samples_read / self.SAMPLE_RATE
+
+    def __enter__(self):
+        self.stream = _FakeStream(self)
+        self._started_at = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stream = None
+
+    def _read(self, size):
+        if self.speed:
+            # Wait until the chunk would have been captured by a real device
+            due = self._started_at + (self.samples_read + size) / self.SAMPLE_RATE / self.speed
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        offset = self.samples_read * 2
+        frame = self.pcm[offset:offset + size * 2]
+        if len(frame) < size * 2:
+            # The recording is over; keep the stream alive with silence
+            self.finished.set()
+            frame += bytes(size * 2 - len(frame))
+        self.samples_read += size
+        return frame
@@ -0,0 +1,148 @@
+"""
+Headless batch mode for CommandCompanion
+
+Reads one command per line from a file or stdin, interprets the commands
+concurrently and executes their action plans (or only prints the plans
+with --dry-run), then writes the results as JSON. Log output goes to
+stderr so stdout only carries the results.
+
+Usage:
+    python cli.py commands.txt --concurrency 4
+    echo "open terminal" | python cli.py --dry-run
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+
+# Settings report missing executables with print at import time; keep stdout for results
+with contextlib.redirect_stdout(sys.stderr):
+    from config.settings import PIPELINE_CONFIG
+    from core import clients
+    from core.interpreter import interpret_command
+    from core.executor import execute_plan, plan_dependencies
+    from utils.tracing import start_trace, activate, deactivate
+
+def read_commands(stream):
+    """Return the non-empty lines of stream, skipping # comments."""
+    commands = []
+    for line in stream:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            commands.append(line)
+    return commands
+
+def run_command(index, command, dry_run=False, cancel_event=None):
+    """
+    Interpret a command and execute its plan.
+
+    Args:
+        index (int): Position of the command in the input
+        command (str): The command text
+        dry_run (bool): Only interpret, do not execute
+        cancel_event (threading.Event, optional): Skips steps that have not started when set
+
+    Returns:
+        dict: The command, its actions and their statuses
+    """
+    start = time.perf_counter()
+    result = {"index": index, "command": command}
+    trace = start_trace(command)
+    token = activate(trace)
+    try:
+        actions, source = interpret_command(command, return_source=True)
+        result.update(source=source, actions=actions)
+        errors = [a.get('message', 'Unknown error') for a in actions if a.get('action') == 'error']
+        if errors:
+            result["error"] = "; ".join(errors)
+        # Quitting means nothing without a window; steps after it are not run, as in the GUI
+        for i, action_data in enumerate(actions):
+            if action_data.get('action') == 'quit':
+                actions = actions[:i]
+                break
+        if dry_run:
+            result["depends_on"] = plan_dependencies(actions)
+        elif not errors:
+            result["statuses"] = execute_plan(actions, context={}, cancel_event=cancel_event)
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        deactivate(token)
+    result["duration"] = round(time.perf_counter() - start, 3)
+    if trace:
+        trace.finish(source=result.get("source"), cancelled=False)
+    return result
+
+def run_batch(commands, concurrency, dry_run=False, on_result=None):
+    """
+    Run commands with at most concurrency of them in flight.
+
+    Args:
+        commands (list): Command strings
+        concurrency (int): Maximum commands interpreted or executed at once
+        dry_run (bool): Only interpret, do not execute
+        on_result (function, optional): Called with each result as it finishes
+
+    Returns:
+        list: Results in input order
+    """
+    cancel_event = threading.Event()
+    results = [None] * len(commands)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = [pool.submit(run_command, i, command, dry_run, cancel_event)
+                   for i, command in enumerate(commands)]
+        try:
+            for future in as_completed(futures):
+                result = future.result()
+                results[result["index"]] = result
+                if on_result:
+                    on_result(result)
+        except KeyboardInterrupt:
+            # Let running steps finish, skip everything else
+            cancel_event.set()
+            for future in futures:
+                future.cancel()
+            raise
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run CommandCompanion commands without the GUI.")
+    parser.add_argument('input', nargs='?', default='-', help="file with one command per line (default: stdin)")
+    parser.add_argument('-c', '--concurrency', type=int, default=PIPELINE_CONFIG.get("workers", 2),
+                        help="commands processed at once")
+    parser.add_argument('-n', '--dry-run', action='store_true', help="print action plans without executing them")
+    parser.add_argument('--jsonl', action='store_true',
+                        help="write one JSON result per line as each command finishes")
+    args = parser.parse_args(argv)
+
+    if args.input == '-':
+        commands = read_commands(sys.stdin)
+    else:
+        with open(args.input) as f:
+            commands = read_commands(f)
+
+    output = sys.stdout
+
+    def emit(result):
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+
+    # The interpreter and actions report progress with print; keep it off stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        load_dotenv()
+        clients.configure(os.getenv('GENAI_API_KEY'))
+        results = run_batch(commands, args.concurrency, args.dry_run,
+                            on_result=emit if args.jsonl else None)
+    if not args.jsonl:
+        json.dump(results, output, indent=2)
+        output.write("\n")
+    return 1 if any("error" in r for r in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Thin client for the CommandCompanion daemon
+
+Sends a command to daemon.py over its Unix socket and prints the status.
+Only standard library modules are imported, so it is cheap enough to bind
+to a desktop hotkey.
+
+Usage:
+    python client.py open terminal
+    python client.py --no-wait create a python file for a web scraper
+    python client.py --cancel
+"""
+
+import argparse
+import socket
+import sys
+from utils.ipc import socket_path, send_message, read_message
+
+FINAL_EVENTS = ("done", "cancelled", "quit", "rejected", "error", "pong", "stats")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Send a command to the CommandCompanion daemon.")
+    parser.add_argument('command', nargs='*', help="the command to run")
+    parser.add_argument('--no-wait', action='store_true', help="return as soon as the command is queued")
+    parser.add_argument('-v', '--verbose', action='store_true', help="print progress while the command runs")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--cancel', action='store_true', help="cancel queued and running commands")
+    group.add_argument('--stats', action='store_true', help="print pipeline and cache counters")
+    group.add_argument('--ping', action='store_true', help="check that the daemon is running")
+    args = parser.parse_args(argv)
+
+    if args.cancel:
+        request = {"op": "cancel"}
+    elif args.stats:
+        request = {"op": "stats"}
+    elif args.ping:
+        request = {"op": "ping"}
+    elif args.command:
+        request = {"command": " ".join(args.command), "wait": not args.no_wait}
+    else:
+        parser.error("no command given")
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path())
+    except OSError:
+        print("CommandCompanion daemon is not running (start it with: python daemon.py)", file=sys.stderr)
+        return 2
+
+    with sock, sock.makefile('rwb') as sock_file:
+        send_message(sock_file, request)
+        while True:
+            message = read_message(sock_file)
+            if message is None:
+                print("Connection to the daemon was closed", file=sys.stderr)
+                return 1
+            event = message.get("event")
+            if event == "stats":
+                print(f"pipeline: {message['pipeline']}\ncache: {message['cache']}\n"
+                      f"files: {message.get('files', {})}")
+            elif event in FINAL_EVENTS or (event == "queued" and args.no_wait):
+                print(message.get("message") or event)
+            elif args.verbose:
+                print(message.get("message"), file=sys.stderr)
+            if event in FINAL_EVENTS or (event == "queued" and args.no_wait):
+                return 1 if event in ("rejected", "error") or message.get("error") else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
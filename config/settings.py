@@ -3,9 +3,7 @@ Configuration settings for CommandCompanion
 Optimized for Fedora OS
 """
 
-import os
-import shutil
-import subprocess
+from utils.executables import get_executable_index
 
 GUI_TITLE = "CommandCompanion"
 GUI_SIZE = "650x320"
@@ -26,10 +24,12 @@ def get_brave_executable():
     Find the correct Brave browser executable for Fedora.
     Returns the full command with any necessary flags.
     """
+    index = get_executable_index()
+
     # Check possible executable names for Brave on Fedora
     possible_names = ['brave-browser', 'brave', 'brave-browser-stable', 'brave-browser-beta', 'brave-bin']
     for name in possible_names:
-        path = shutil.which(name)
+        path = index.executables.get(name)
         if path:
             return path
     
@@ -43,20 +43,12 @@ def get_brave_executable():
         '/app/bin/brave'  # For Flatpak installation
     ]
     for path in common_paths:
-        if os.path.exists(path) and os.access(path, os.X_OK):
+        if path in index.paths:
             return path
     
-    # Try flatpak command as a last resort
-    flatpak_path = shutil.which('flatpak')
-    if flatpak_path:
-        # Check if Brave is installed via Flatpak
-        try:
-            result = subprocess.run(['flatpak', 'list', '--app'], 
-                              capture_output=True, text=True)
-            if 'com.brave.Browser' in result.stdout:
-                return 'flatpak run com.brave.Browser'
-        except:
-            pass
+    # Check if Brave is installed via Flatpak
+    if index.has_flatpak('com.brave.Browser'):
+        return 'flatpak run com.brave.Browser'
     
     print("WARNING: Could not find Brave browser executable")
     return 'brave-browser'  # Fall back to default name
@@ -77,11 +69,109 @@ app_aliases = {
     'settings': 'gnome-control-center'
 }
 
+# Alternative spellings users commonly type for the aliases above
+app_synonyms = {
+    'vs code': 'vscode',
+    'visual studio code': 'vscode',
+    'code editor': 'vscode',
+    'brave browser': 'brave',
+    'google chrome': 'chrome',
+    'file manager': 'files',
+    'calc': 'calculator',
+    'console': 'terminal'
+}
+
 # Allowed system tasks for security
 allowed_tasks = {
     'empty_trash': 'rm -rf ~/.local/share/Trash/*'
 }
 
+# Content types supported by create_file and the words that refer to them
+file_type_keywords = {
+    'python': ['python', 'py'],
+    'website': ['website', 'webpage', 'web page', 'html', 'site', 'landing page']
+}
+
+# Verbs recognised by the local command parser
+COMMAND_VERBS = {
+    'open_app': ['open', 'launch', 'start', 'run', 'fire up'],
+    'create_file': ['create', 'make', 'write', 'generate', 'build', 'regenerate'],
+    'system_task': ['empty', 'clear'],
+    'quit': ['quit', 'exit', 'close']
+}
+
+# Words in a create_file command that bypass the generated file cache
+REGENERATE_WORDS = ['regenerate', 'fresh']
+
+# Latency tracing (also enabled by COMMANDCOMPANION_TRACE=1 or =<path>)
+TRACING_CONFIG = {
+    "enabled": False,                  # Record a trace of timed spans for every command
+    "path": None                       # JSON lines file, defaults to traces.jsonl in the cache directory
+}
+
+# Command interpretation settings
+INTERPRETER_CONFIG = {
+    "local_fast_path": True,           # Resolve simple commands locally before calling Gemini
+    "cache_enabled": True,             # Cache Gemini interpretations on disk
+    "cache_ttl_seconds": 7 * 24 * 3600,  # How long a cached interpretation stays valid
+    "cache_max_entries": 500,          # Entries kept on disk before the least recently used are evicted
+    "cache_memory_entries": 64,        # Entries kept in the in-memory LRU
+    "structured_output": True,         # Ask Gemini for schema-constrained JSON with the compact prompt
+    "stream_actions": True             # Start executing actions while Gemini is still generating the rest
+}
+
+# Speculative interpretation while the user is typing in the GUI
+SPECULATION_CONFIG = {
+    "enabled": True,                   # Interpret the entry text in the background before Enter is pressed
+    "debounce_ms": 400,                # Typing pause before the current text is interpreted
+    "min_chars": 10                    # Shorter text is not worth a Gemini call
+}
+
+# Background command processing settings
+PIPELINE_CONFIG = {
+    "workers": 2,                      # Commands processed concurrently
+    "max_queued_commands": 8,          # Commands that may wait before new ones are rejected
+    "ui_poll_interval_ms": 50          # How often the GUI picks up pipeline results
+}
+
+# Multi-step action plan settings
+EXECUTOR_CONFIG = {
+    "max_parallel_actions": 4          # Steps of one command that may run at the same time
+}
+
+# Fuzzy application lookup over installed .desktop entries
+DESKTOP_INDEX_CONFIG = {
+    "enabled": True,                   # Resolve unknown app names through .desktop entries
+    "min_score": 0.4                   # Minimum trigram similarity for a match (0-1)
+}
+
+# Readiness probing for launched applications
+READINESS_CONFIG = {
+    "timeout": 15,                     # Seconds to wait for an app before giving up
+    "initial_delay": 0.05,             # First delay between probes, doubled after each attempt
+    "max_delay": 1.0                   # Upper bound for the delay between probes
+}
+
+# What to look for when deciding a launched app is ready
+readiness_probes = {
+    'vscode': {
+        'process': 'code',
+        'socket': 'vscode-*main.sock',
+        'window_class': 'code'
+    }
+}
+
+# Generated file settings
+FILE_CREATION_CONFIG = {
+    "stream": True                     # Write generated files while Gemini is still responding
+}
+
+# Generated file cache configuration
+FILE_CACHE_CONFIG = {
+    "enabled": True,                   # Serve repeated create_file requests from disk
+    "max_bytes": 50 * 1024 * 1024      # Stored content before least recently used files are evicted
+}
+
 # AI model configuration
 AI_MODEL = 'gemini-1.5-flash'
 
@@ -116,6 +206,19 @@ COMMAND_INTERPRETATION_PROMPT = (
     "- 'empty the trash': {{'action': 'system_task', 'task': 'empty_trash'}}\n"
     "- 'build a portfolio website': {{'action': 'create_file', 'type': 'website', 'topic': 'portfolio'}}\n"
     "- 'open VSCode and create a Python file for a CNN model': [{{'action': 'open_app', 'app': 'vscode'}}, {{'action': 'create_file', 'type': 'python', 'topic': 'CNN model'}}]\n"
+    "- 'regenerate the snake game script': {{'action': 'create_file', 'type': 'python', 'topic': 'snake game', 'regenerate': true}}\n"
+    "Command: '{prompt}'"
+)
+
+# Used with INTERPRETER_CONFIG["structured_output"]; the response schema in
+# core/schema.py describes the action fields, so no examples are needed
+STRUCTURED_INTERPRETATION_PROMPT = (
+    "Turn this Fedora Linux desktop command into a list of actions, in order. "
+    "open_app opens any installed application (app: its name, e.g. vscode, firefox, gimp). "
+    "system_task runs a named task (task: empty_trash). "
+    "create_file generates a file (type: python or website; topic: what it is for; "
+    "regenerate: true only if asked for a fresh or regenerated version). "
+    "quit closes the assistant. Use unknown if nothing fits.\n"
     "Command: '{prompt}'"
 )
 
@@ -123,7 +226,25 @@ SPEECH_CONFIG = {
     "wake_word": "comp",           # Default wake word
     "custom_wake_word_path": None,     # Path to custom wake word file, if used
     "speech_recognition_timeout": 5,   # Seconds to listen for command
-    "recognition_service": "google",   # Speech recognition service to use
+    "pre_roll_seconds": 0.5,           # Audio from before the wake word detection included in the command
+    "continuation_seconds": 0.3,       # Audio after the wake word checked for a command spoken in the same breath
+    "prompt_threshold_ratio": 2.0,     # Energy threshold multiple needed to start a command while "Yes?" plays
+    "ring_buffer_seconds": 8.0,        # Seconds of audio kept by the shared capture stream
+    "recognition_service": "google",   # 'google', 'sphinx' or 'grammar' (offline, cloud fallback)
+    "fallback_recognition_service": "google",  # Used when the offline grammar decode is not confident
+    "grammar_min_confidence": 0.5,     # Minimum posterior probability to accept an offline decode
+    "grammar_min_acoustic_ratio": 0.8, # Per-frame likelihood ratio to the phone loop below which speech is out-of-grammar
     "sensitivity": 0.6,                # Wake word detection sensitivity (0-1)
-    "enable_audio_feedback": True      # Whether to use text-to-speech feedback
+    "wake_word_backend": "keyphrase",  # 'keyphrase' (frame-level spotting) or 'sphinx' (full phrase decodes)
+    "vad_enabled": True,               # Skip silent frames before wake word decoding
+    "adaptive_noise_floor": True,      # Keep adjusting the energy threshold to the room's noise level
+    "noise_floor_window_seconds": 3.0, # Rolling window the noise floor is estimated over
+    "noise_threshold_ratio": 3.0,      # Energy threshold as a multiple of the noise floor
+    "min_energy_threshold": 100,       # Lower bound for the adaptive energy threshold
+    "enable_audio_feedback": True,     # Whether to use text-to-speech feedback
+    "feedback_phrases": [              # Phrases pre-rendered to audio files at startup
+        "Yes?",
+        "Sorry, I didn't hear anything",
+        "Sorry, I didn't catch that"
+    ]
 }
\ No newline at end of file
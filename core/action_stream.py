@@ -0,0 +1,81 @@
+"""
+Incremental parsing of streamed action lists
+
+Gemini streams its answer in chunks that split JSON at arbitrary points.
+ActionStreamParser scans the text as it arrives and returns every
+top-level JSON object as soon as its closing brace is seen, so the first
+action of a plan can run before the rest of the array has been generated.
+Text outside objects (array brackets, commas, code fences, prose) is
+skipped.
+"""
+
+import ast
+import json
+
+class ActionStreamParser:
+    def __init__(self):
+        self._buffer = []       # Characters of the object being read
+        self._depth = 0         # Brace/bracket nesting inside the current object
+        self._quote = None      # Quote character of the string being read, if any
+        self._escaped = False
+        self.errors = []        # Objects that could not be decoded
+
+    def feed(self, text):
+        """
+        Consume a chunk of the response.
+
+        Args:
+            text (str): The next chunk
+
+        Returns:
+            list: Objects completed by this chunk, in order
+        """
+        completed = []
+        for char in text:
+            if self._depth == 0:
+                if char == '{':
+                    self._buffer = [char]
+                    self._depth = 1
+                continue
+
+            self._buffer.append(char)
+            if self._quote:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == self._quote:
+                    self._quote = None
+            elif char in '"\'':
+                # Single quotes too, for Python-style dicts in free-text responses
+                self._quote = char
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    obj = self._decode(''.join(self._buffer))
+                    if obj is not None:
+                        completed.append(obj)
+        return completed
+
+    def _decode(self, text):
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            pass
+        try:
+            # Python-style dict with single quotes; literal_eval keeps apostrophes intact
+            obj = ast.literal_eval(text)
+            if isinstance(obj, dict):
+                return obj
+        except (ValueError, SyntaxError):
+            pass
+        print(f"Could not decode streamed object: {text}")
+        self.errors.append(text)
+        return None
+
+    def parse(self, chunks):
+        """Yield objects from an iterable of text chunks as they complete."""
+        for chunk in chunks:
+            yield from self.feed(chunk)
@@ -0,0 +1,392 @@
+"""
+Interpretation and generated file caches for CommandCompanion
+
+InterpretationCache maps normalized commands to the action plans Gemini
+returned for them. Recent entries live in an in-memory LRU; everything is
+persisted to a SQLite database in the user's cache directory so plans
+survive restarts.
+
+GeneratedFileCache keeps the content Gemini generated for create_file,
+keyed on the content type, topic, prompt template and model. Content is
+stored on disk under the hash of its text, and the least recently used
+entries are evicted once the stored content exceeds a size limit.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from config.settings import (AI_MODEL, COMMAND_INTERPRETATION_PROMPT, STRUCTURED_INTERPRETATION_PROMPT,
+                             INTERPRETER_CONFIG, FILE_CACHE_CONFIG)
+from utils.helpers import get_cache_dir
+
+def normalize_command(command):
+    """Normalize a command so trivially different spellings share a cache entry."""
+    command = re.sub(r'\s+', ' ', command.strip().lower())
+    return command.rstrip('.!?')
+
+def interpretation_fingerprint():
+    """Identify the prompt and model that produced cached plans."""
+    if INTERPRETER_CONFIG.get("structured_output", True):
+        prompt = STRUCTURED_INTERPRETATION_PROMPT
+    else:
+        prompt = COMMAND_INTERPRETATION_PROMPT
+    data = f"{AI_MODEL}\n{prompt}".encode('utf-8')
+    return hashlib.sha256(data).hexdigest()[:16]
+
+class InterpretationCache:
+    def __init__(self, path=None, max_entries=None, memory_entries=None, ttl=None,
+                 fingerprint=None):
+        """
+        Initialize the cache and open its on-disk store.
+
+        Args:
+            path (str, optional): SQLite database path, defaults to the user's cache dir
+            max_entries (int, optional): Entries kept on disk
+            memory_entries (int, optional): Entries kept in the in-memory LRU
+            ttl (float, optional): Seconds before an entry expires
+            fingerprint (str, optional): Prompt/model fingerprint, entries made
+                under a different fingerprint are discarded
+        """
+        self.path = path or os.path.join(get_cache_dir(), "interpretations.sqlite3")
+        # An explicit 0 is honoured, e.g. memory_entries=0 keeps nothing in memory
+        if max_entries is None:
+            max_entries = INTERPRETER_CONFIG.get("cache_max_entries", 500)
+        if memory_entries is None:
+            memory_entries = INTERPRETER_CONFIG.get("cache_memory_entries", 64)
+        if ttl is None:
+            ttl = INTERPRETER_CONFIG.get("cache_ttl_seconds", 7 * 24 * 3600)
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.ttl = ttl
+        self.fingerprint = fingerprint or interpretation_fingerprint()
+
+        self._memory = OrderedDict()
+        self._touched = {}      # Memory hits whose last_used is not on disk yet
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "memory_hits": 0, "disk_hits": 0,
+                      "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0}
+
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS plans ("
+            "command TEXT PRIMARY KEY, actions TEXT NOT NULL, "
+            "created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._invalidate_if_stale()
+        self._db.commit()
+        # Recency of memory hits is kept on disk across restarts
+        atexit.register(self.flush)
+
+    def _invalidate_if_stale(self):
+        """Drop every entry if the prompt or model changed since they were stored."""
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+        if row is None or row[0] != self.fingerprint:
+            if row is not None:
+                print("Interpretation prompt or model changed, clearing cache")
+                self.stats["invalidations"] += 1
+            self._db.execute("DELETE FROM plans")
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('fingerprint', ?)",
+                (self.fingerprint,)
+            )
+
+    def get(self, command):
+        """
+        Look up the cached action plan for a command.
+
+        Returns:
+            list: The cached actions, or None on a miss
+        """
+        key = normalize_command(command)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                actions, created = entry
+                if now - created <= self.ttl:
+                    self._memory.move_to_end(key)
+                    # Written to disk before the next eviction, so hot entries are not evicted first
+                    self._touched[key] = now
+                    self.stats["hits"] += 1
+                    self.stats["memory_hits"] += 1
+                    return actions
+                del self._memory[key]
+
+            row = self._db.execute(
+                "SELECT actions, created FROM plans WHERE command = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+
+            actions, created = json.loads(row[0]), row[1]
+            if now - created > self.ttl:
+                self._db.execute("DELETE FROM plans WHERE command = ?", (key,))
+                self._db.commit()
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+
+            self._db.execute("UPDATE plans SET last_used = ? WHERE command = ?", (now, key))
+            self._db.commit()
+            self._remember(key, actions, created)
+            self.stats["hits"] += 1
+            self.stats["disk_hits"] += 1
+            return actions
+
+    def put(self, command, actions):
+        """Store the action plan for a command, evicting old entries if needed."""
+        key = normalize_command(command)
+        now = time.time()
+        with self._lock:
+            self._remember(key, actions, now)
+            self._write_touched()
+            self._db.execute(
+                "INSERT OR REPLACE INTO plans (command, actions, created, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(actions), now, now)
+            )
+            count = self._db.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+            if count > self.max_entries:
+                excess = count - self.max_entries
+                self._db.execute(
+                    "DELETE FROM plans WHERE command IN "
+                    "(SELECT command FROM plans ORDER BY last_used ASC LIMIT ?)",
+                    (excess,)
+                )
+                self.stats["evictions"] += excess
+            self._db.commit()
+
+    def _write_touched(self):
+        if self._touched:
+            self._db.executemany("UPDATE plans SET last_used = ? WHERE command = ?",
+                                 [(used, key) for key, used in self._touched.items()])
+            self._touched.clear()
+
+    def flush(self):
+        """Write the recency of memory hits to disk."""
+        with self._lock:
+            if self._touched:
+                self._write_touched()
+                self._db.commit()
+
+    def _remember(self, key, actions, created):
+        self._memory[key] = (actions, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        """Remove every cached entry."""
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            self._db.execute("DELETE FROM plans")
+            self._db.commit()
+
+    def get_stats(self):
+        """Return hit/miss counters along with the current cache sizes."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_entries"] = self._db.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+_interpretation_cache = None
+_cache_lock = threading.Lock()
+
+def get_interpretation_cache():
+    """Return the shared interpretation cache, or None if caching is disabled or unavailable."""
+    global _interpretation_cache
+    if not INTERPRETER_CONFIG.get("cache_enabled", True):
+        return None
+    with _cache_lock:
+        if _interpretation_cache is None:
+            try:
+                _interpretation_cache = InterpretationCache()
+            except (OSError, sqlite3.Error) as e:
+                print(f"Interpretation cache unavailable: {str(e)}")
+                INTERPRETER_CONFIG["cache_enabled"] = False
+                return None
+        return _interpretation_cache
+
+def get_cache_stats():
+    """Return the interpretation cache counters, or an empty dict if caching is disabled."""
+    cache = get_interpretation_cache()
+    return cache.get_stats() if cache else {}
+
+def generated_file_key(content_type, topic, template, model=AI_MODEL):
+    """Identify the generated content for a topic under a given prompt template and model."""
+    data = f"{model}\n{content_type}\n{template}\n{normalize_command(topic)}".encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+class GeneratedFileCache:
+    def __init__(self, directory=None, max_bytes=None):
+        """
+        Initialize the cache and open its index.
+
+        Args:
+            directory (str, optional): Where content and the index are stored,
+                defaults to generated/ in the user's cache dir
+            max_bytes (int, optional): Total size of stored content before the
+                least recently used entries are evicted
+        """
+        self.directory = directory or os.path.join(get_cache_dir(), "generated")
+        os.makedirs(self.directory, exist_ok=True)
+        if max_bytes is None:
+            max_bytes = FILE_CACHE_CONFIG.get("max_bytes", 50 * 1024 * 1024)
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0,
+                      "regenerations": 0, "bytes_served": 0}
+
+        self._db = sqlite3.connect(os.path.join(self.directory, "index.sqlite3"),
+                                   check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "key TEXT PRIMARY KEY, digest TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def _blob_path(self, digest):
+        return os.path.join(self.directory, digest)
+
+    def get(self, key):
+        """
+        Look up generated content.
+
+        Args:
+            key (str): Key from generated_file_key()
+
+        Returns:
+            str: The stored content, or None on a miss
+        """
+        with self._lock:
+            row = self._db.execute("SELECT digest FROM files WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                try:
+                    with open(self._blob_path(row[0]), encoding='utf-8') as f:
+                        content = f.read()
+                except OSError:
+                    # Content removed behind our back, forget the entry
+                    self._db.execute("DELETE FROM files WHERE key = ?", (key,))
+                    self._db.commit()
+                    content = None
+                if content is not None:
+                    self._db.execute("UPDATE files SET last_used = ? WHERE key = ?", (time.time(), key))
+                    self._db.commit()
+                    self.stats["hits"] += 1
+                    self.stats["bytes_served"] += len(content)
+                    return content
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key, content):
+        """Store generated content, evicting least recently used entries if over the size limit."""
+        data = content.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        now = time.time()
+        with self._lock:
+            path = self._blob_path(digest)
+            if not os.path.exists(path):
+                # Write under a temporary name so readers never see a partial file
+                temp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(temp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+            old = self._db.execute("SELECT digest FROM files WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO files (key, digest, size, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, digest, len(data), now, now)
+            )
+            if old is not None and old[0] != digest:
+                self._remove_unreferenced(old[0])
+            self.stats["stores"] += 1
+            self._evict()
+            self._db.commit()
+
+    def _stored_bytes(self):
+        # Entries with identical content share one file
+        row = self._db.execute(
+            "SELECT SUM(size) FROM (SELECT DISTINCT digest, size FROM files)"
+        ).fetchone()
+        return row[0] or 0
+
+    def _evict(self):
+        while self._stored_bytes() > self.max_bytes:
+            row = self._db.execute(
+                "SELECT key, digest FROM files ORDER BY last_used ASC LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            self._db.execute("DELETE FROM files WHERE key = ?", (row[0],))
+            self._remove_unreferenced(row[1])
+            self.stats["evictions"] += 1
+
+    def _remove_unreferenced(self, digest):
+        if self._db.execute("SELECT 1 FROM files WHERE digest = ?", (digest,)).fetchone() is None:
+            try:
+                os.remove(self._blob_path(digest))
+            except OSError:
+                pass
+
+    def record_regeneration(self):
+        """Count a lookup skipped because regeneration was forced."""
+        with self._lock:
+            self.stats["regenerations"] += 1
+
+    def clear(self):
+        """Remove every stored file."""
+        with self._lock:
+            digests = [row[0] for row in self._db.execute("SELECT DISTINCT digest FROM files")]
+            self._db.execute("DELETE FROM files")
+            self._db.commit()
+            for digest in digests:
+                try:
+                    os.remove(self._blob_path(digest))
+                except OSError:
+                    pass
+
+    def get_stats(self):
+        """Return hit/miss counters along with the current number of entries and stored bytes."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = self._db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            stats["stored_bytes"] = self._stored_bytes()
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+_file_cache = None
+
+def get_file_cache():
+    """Return the shared generated file cache, or None if it is disabled or unavailable."""
+    global _file_cache
+    if not FILE_CACHE_CONFIG.get("enabled", True):
+        return None
+    with _cache_lock:
+        if _file_cache is None:
+            try:
+                _file_cache = GeneratedFileCache()
+            except (OSError, sqlite3.Error) as e:
+                print(f"Generated file cache unavailable: {str(e)}")
+                FILE_CACHE_CONFIG["enabled"] = False
+                return None
+        return _file_cache
+
+def get_file_cache_stats():
+    """Return the generated file cache counters, or an empty dict if it is disabled."""
+    cache = get_file_cache()
+    return cache.get_stats() if cache else {}
@@ -0,0 +1,86 @@
+"""
+Shared Gemini client management for CommandCompanion
+
+Owns the GenerativeModel objects used by the interpreter and the file
+creator so they are built once and reuse the same underlying connection,
+and warms that connection in the background at startup.
+"""
+
+import threading
+import time
+import google.generativeai as genai
+from config.settings import AI_MODEL
+
+_models = {}
+_models_lock = threading.Lock()
+_warm_thread = None
+_model_factory = None
+
+def get_model(model_name=AI_MODEL):
+    """
+    Return the shared GenerativeModel for the given model name.
+
+    Args:
+        model_name (str): Name of the Gemini model
+
+    Returns:
+        genai.GenerativeModel: A model object reused across calls
+    """
+    model = _models.get(model_name)
+    if model is None:
+        with _models_lock:
+            model = _models.get(model_name)
+            if model is None:
+                model = (_model_factory or genai.GenerativeModel)(model_name)
+                _models[model_name] = model
+    return model
+
+def set_model_factory(factory):
+    """
+    Replace how models are created, e.g. with a local stand-in for benchmarks.
+
+    Args:
+        factory (callable): Called with a model name, returns an object with the
+            GenerativeModel interface; None restores genai.GenerativeModel
+    """
+    global _model_factory
+    with _models_lock:
+        _model_factory = factory
+        _models.clear()
+
+def _warm_up(model_name):
+    """Open the connection to the API with a cheap request."""
+    start = time.perf_counter()
+    try:
+        get_model(model_name).count_tokens("ping")
+        print(f"Gemini connection warmed up in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        print(f"Gemini warm-up failed: {str(e)}")
+
+def warm_up(model_name=AI_MODEL):
+    """
+    Warm up the Gemini connection on a background thread.
+
+    Returns:
+        threading.Thread: The warm-up thread
+    """
+    global _warm_thread
+    if _warm_thread is None or not _warm_thread.is_alive():
+        _warm_thread = threading.Thread(target=_warm_up, args=(model_name,), daemon=True)
+        _warm_thread.start()
+    return _warm_thread
+
+def configure(api_key, warm=True):
+    """
+    Configure the Gemini API and optionally start warming the connection.
+
+    Args:
+        api_key (str): The Gemini API key
+        warm (bool): Whether to warm up the connection in the background
+    """
+    genai.configure(api_key=api_key)
+    with _models_lock:
+        # Models hold a reference to the client created for the previous configuration
+        _models.clear()
+    if warm and api_key:
+        warm_up()
@@ -2,21 +2,31 @@
 Action execution handling for CommandCompanion
 """
 
-from actions.app_launcher import open_app
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config.settings import EXECUTOR_CONFIG
+from actions.app_launcher import open_app, wait_until_ready
 from actions.system_tasks import system_task
 from actions.file_creator import create_file
+from utils.tracing import span, bind
 
-def execute_action(action_data, context=None):
+def execute_action(action_data, context=None, wait_for=None):
     """
     Execute a single action based on the interpreted data.
     
     Args:
         action_data (dict): Action data to execute
         context (dict, optional): Context for tracking state between actions
+        wait_for (function, optional): Called by create_file before the file
+            is placed and opened, once content generation is under way
         
     Returns:
         str: Status message about the operation
     """
+    with span("execute_action", action=action_data.get('action')):
+        return _execute_action(action_data, context, wait_for)
+
+def _execute_action(action_data, context, wait_for):
     if context is None:
         context = {}
     
@@ -42,7 +52,8 @@ def execute_action(action_data, context=None):
         if content_type and topic:
             # Reuse VSCode window if it was previously opened
             reuse_vscode = context.get('vscode_opened', False)
-            return create_file(content_type, topic, reuse_vscode=reuse_vscode)
+            return create_file(content_type, topic, reuse_vscode=reuse_vscode, wait_for=wait_for,
+                               regenerate=action_data.get('regenerate') is True)
         return "Missing type or topic parameter"
         
     elif action == 'quit':
@@ -55,4 +66,136 @@ def execute_action(action_data, context=None):
     elif action == 'error':
         return f"Error: {action_data.get('message', 'Unknown error')}"
         
-    return f"Unknown action: {action}"
\ No newline at end of file
+    return f"Unknown action: {action}"
+
+def _is_vscode_launch(action_data):
+    return action_data.get('action') == 'open_app' and str(action_data.get('app', '')).lower() == 'vscode'
+
+class _DependencyTracker:
+    """Work out, one step at a time, which earlier step each step waits for."""
+
+    def __init__(self):
+        self.last_vscode = None
+
+    def add(self, index, action_data):
+        dependency = None
+        if _is_vscode_launch(action_data) or action_data.get('action') == 'create_file':
+            dependency = self.last_vscode
+        if _is_vscode_launch(action_data):
+            self.last_vscode = index
+        return dependency
+
+def plan_dependencies(actions):
+    """
+    Work out which earlier step each step of a plan has to wait for.
+
+    Steps are independent except that a VSCode launch waits for the previous
+    VSCode launch (so it can reuse the window) and create_file waits for the
+    most recent VSCode launch to report ready before placing and opening
+    its file.
+    Content generation itself never waits.
+
+    Args:
+        actions (list): Action dicts in the order they were interpreted
+
+    Returns:
+        list: For each step, the index of the step it depends on or None
+    """
+    tracker = _DependencyTracker()
+    return [tracker.add(i, action_data) for i, action_data in enumerate(actions)]
+
+def execute_plan(actions, context=None, cancel_event=None, on_progress=None):
+    """
+    Execute a list of actions, running independent steps concurrently.
+
+    actions may also be an iterator that produces actions while they are
+    being generated; each step is scheduled as soon as it arrives.
+    Dependencies only ever point at earlier steps, so they are known by then.
+
+    Args:
+        actions (iterable): Action dicts to execute
+        context (dict, optional): Context for tracking state between actions
+        cancel_event (threading.Event, optional): Set to skip steps that have not started
+        on_progress (function, optional): Called as on_progress(index, action_data, status)
+            when a step finishes
+
+    Returns:
+        list: Status messages in the same order as the actions
+    """
+    if context is None:
+        context = {}
+    if cancel_event is None:
+        cancel_event = threading.Event()
+
+    received = []
+    dependencies = []
+    done = []
+    statuses = []
+    step_contexts = []
+    tracker = _DependencyTracker()
+    # Reuse decisions are made as steps arrive so they do not depend on timing
+    vscode_opened = context.get('vscode_opened', False)
+
+    def wait_for_launch(index):
+        dependency = dependencies[index]
+        if dependency is None:
+            return
+        while not done[dependency].wait(0.1):
+            if cancel_event.is_set():
+                return
+        # open_app reports every successful launch as "Opened ..."; an editor
+        # that failed to launch will never become ready
+        launched = (statuses[dependency] or "").startswith("Opened")
+        if received[index].get('action') == 'create_file' and launched:
+            # Wait for the editor to be usable; this overlaps with content generation
+            wait_until_ready(received[dependency]['app'], cancel_event=cancel_event)
+
+    def run_step(index):
+        action_data = received[index]
+        try:
+            if cancel_event.is_set():
+                statuses[index] = "Cancelled"
+            elif action_data.get('action') == 'create_file':
+                statuses[index] = execute_action(action_data, step_contexts[index],
+                                                 wait_for=lambda: wait_for_launch(index))
+            else:
+                wait_for_launch(index)
+                statuses[index] = "Cancelled" if cancel_event.is_set() else \
+                    execute_action(action_data, step_contexts[index])
+        except Exception as e:
+            print(f"Error executing {action_data}: {str(e)}")
+            statuses[index] = f"Error: {str(e)}"
+        finally:
+            done[index].set()
+        if on_progress:
+            on_progress(index, action_data, statuses[index])
+
+    def schedule(action_data):
+        nonlocal vscode_opened
+        index = len(received)
+        received.append(action_data)
+        dependencies.append(tracker.add(index, action_data))
+        done.append(threading.Event())
+        statuses.append(None)
+        step_contexts.append(dict(context, vscode_opened=vscode_opened))
+        if _is_vscode_launch(action_data):
+            vscode_opened = True
+        return index
+
+    if isinstance(actions, list) and len(actions) == 1:
+        run_step(schedule(actions[0]))
+    elif actions:
+        workers = EXECUTOR_CONFIG.get("max_parallel_actions", 4)
+        # Steps are submitted in order and only wait on earlier steps, so a
+        # waiting step never blocks the step it depends on from starting
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Steps run on pool threads but belong to the caller's trace
+            traced_step = bind(run_step)
+            for action_data in actions:
+                if cancel_event.is_set():
+                    break
+                pool.submit(traced_step, schedule(action_data))
+
+    if vscode_opened:
+        context['vscode_opened'] = True
+    return statuses
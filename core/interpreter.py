@@ -1,17 +1,128 @@
 import json
-import google.generativeai as genai
-from config.settings import AI_MODEL, COMMAND_INTERPRETATION_PROMPT
+import time
+from contextlib import ExitStack
+from config.settings import (AI_MODEL, COMMAND_INTERPRETATION_PROMPT, STRUCTURED_INTERPRETATION_PROMPT,
+                             INTERPRETER_CONFIG)
+from core.cache import get_interpretation_cache
+from core.clients import get_model
+from core.local_parser import parse_command
+from core.schema import response_schema, validate_action, validate_actions
+from core.action_stream import ActionStreamParser
 from utils.helpers import extract_json
+from utils.tracing import span
 
-def interpret_command(prompt):
+def interpret_command(prompt, return_source=False, cache=True):
+    """
+    Interpret the user's command, locally if possible and otherwise using Gemini.
+
+    Args:
+        prompt (str): The user's command
+        return_source (bool): Also return which path served the command
+        cache (bool): Store Gemini's interpretation in the interpretation
+            cache; speculative callers store it with cache_interpretation()
+            once the command is actually submitted
+
+    Returns:
+        list: The interpreted actions, or a tuple of (actions, source) where
+        source is 'local', 'cache' or 'gemini' when return_source is True
+    """
+    with span("interpret_command") as s:
+        actions, source = _interpret(prompt, cache)
+        s.set(source=source)
+    return (actions, source) if return_source else actions
+
+def interpret_command_stream(prompt, return_source=False):
+    """
+    Interpret the user's command, yielding Gemini's actions as they are generated.
+
+    Local and cached interpretations are returned as lists. Commands that
+    need Gemini are streamed, and each action is yielded as soon as its JSON
+    object is complete, so the first steps can run while the rest is still
+    being generated.
+
+    Args:
+        prompt (str): The user's command
+        return_source (bool): Also return which path served the command
+
+    Returns:
+        iterable: The interpreted actions, or a tuple of (actions, source)
+        when return_source is True
+    """
+    if not INTERPRETER_CONFIG.get("stream_actions", True):
+        return interpret_command(prompt, return_source)
+    with ExitStack() as scope:
+        s = scope.enter_context(span("interpret_command", stream=True))
+        actions, source = _interpret_offline(prompt)
+        if actions is None:
+            # The span is handed to the stream so it covers the whole interpretation
+            actions, source = _exhaust_within(scope.pop_all(), _stream_with_gemini(prompt)), "gemini"
+        s.set(source=source)
+    return (actions, source) if return_source else actions
+
+def _exhaust_within(scope, actions):
+    """Yield the streamed actions, closing scope (and the spans it holds) once they run out."""
+    with scope:
+        yield from actions
+
+def _interpret_offline(prompt):
+    """Return (actions, source) from the local parser or the cache, or (None, None)."""
+    actions = None
+    if INTERPRETER_CONFIG.get("local_fast_path", True):
+        actions = parse_command(prompt)
+
+    if actions is not None:
+        print(f"Resolved locally: {json.dumps(actions)}")
+        return actions, "local"
+
+    cache = get_interpretation_cache()
+    actions = cache.get(prompt) if cache else None
+    if actions is not None:
+        print(f"Resolved from cache: {json.dumps(actions)}")
+        return actions, "cache"
+    return None, None
+
+def cache_interpretation(prompt, actions):
+    """Store a successful interpretation of a command in the interpretation cache."""
+    cache = get_interpretation_cache()
+    # A one-off misparse ("unknown") would otherwise stick until the entry expires
+    if cache and actions and all(isinstance(a, dict) and a.get('action') not in ('error', 'unknown')
+                                 for a in actions):
+        cache.put(prompt, actions)
+
+def _interpret(prompt, cache=True):
+    """Return (actions, source) from the first path that can serve the command."""
+    actions, source = _interpret_offline(prompt)
+    if actions is None:
+        source = "gemini"
+        actions = _interpret_with_gemini(prompt)
+        if cache:
+            cache_interpretation(prompt, actions)
+    return actions, source
+
+def _usage(response):
+    """Return (prompt tokens, output tokens) from a response, or (None, None)."""
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is None:
+        return None, None
+    return getattr(usage, 'prompt_token_count', None), getattr(usage, 'candidates_token_count', None)
+
+def _interpret_with_gemini(prompt):
     """Interpret the user's command using Gemini."""
+    if INTERPRETER_CONFIG.get("structured_output", True):
+        return _interpret_structured(prompt)
     try:
-        model = genai.GenerativeModel(AI_MODEL)
+        model = get_model(AI_MODEL)
         print(f"Sending prompt to Gemini: '{prompt}'")
-        response = model.generate_content(COMMAND_INTERPRETATION_PROMPT.format(prompt=prompt))
-        response_text = response.text.strip()
+        with span("gemini", model=AI_MODEL, structured=False) as s:
+            start = time.perf_counter()
+            response = model.generate_content(COMMAND_INTERPRETATION_PROMPT.format(prompt=prompt))
+            response_text = response.text.strip()
+            prompt_tokens, output_tokens = _usage(response)
+            s.set(prompt_tokens=prompt_tokens, output_tokens=output_tokens)
         print(f"Raw Gemini response: {response_text}")
-        
+        print(f"Gemini took {time.perf_counter() - start:.2f}s "
+              f"({prompt_tokens} prompt tokens, {output_tokens} output tokens)")
+
         data = extract_json(response_text)
         if data:
             # Successfully parsed the response
@@ -25,4 +136,100 @@ def interpret_command(prompt):
             return [{"action": "error", "message": "Invalid response from Gemini"}]
     except Exception as e:
         print(f"Error interpreting command: {str(e)}")
-        return [{"action": "error", "message": str(e)}]
\ No newline at end of file
+        return [{"action": "error", "message": str(e)}]
+
+def _interpret_structured(prompt):
+    """
+    Interpret the command with schema-constrained JSON output.
+
+    The response is plain JSON matching core.schema, so it is parsed
+    directly and validated instead of being scraped out of free text.
+    """
+    try:
+        model = get_model(AI_MODEL)
+        print(f"Sending prompt to Gemini (structured): '{prompt}'")
+        with span("gemini", model=AI_MODEL, structured=True) as s:
+            start = time.perf_counter()
+            response = model.generate_content(
+                STRUCTURED_INTERPRETATION_PROMPT.format(prompt=prompt),
+                generation_config={
+                    "response_mime_type": "application/json",
+                    "response_schema": response_schema()
+                }
+            )
+            response_text = response.text
+            prompt_tokens, output_tokens = _usage(response)
+            s.set(prompt_tokens=prompt_tokens, output_tokens=output_tokens)
+        print(f"Gemini took {time.perf_counter() - start:.2f}s "
+              f"({prompt_tokens} prompt tokens, {output_tokens} output tokens): {response_text}")
+
+        with span("validate_actions"):
+            actions = validate_actions(json.loads(response_text))
+        return actions
+    except ValueError as e:
+        # Covers both json.JSONDecodeError and SchemaError
+        print(f"Invalid structured response from Gemini: {str(e)}")
+        return [{"action": "error", "message": f"Invalid response from Gemini: {str(e)}"}]
+    except Exception as e:
+        print(f"Error interpreting command: {str(e)}")
+        return [{"action": "error", "message": str(e)}]
+
+def _stream_with_gemini(prompt):
+    """
+    Stream the interpretation from Gemini and yield each action once it is complete.
+
+    In structured mode every action is validated against core.schema before
+    it is yielded. An error action is yielded if the stream fails or
+    contains no actions; actions already yielded stand.
+    """
+    structured = INTERPRETER_CONFIG.get("structured_output", True)
+    actions = []
+    with span("gemini", model=AI_MODEL, structured=structured, stream=True) as s:
+        start = time.perf_counter()
+        try:
+            model = get_model(AI_MODEL)
+            print(f"Streaming prompt to Gemini: '{prompt}'")
+            if structured:
+                response = model.generate_content(
+                    STRUCTURED_INTERPRETATION_PROMPT.format(prompt=prompt),
+                    generation_config={
+                        "response_mime_type": "application/json",
+                        "response_schema": response_schema()
+                    },
+                    stream=True
+                )
+            else:
+                response = model.generate_content(COMMAND_INTERPRETATION_PROMPT.format(prompt=prompt),
+                                                  stream=True)
+            parser = ActionStreamParser()
+            for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunks that only carry the finish reason have no text
+                    continue
+                for data in parser.feed(text):
+                    action = validate_action(data) if structured else data
+                    if not actions:
+                        first_action = time.perf_counter() - start
+                        s.set(first_action=round(first_action, 6))
+                        print(f"First action after {first_action:.2f}s: {json.dumps(action)}")
+                    actions.append(action)
+                    yield action
+            s.set(actions=len(actions))
+        except ValueError as e:
+            # Covers SchemaError from validate_action
+            print(f"Invalid streamed response from Gemini: {str(e)}")
+            yield {"action": "error", "message": f"Invalid response from Gemini: {str(e)}"}
+            return
+        except Exception as e:
+            print(f"Error interpreting command: {str(e)}")
+            yield {"action": "error", "message": str(e)}
+            return
+
+    if not actions:
+        print("Failed to parse any action from the streamed response")
+        yield {"action": "error", "message": "Invalid response from Gemini"}
+        return
+    print(f"Streamed {len(actions)} action(s) in {time.perf_counter() - start:.2f}s")
+    cache_interpretation(prompt, actions)
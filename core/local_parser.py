@@ -0,0 +1,231 @@
+"""
+Local command parser for CommandCompanion
+
+Resolves simple commands ("open firefox", "empty the trash",
+"open vscode and create a python file for a CNN model") without a
+Gemini round trip. The grammar is built from the aliases, tasks and
+content types in config/settings.py.
+"""
+
+import re
+from config.settings import (
+    app_aliases, app_synonyms, allowed_tasks, file_type_keywords, COMMAND_VERBS,
+    REGENERATE_WORDS, DESKTOP_INDEX_CONFIG
+)
+from actions.desktop_index import get_desktop_index
+
+# Words that carry no meaning for intent matching
+FILLER_WORDS = {'the', 'a', 'an', 'my', 'please', 'new', 'up'}
+
+# Words that introduce the topic of a file to create
+TOPIC_MARKERS = {'for', 'about', 'with', 'that', 'to', 'of', 'on', 'called', 'named'}
+
+# Words that may follow a content type keyword ("python file", "html page")
+FILE_NOUNS = {'file', 'script', 'program', 'code', 'page', 'document'}
+
+# Words that join the steps of a multi-step command
+CONJUNCTIONS = {'and', 'then', ','}
+
+_TOKEN_RE = re.compile(r"[\w+#.'-]+|,")
+
+
+def _phrases(words):
+    """Split multi-word phrases into token tuples, longest first."""
+    return sorted((tuple(w.split()) for w in words), key=len, reverse=True)
+
+
+_VERBS = {action: _phrases(verbs) for action, verbs in COMMAND_VERBS.items()}
+_ALL_VERBS = {verb[0] for verbs in _VERBS.values() for verb in verbs}
+_APP_NAMES = {tuple(name.split()): name for name in app_aliases}
+_APP_NAMES.update({tuple(name.split()): target for name, target in app_synonyms.items()})
+_TYPE_KEYWORDS = [
+    (phrase, content_type)
+    for content_type, words in file_type_keywords.items()
+    for phrase in _phrases(words)
+]
+_TYPE_KEYWORDS.sort(key=lambda item: len(item[0]), reverse=True)
+
+
+def _tokenize(text):
+    """Return a list of (original, lowercase) token pairs."""
+    tokens = []
+    for match in _TOKEN_RE.finditer(text):
+        word = match.group(0).strip(".'")
+        if word:
+            tokens.append((word, word.lower()))
+    return tokens
+
+
+def _starts_with(words, phrase):
+    return tuple(words[:len(phrase)]) == phrase
+
+
+def _match_verb(words, action):
+    """Return the length of the verb phrase for action at the start of words."""
+    for phrase in _VERBS.get(action, []):
+        if _starts_with(words, phrase):
+            return len(phrase)
+    return 0
+
+
+def _split_steps(tokens):
+    """
+    Split tokens into steps at conjunctions that are followed by a verb.
+
+    Conjunctions inside a topic ("a website for cats and dogs") are kept
+    because the next word is not a command verb.
+    """
+    steps, current = [], []
+    i = 0
+    while i < len(tokens):
+        word = tokens[i][1]
+        if word in CONJUNCTIONS:
+            j = i
+            while j < len(tokens) and tokens[j][1] in CONJUNCTIONS:
+                j += 1
+            if current and j < len(tokens) and tokens[j][1] in _ALL_VERBS:
+                steps.append(current)
+                current = []
+                i = j
+                continue
+        current.append(tokens[i])
+        i += 1
+    if current:
+        steps.append(current)
+    return steps
+
+
+def _parse_quit(words):
+    length = _match_verb(words, 'quit')
+    if not length:
+        return None
+    rest = [w for w in words[length:] if w not in FILLER_WORDS]
+    if rest in ([], ['app'], ['application'], ['commandcompanion'], ['program']):
+        return {'action': 'quit'}
+    return None
+
+
+def _parse_system_task(words):
+    content = [w for w in words if w not in FILLER_WORDS]
+    for task in allowed_tasks:
+        task_words = task.split('_')
+        if content == task_words:
+            return {'action': 'system_task', 'task': task}
+        # Accept verb synonyms such as "clear the trash"
+        if len(content) == len(task_words) and content[1:] == task_words[1:] \
+                and _match_verb(content, 'system_task') == 1:
+            return {'action': 'system_task', 'task': task}
+    return None
+
+
+def _parse_open_app(words):
+    length = _match_verb(words, 'open_app')
+    if not length:
+        return None
+    rest = tuple(w for w in words[length:] if w not in FILLER_WORDS)
+    if rest not in _APP_NAMES and len(rest) > 1 and rest[-1] in ('app', 'application'):
+        rest = rest[:-1]
+    app = _APP_NAMES.get(rest)
+    if app:
+        return {'action': 'open_app', 'app': app}
+    # Installed apps are only accepted on an exact name, keyword or binary match;
+    # anything fuzzier is left to Gemini
+    if rest and DESKTOP_INDEX_CONFIG.get("enabled", True) and \
+            get_desktop_index().lookup_exact(' '.join(rest)):
+        return {'action': 'open_app', 'app': ' '.join(rest)}
+    return None
+
+
+def _match_type(words, start):
+    """Return (content_type, end_index) for a type keyword at words[start]."""
+    for phrase, content_type in _TYPE_KEYWORDS:
+        if _starts_with(words[start:], phrase):
+            end = start + len(phrase)
+            if end < len(words) and words[end] in FILE_NOUNS:
+                end += 1
+            return content_type, end
+    return None, start
+
+
+def _names_app(words):
+    """Check whether words end with "in <app>", which needs Gemini to place."""
+    for i, word in enumerate(words):
+        if word in ('in', 'using', 'inside') and \
+                tuple(w for w in words[i + 1:] if w not in FILLER_WORDS) in _APP_NAMES:
+            return True
+    return False
+
+
+def _create_file_action(content_type, topic, regenerate):
+    action = {'action': 'create_file', 'type': content_type, 'topic': topic}
+    if regenerate:
+        action['regenerate'] = True
+    return action
+
+
+def _parse_create_file(tokens, words):
+    length = _match_verb(words, 'create_file')
+    if not length or _names_app(words):
+        return None
+    # "regenerate the snake game script", "make a fresh python file for ..."
+    regenerate = words[0] in REGENERATE_WORDS
+    i = length
+    while i < len(words) and (words[i] in FILLER_WORDS or words[i] in REGENERATE_WORDS):
+        regenerate = regenerate or words[i] in REGENERATE_WORDS
+        i += 1
+
+    # "create a python file for <topic>"
+    content_type, end = _match_type(words, i)
+    if content_type:
+        if end < len(words) and words[end] in TOPIC_MARKERS:
+            end += 1
+            while end < len(words) and words[end] in FILLER_WORDS:
+                end += 1
+            topic = ' '.join(t[0] for t in tokens[end:])
+            if topic:
+                return _create_file_action(content_type, topic, regenerate)
+        return None
+
+    # "build a portfolio website"
+    for j in range(len(words) - 1, i, -1):
+        content_type, end = _match_type(words, j)
+        if content_type and end == len(words):
+            topic = ' '.join(t[0] for t in tokens[i:j])
+            if topic:
+                return _create_file_action(content_type, topic, regenerate)
+            break
+    return None
+
+
+def _parse_step(tokens):
+    words = [t[1] for t in tokens]
+    return (
+        _parse_quit(words)
+        or _parse_system_task(words)
+        or _parse_open_app(words)
+        or _parse_create_file(tokens, words)
+    )
+
+
+def parse_command(text):
+    """
+    Interpret a command locally without calling Gemini.
+
+    Args:
+        text (str): The user's command
+
+    Returns:
+        list: A list of action dicts, or None if the command could not be
+        resolved confidently and should be sent to Gemini
+    """
+    tokens = _tokenize(text)
+    if not tokens:
+        return None
+
+    actions = []
+    for step in _split_steps(tokens):
+        action = _parse_step(step)
+        if action is None:
+            return None
+        actions.append(action)
+    return actions or None
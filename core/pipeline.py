@@ -0,0 +1,236 @@
+"""
+Background command pipeline for CommandCompanion
+
+Runs interpretation and execution of commands on worker threads so the
+GUI stays responsive. Commands wait in a bounded queue, report progress
+after every step and can be cancelled while in flight.
+"""
+
+import itertools
+import queue
+import threading
+import time
+from config.settings import PIPELINE_CONFIG
+from core.interpreter import interpret_command_stream
+from core.executor import execute_plan
+from utils.tracing import span, start_trace, activate, deactivate
+
+class CommandJob:
+    def __init__(self, job_id, command, listener=None, speculation=None):
+        """
+        A single command submitted to the pipeline.
+
+        Args:
+            job_id (int): Sequential job identifier
+            command (str): The user's command text
+            listener (function, optional): Receives this job's events as
+                listener(event, job, payload), in addition to the pipeline's dispatch
+            speculation (Speculation, optional): Interpretation of the command
+                started while it was being typed, used instead of interpreting
+                it again if it succeeds
+        """
+        self.id = job_id
+        self.command = command
+        self.listener = listener
+        self.speculation = speculation
+        self.cancel_event = threading.Event()
+        self.trace = start_trace(command)
+        self.source = None
+        self.failed = False     # Interpretation or processing failed, as opposed to a step's own result
+        self.submitted = time.perf_counter()
+        self.started = None
+        self.finished = None
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+class CommandPipeline:
+    def __init__(self, dispatch, workers=None, max_queued=None):
+        """
+        Initialize the pipeline and start its worker threads.
+
+        Args:
+            dispatch: Function called as dispatch(event, job, payload) from the
+                worker threads. Events are 'started', 'progress', 'done',
+                'cancelled' and 'quit'. GUI callers must marshal these onto
+                their own thread.
+            workers (int, optional): Number of commands processed concurrently
+            max_queued (int, optional): Commands that may wait in the queue
+        """
+        self.dispatch = dispatch
+        self.workers = workers or PIPELINE_CONFIG.get("workers", 2)
+        self.max_queued = max_queued or PIPELINE_CONFIG.get("max_queued_commands", 8)
+        self._queue = queue.Queue(maxsize=self.max_queued)
+        self._ids = itertools.count(1)
+        self._active = {}
+        self._lock = threading.Lock()
+        self._running = True
+        self.stats = {"submitted": 0, "rejected": 0, "completed": 0, "cancelled": 0,
+                      "total_latency": 0.0, "first_submit": None, "last_finish": None}
+
+        self._threads = []
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"command-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, command, listener=None, speculation=None):
+        """
+        Queue a command for processing.
+
+        Args:
+            command (str): The command text
+            listener (function, optional): Receives the job's events, see CommandJob
+            speculation (Speculation, optional): Precomputed interpretation, see CommandJob
+
+        Returns:
+            CommandJob: The queued job, or None if the queue is full
+        """
+        job = CommandJob(next(self._ids), command, listener, speculation)
+        # Registered before it is queued, so a worker that finishes the job
+        # straight away never races with this insertion
+        with self._lock:
+            self._active[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._active[job.id]
+                self.stats["rejected"] += 1
+            return None
+        with self._lock:
+            self.stats["submitted"] += 1
+            if self.stats["first_submit"] is None:
+                self.stats["first_submit"] = job.submitted
+        return job
+
+    def cancel(self, job_id=None):
+        """
+        Cancel a queued or running command.
+
+        Args:
+            job_id (int, optional): Job to cancel, defaults to every pending job
+
+        Returns:
+            int: Number of jobs that were cancelled
+        """
+        with self._lock:
+            jobs = [self._active[job_id]] if job_id in self._active else (
+                list(self._active.values()) if job_id is None else [])
+        for job in jobs:
+            job.cancel_event.set()
+        return len(jobs)
+
+    def pending(self):
+        """Return the number of queued or running commands."""
+        with self._lock:
+            return len(self._active)
+
+    def get_stats(self):
+        """Return throughput and latency figures for processed commands."""
+        with self._lock:
+            stats = dict(self.stats)
+        finished = stats["completed"] + stats["cancelled"]
+        stats["mean_latency"] = stats["total_latency"] / finished if finished else 0.0
+        elapsed = (stats["last_finish"] or 0) - (stats["first_submit"] or 0)
+        stats["commands_per_second"] = finished / elapsed if elapsed > 0 else 0.0
+        del stats["total_latency"], stats["first_submit"], stats["last_finish"]
+        return stats
+
+    def shutdown(self):
+        """Cancel outstanding work and stop the worker threads."""
+        self._running = False
+        self.cancel()
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+
+    def _emit(self, event, job, payload):
+        self.dispatch(event, job, payload)
+        if job.listener:
+            job.listener(event, job, payload)
+
+    def _worker(self):
+        while self._running:
+            job = self._queue.get()
+            if job is None:
+                break
+            token = activate(job.trace)
+            try:
+                self._run(job)
+            except Exception as e:
+                print(f"Error processing command '{job.command}': {str(e)}")
+                job.failed = True
+                self._emit("done", job, f"Error: {str(e)}")
+            finally:
+                deactivate(token)
+                self._finish(job)
+
+    def _finish(self, job):
+        job.finished = time.perf_counter()
+        with self._lock:
+            self._active.pop(job.id, None)
+            self.stats["cancelled" if job.cancelled else "completed"] += 1
+            self.stats["total_latency"] += job.finished - job.submitted
+            self.stats["last_finish"] = job.finished
+        if job.trace:
+            job.trace.finish(source=job.source, cancelled=job.cancelled)
+
+    def _run(self, job):
+        if job.cancelled:
+            self._emit("cancelled", job, "Cancelled before start")
+            return
+
+        job.started = time.perf_counter()
+        if job.trace:
+            job.trace.add("queued", job.submitted, job.started - job.submitted, {})
+        self._emit("started", job, f"Interpreting '{job.command}'...")
+        actions = None
+        if job.speculation is not None:
+            with span("speculation") as s:
+                actions, source = job.speculation.result()
+                s.set(used=actions is not None)
+            if actions is not None:
+                source = "speculative"
+        if actions is None:
+            actions, source = interpret_command_stream(job.command, return_source=True)
+        job.source = source
+
+        # Steps after a quit action are never run
+        quit_requested = False
+        received = []
+        complete = isinstance(actions, list)
+
+        def until_quit():
+            nonlocal quit_requested, complete
+            for action_data in actions:
+                if action_data.get('action') == 'quit':
+                    quit_requested = True
+                    break
+                if action_data.get('action') == 'error':
+                    job.failed = True
+                received.append(action_data)
+                yield action_data
+            complete = True
+
+        def on_progress(index, action_data, status):
+            # While actions are still streaming in, the total is not known yet
+            total = f"/{len(received)}" if complete else ""
+            self._emit("progress", job, f"Step {index + 1}{total} done: {status}")
+
+        plan = list(until_quit()) if complete else until_quit()
+        status_messages = execute_plan(plan, context={}, cancel_event=job.cancel_event,
+                                       on_progress=on_progress)
+
+        # Special handling for quit action
+        if quit_requested and not job.cancelled:
+            self._emit("quit", job, None)
+            return
+        if job.cancelled:
+            self._emit("cancelled", job, "; ".join(status_messages))
+            return
+
+        self._emit("done", job, "; ".join(status_messages) + f" [{source}]")
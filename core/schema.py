@@ -0,0 +1,104 @@
+"""
+Action schema for CommandCompanion
+
+Describes the actions the executor understands, both as the response
+schema passed to Gemini's structured JSON output and as a validator for
+the action lists that come back (from Gemini, the cache or elsewhere).
+"""
+
+from config.settings import allowed_tasks
+
+# Required fields and their types for each action
+ACTION_FIELDS = {
+    'open_app': {'app': str},
+    'system_task': {'task': str},
+    'create_file': {'type': str, 'topic': str},
+    'quit': {},
+    'unknown': {}
+}
+
+# Fields an action may carry in addition to the required ones
+OPTIONAL_FIELDS = {
+    'create_file': {'regenerate': bool}
+}
+
+# Values accepted for fields with a fixed set of choices
+FIELD_CHOICES = {
+    'type': ['python', 'website'],
+    'task': sorted(allowed_tasks)
+}
+
+def response_schema():
+    """
+    Return the JSON schema Gemini's output is constrained to.
+
+    Fields of all actions are listed on one object type and are optional,
+    since the schema format has no per-action variants; validate_actions()
+    enforces which fields each action needs.
+    """
+    properties = {'action': {'type': 'STRING', 'enum': sorted(ACTION_FIELDS)}}
+    for fields in ACTION_FIELDS.values():
+        for field in fields:
+            properties[field] = {'type': 'STRING'}
+            if field in FIELD_CHOICES:
+                properties[field]['enum'] = FIELD_CHOICES[field]
+    for fields in OPTIONAL_FIELDS.values():
+        for field in fields:
+            properties[field] = {'type': 'BOOLEAN'}
+    return {
+        'type': 'ARRAY',
+        'items': {'type': 'OBJECT', 'properties': properties, 'required': ['action']}
+    }
+
+class SchemaError(ValueError):
+    """Raised when an action list does not match the schema."""
+
+def validate_action(data):
+    """
+    Check a single action and return it with only the fields it uses.
+
+    Raises:
+        SchemaError: If the action is unknown or a required field is missing,
+            empty or of the wrong type
+    """
+    if not isinstance(data, dict):
+        raise SchemaError(f"Action must be an object, got {type(data).__name__}")
+    action = data.get('action')
+    if action not in ACTION_FIELDS:
+        raise SchemaError(f"Unknown action: {action!r}")
+
+    validated = {'action': action}
+    for field, field_type in ACTION_FIELDS[action].items():
+        value = data.get(field)
+        if not isinstance(value, field_type) or (isinstance(value, str) and not value.strip()):
+            raise SchemaError(f"{action} needs a {field_type.__name__} '{field}'")
+        if field in FIELD_CHOICES and value not in FIELD_CHOICES[field]:
+            raise SchemaError(f"Invalid {field} for {action}: {value!r}")
+        validated[field] = value.strip() if isinstance(value, str) else value
+    for field, field_type in OPTIONAL_FIELDS.get(action, {}).items():
+        value = data.get(field)
+        if value is None:
+            continue
+        if not isinstance(value, field_type):
+            raise SchemaError(f"{action} needs a {field_type.__name__} '{field}' if it is given")
+        validated[field] = value
+    return validated
+
+def validate_actions(data):
+    """
+    Validate a parsed response and return it as a list of actions.
+
+    Args:
+        data: A single action object or a list of them
+
+    Returns:
+        list: Validated action dicts
+
+    Raises:
+        SchemaError: If any action is invalid or the list is empty
+    """
+    if isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list) or not data:
+        raise SchemaError("Expected a non-empty list of actions")
+    return [validate_action(item) for item in data]
@@ -0,0 +1,200 @@
+"""
+Speculative interpretation for CommandCompanion
+
+While the user is typing, the GUI hands the current text to
+SpeculativeInterpreter once they pause. It is interpreted on a background
+thread, one command at a time, always for the most recent text. When the
+command is submitted, claim() returns the speculation if it was made for
+the same (normalized) text, so the pipeline can use its plan instead of
+waiting for a fresh round trip. Results for text the user has since
+changed are never used, and only claimed interpretations are written to
+the interpretation cache, so half-typed commands never reach it. The write
+happens on the background thread, never on the caller's (the Tk thread).
+"""
+
+import threading
+from config.settings import SPECULATION_CONFIG
+from core.cache import normalize_command
+from core.interpreter import interpret_command, cache_interpretation
+
+class Speculation:
+    def __init__(self, text):
+        """
+        An interpretation started before the command was submitted.
+
+        Args:
+            text (str): The text being interpreted
+        """
+        self.text = text
+        self.key = normalize_command(text)
+        self.actions = None
+        self.source = None
+        self.claimed = False
+        self.cached = False
+        self.done = threading.Event()
+
+    def result(self, timeout=None):
+        """
+        Wait for the interpretation to finish.
+
+        Args:
+            timeout (float, optional): Seconds to wait, defaults to no limit
+
+        Returns:
+            tuple: (actions, source), or (None, None) if it failed or is not finished
+        """
+        if not self.done.wait(timeout):
+            return None, None
+        return self.actions, self.source
+
+class SpeculativeInterpreter:
+    def __init__(self, min_chars=None):
+        """
+        Initialize the interpreter and start its background thread.
+
+        Args:
+            min_chars (int, optional): Shortest text worth interpreting
+        """
+        if min_chars is None:
+            min_chars = SPECULATION_CONFIG.get("min_chars", 10)
+        self.min_chars = min_chars
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._pending = None    # Text waiting for the background thread
+        self._latest = None     # Most recent speculation, running or finished
+        self._to_cache = []     # Claimed speculations waiting to be written to the cache
+        self._running = True
+        self.stats = {"started": 0, "gemini_calls": 0, "hits": 0, "misses": 0,
+                      "stale": 0, "wasted_calls": 0, "failed": 0}
+
+        self._thread = threading.Thread(target=self._worker, name="speculation", daemon=True)
+        self._thread.start()
+
+    def update(self, text):
+        """
+        Interpret the text the user has typed so far.
+
+        Replaces any text still waiting to be interpreted; a speculation that
+        is already running finishes, but is only used if the text comes back
+        to what it was made for.
+
+        Args:
+            text (str): Current contents of the command entry
+        """
+        key = normalize_command(text)
+        with self._wake:
+            if len(key) < self.min_chars:
+                self._pending = None
+                return
+            if self._latest is not None and self._latest.key == key:
+                self._pending = None
+                return
+            self._pending = text
+            self._wake.notify()
+
+    def claim(self, text):
+        """
+        Take the speculation made for a submitted command.
+
+        Args:
+            text (str): The submitted command
+
+        Returns:
+            Speculation: The running or finished speculation for this text,
+            or None if there is none
+        """
+        key = normalize_command(text)
+        with self._lock:
+            self._pending = None
+            speculation = self._latest
+            if speculation is None or speculation.key != key:
+                self.stats["misses"] += 1
+                return None
+            speculation.claimed = True
+            self.stats["hits"] += 1
+            if self._take_for_cache(speculation):
+                self._to_cache.append(speculation)
+                self._wake.notify()
+            return speculation
+
+    def get_stats(self):
+        """Return the speculation counters with the hit rate and share of wasted Gemini calls."""
+        with self._lock:
+            stats = dict(self.stats)
+        submitted = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / submitted if submitted else 0.0
+        calls = stats["gemini_calls"]
+        stats["wasted_rate"] = stats["wasted_calls"] / calls if calls else 0.0
+        return stats
+
+    def shutdown(self):
+        """Stop the background thread once the current speculation, if any, is done."""
+        with self._wake:
+            self._running = False
+            self._pending = None
+            self._retire(self._latest)
+            self._latest = None
+            self._wake.notify()
+
+    def _take_for_cache(self, speculation):
+        # Called with the lock held, once the speculation is claimed and again once it is done;
+        # True only the first time it is both, and the caller writes it outside the lock
+        if speculation.claimed and speculation.done.is_set() and not speculation.cached \
+                and speculation.source == "gemini" and speculation.actions:
+            speculation.cached = True
+            return True
+        return False
+
+    def _write_cache(self, speculations):
+        for speculation in speculations:
+            cache_interpretation(speculation.text, speculation.actions)
+
+    def _retire(self, speculation):
+        # A Gemini call whose plan was never claimed was spent for nothing
+        if speculation is not None and not speculation.claimed and speculation.source == "gemini":
+            self.stats["wasted_calls"] += 1
+
+    def _worker(self):
+        while True:
+            with self._wake:
+                while self._running and self._pending is None and not self._to_cache:
+                    self._wake.wait()
+                to_cache, self._to_cache = self._to_cache, []
+                if not to_cache:
+                    if not self._running:
+                        return
+                    speculation = Speculation(self._pending)
+                    self._pending = None
+                    self._retire(self._latest)
+                    self._latest = speculation
+                    self.stats["started"] += 1
+            if to_cache:
+                self._write_cache(to_cache)
+                continue
+
+            print(f"Speculatively interpreting '{speculation.text}'")
+            try:
+                actions, source = interpret_command(speculation.text, return_source=True, cache=False)
+            except Exception as e:
+                print(f"Speculative interpretation failed: {str(e)}")
+                actions, source = None, None
+
+            with self._lock:
+                if source == "gemini":
+                    self.stats["gemini_calls"] += 1
+                if not actions or any(a.get('action') == 'error' for a in actions):
+                    # Leave errors to the normal path, which may succeed on a retry
+                    self.stats["failed"] += 1
+                    speculation.actions = None
+                else:
+                    speculation.actions = actions
+                speculation.source = source
+                if self._pending is not None and not speculation.claimed:
+                    # The user kept typing while this was interpreted
+                    self.stats["stale"] += 1
+                if not self._running:
+                    self._retire(speculation)
+                speculation.done.set()
+                cache_now = self._take_for_cache(speculation)
+            if cache_now:
+                self._write_cache([speculation])
@@ -0,0 +1,177 @@
+"""
+Background daemon for CommandCompanion
+
+Keeps the Gemini client, the interpretation cache, the executable and
+desktop indexes and the command pipeline warm, and accepts commands from
+client.py over a Unix domain socket, so a command sent from a desktop
+hotkey does not pay for imports, API setup or index builds.
+
+Requests (one JSON object per line):
+    {"command": "open terminal"}         run a command; events stream back until it ends,
+                                         the last one with "error": true if it failed
+    {"command": "...", "wait": false}    only wait until the command is queued
+    {"op": "cancel"}                     cancel all queued and running commands
+    {"op": "stats"}                      pipeline, interpretation and file cache counters
+    {"op": "ping"}
+
+Usage:
+    python daemon.py
+"""
+
+import os
+import queue
+import signal
+import socket
+import socketserver
+import sys
+import threading
+from dotenv import load_dotenv
+
+from core import clients
+from core.cache import get_cache_stats, get_file_cache_stats
+from core.pipeline import CommandPipeline
+from actions.desktop_index import get_desktop_index
+from utils.executables import get_executable_index
+from utils.ipc import socket_path, send_message, read_message
+
+# Pipeline events after which a command is over
+FINAL_EVENTS = ("done", "cancelled", "quit")
+
+class CommandHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                request = read_message(self.rfile)
+            except ValueError:
+                send_message(self.wfile, {"event": "error", "message": "Invalid JSON"})
+                return
+            if request is None:
+                return
+            try:
+                self.server.daemon.handle_request(request, lambda message: send_message(self.wfile, message))
+            except (BrokenPipeError, ConnectionResetError):
+                # The client went away; its command keeps running
+                return
+
+class CommandServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+class CommandDaemon:
+    def __init__(self, path=None):
+        """
+        Initialize the daemon.
+
+        Args:
+            path (str, optional): Socket path, defaults to utils.ipc.socket_path()
+        """
+        self.path = path or socket_path()
+        self.pipeline = None
+        self.server = None
+
+    def warm_up(self):
+        """Configure the API and build the lookup structures before the first command."""
+        load_dotenv()
+        clients.configure(os.getenv('GENAI_API_KEY'))
+        get_executable_index()
+        threading.Thread(target=get_desktop_index, daemon=True).start()
+        get_cache_stats()
+        get_file_cache_stats()
+
+    def _dispatch(self, event, job, payload):
+        print(f"[{job.id}] {event}: {payload}")
+        if event == "quit":
+            # A quit command stops the daemon, like it closes the window
+            threading.Thread(target=self.shutdown, daemon=True).start()
+
+    def handle_request(self, request, reply):
+        """
+        Serve one request from a client.
+
+        Args:
+            request (dict): The decoded request
+            reply (function): Sends a message back to the client
+        """
+        op = request.get("op")
+        if op == "ping":
+            reply({"event": "pong"})
+        elif op == "stats":
+            reply({"event": "stats", "pipeline": self.pipeline.get_stats(), "cache": get_cache_stats(),
+                   "files": get_file_cache_stats()})
+        elif op == "cancel":
+            reply({"event": "cancelled", "message": f"Cancelled {self.pipeline.cancel()} command(s)"})
+        elif "command" in request:
+            self._run_command(request["command"], request.get("wait", True), reply)
+        else:
+            reply({"event": "error", "message": f"Unknown request: {request}"})
+
+    def _run_command(self, command, wait, reply):
+        events = queue.Queue()
+        job = self.pipeline.submit(command, listener=lambda event, job, payload: events.put((event, payload)))
+        if job is None:
+            reply({"event": "rejected", "message": "Too many commands queued, please wait"})
+            return
+        reply({"event": "queued", "job": job.id, "message": f"Queued: {command}"})
+        if not wait:
+            return
+        while True:
+            event, payload = events.get()
+            message = {"event": event, "job": job.id, "message": payload}
+            if event in FINAL_EVENTS:
+                # Lets clients tell a failed command from one that ran
+                message["error"] = job.failed
+            reply(message)
+            if event in FINAL_EVENTS:
+                return
+
+    def _claim_socket(self):
+        """Remove a socket left behind by a daemon that is no longer running."""
+        if not os.path.exists(self.path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except OSError:
+            os.unlink(self.path)
+        else:
+            raise RuntimeError(f"A daemon is already listening on {self.path}")
+        finally:
+            probe.close()
+
+    def serve_forever(self):
+        self.warm_up()
+        self.pipeline = CommandPipeline(dispatch=self._dispatch)
+        self._claim_socket()
+        old_umask = os.umask(0o177)  # Only this user may connect
+        try:
+            self.server = CommandServer(self.path, CommandHandler)
+        finally:
+            os.umask(old_umask)
+        self.server.daemon = self
+        print(f"CommandCompanion daemon listening on {self.path}")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.pipeline.shutdown()
+            print(f"Command pipeline stats: {self.pipeline.get_stats()}")
+            self.server.server_close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def shutdown(self):
+        if self.server:
+            self.server.shutdown()
+
+def main():
+    daemon = CommandDaemon()
+    # serve_forever runs on the main thread, so stop it from a helper thread
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *args: threading.Thread(target=daemon.shutdown).start())
+    try:
+        daemon.serve_forever()
+    except RuntimeError as e:
+        print(str(e))
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
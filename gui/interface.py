@@ -3,15 +3,18 @@ GUI interface components for CommandCompanion
 """
 
 import tkinter as tk
-from config.settings import GUI_CONFIG
+from config.settings import GUI_CONFIG, SPECULATION_CONFIG
 
-def create_interface(root, on_submit):
+def create_interface(root, on_submit, on_cancel=None, on_pause=None):
     """
     Create the GUI interface for CommandCompanion.
     
     Args:
         root (tk.Tk): The root Tkinter window
         on_submit (function): Callback function for submit button
+        on_cancel (function, optional): Callback function for cancel button
+        on_pause (function, optional): Called with the entry text once the
+            user stops typing for SPECULATION_CONFIG["debounce_ms"]
         
     Returns:
         tuple: A tuple containing (entry_widget, status_label)
@@ -49,6 +52,23 @@ def create_interface(root, on_submit):
     entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
     entry.focus()
 
+    # Debounce keystrokes so on_pause only sees text the user paused on
+    if on_pause:
+        pending = {"after_id": None}
+
+        def on_key_release(event):
+            if event.keysym in ('Return', 'Escape'):
+                return
+            if pending["after_id"] is not None:
+                entry.after_cancel(pending["after_id"])
+            pending["after_id"] = entry.after(SPECULATION_CONFIG.get("debounce_ms", 400), fire)
+
+        def fire():
+            pending["after_id"] = None
+            on_pause(entry.get())
+
+        entry.bind('<KeyRelease>', on_key_release)
+
     # Execute button with nicer styling
     submit_btn = tk.Button(input_frame, text="Execute", bg=GUI_CONFIG["button_bg"], fg="white", 
                           font=normal_font, relief=tk.FLAT, padx=15, 
@@ -56,6 +76,13 @@ def create_interface(root, on_submit):
                           command=on_submit)
     submit_btn.pack(side=tk.RIGHT, padx=(10, 0))
 
+    # Cancel button for in-flight commands
+    if on_cancel:
+        cancel_btn = tk.Button(input_frame, text="Cancel", bg=GUI_CONFIG["footer_bg"], fg=GUI_CONFIG["header_bg"],
+                               font=normal_font, relief=tk.FLAT, padx=10,
+                               command=on_cancel)
+        cancel_btn.pack(side=tk.RIGHT, padx=(10, 0))
+
     # Status frame
     status_frame = tk.LabelFrame(content_frame, text="Status", bd=1, relief=tk.GROOVE, 
                                bg="white", font=normal_font, padx=10, pady=10)
@@ -72,7 +99,7 @@ def create_interface(root, on_submit):
     footer_frame.pack(fill=tk.X, side=tk.BOTTOM)
 
     # Footer text
-    footer_label = tk.Label(footer_frame, text="Press Enter to execute commands", 
+    footer_label = tk.Label(footer_frame, text="Press Enter to execute commands, Escape to cancel", 
                           font=("Helvetica", 8), bg=GUI_CONFIG["footer_bg"], fg=GUI_CONFIG["footer_fg"])
     footer_label.pack(pady=8)
     
@@ -1,13 +1,13 @@
 import sys
 import os
-import time
+import queue
 import tkinter as tk
 from dotenv import load_dotenv
-import google.generativeai as genai
 
-from config.settings import GUI_TITLE, GUI_SIZE, GUI_CONFIG
-from core.interpreter import interpret_command
-from core.executor import execute_action
+from config.settings import GUI_TITLE, GUI_SIZE, GUI_CONFIG, PIPELINE_CONFIG, SPECULATION_CONFIG
+from core import clients
+from core.pipeline import CommandPipeline
+from core.speculation import SpeculativeInterpreter
 from gui.interface import create_interface
 from speech.recognition import SpeechRecognizer
 
@@ -16,7 +16,8 @@ def main():
     load_dotenv()
     
     api_key = os.getenv('GENAI_API_KEY')
-    genai.configure(api_key=api_key)
+    # Configure Gemini and warm the connection while the window is built
+    clients.configure(api_key)
 
     root = tk.Tk()
     app = CommandCompanion(root)
@@ -30,9 +31,19 @@ class CommandCompanion:
         self.root.geometry(GUI_SIZE)
         self.root.configure(bg=GUI_CONFIG["bg_color"])
         
-        self.entry, self.status_label = create_interface(self.root, self.on_submit)
+        # Interpret the command in the background while it is being typed
+        self.speculator = SpeculativeInterpreter() if SPECULATION_CONFIG.get("enabled", True) else None
+        on_pause = self.speculator.update if self.speculator else None
+        self.entry, self.status_label = create_interface(self.root, self.on_submit, self.on_cancel, on_pause)
         
         self.root.bind('<Return>', lambda event: self.on_submit())
+        self.root.bind('<Escape>', lambda event: self.on_cancel())
+
+        # Commands run on worker threads; their results come back through this
+        # queue and are applied on the Tk thread by _poll_ui_events
+        self.ui_events = queue.Queue()
+        self.pipeline = CommandPipeline(dispatch=self._dispatch)
+        self._poll_ui_events()
 
         # Initialize speech recognition
         self.speech_recognizer = SpeechRecognizer(
@@ -40,11 +51,8 @@ class CommandCompanion:
         status_callback=self.update_speech_status
         )
 
-# Start wake word detection if microphone is available
-        if hasattr(self.speech_recognizer, 'microphone') and self.speech_recognizer.microphone is not None:
-            self.speech_recognizer.start_wake_detection()
-        else:
-            self.status_label.config(text="Speech recognition disabled: Microphone permission required")
+        # Start wake word detection; the microphone is opened in the background
+        self.speech_recognizer.start_wake_detection()
 
         # Fix: corrected "protocool" to "protocol"
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
@@ -53,20 +61,46 @@ class CommandCompanion:
         """Handle the window close event."""
         if hasattr(self, 'speech_recognizer'):
             self.speech_recognizer.stop()
+        self.pipeline.shutdown()
+        print(f"Command pipeline stats: {self.pipeline.get_stats()}")
+        if self.speculator:
+            self.speculator.shutdown()
+            print(f"Speculation stats: {self.speculator.get_stats()}")
         self.root.destroy()
     
     def update_speech_status(self, status_text):
         """Update the status label with speech recognition status."""
-        self.status_label.config(text=status_text)
+        # Called from the speech thread, so hand it to the Tk thread
+        self.ui_events.put(("status", None, status_text))
     
     def process_voice_command(self, command_text):
         """Process the command received from speech recognition."""
-        # Fix: corrected tk.command_text to command_text
-        self.entry.delete(0, tk.END)
-        self.entry.insert(0, command_text)
-        
-        # Process the command immediately
-        self.on_submit()
+        self.ui_events.put(("voice", None, command_text))
+
+    def _dispatch(self, event, job, payload):
+        """Receive pipeline events on a worker thread."""
+        self.ui_events.put((event, job, payload))
+
+    def _poll_ui_events(self):
+        """Apply queued pipeline and speech events on the Tk thread."""
+        try:
+            while True:
+                event, job, payload = self.ui_events.get_nowait()
+                if event == "voice":
+                    self.entry.delete(0, tk.END)
+                    self.entry.insert(0, payload)
+                    # Process the command immediately
+                    self.on_submit(typed=False)
+                elif event == "quit":
+                    self.root.quit()
+                    return
+                elif job is not None and self.pipeline.pending() > 1:
+                    self.status_label.config(text=f"[{job.command}] {payload} ({self.pipeline.pending()} pending)")
+                else:
+                    self.status_label.config(text=payload)
+        except queue.Empty:
+            pass
+        self.root.after(PIPELINE_CONFIG.get("ui_poll_interval_ms", 50), self._poll_ui_events)
 
     def _get_resource_path(self, resource):
         """Get the path to a resource file."""
@@ -80,33 +114,28 @@ class CommandCompanion:
         
         return None
     
-    def on_submit(self):
-        """Handle the submit button press."""
+    def on_submit(self, typed=True):
+        """
+        Handle the submit button press.
+
+        Args:
+            typed (bool): Whether the command was typed, and so may have been
+                interpreted speculatively, rather than spoken
+        """
         user_input = self.entry.get().strip()
         if user_input:
-            actions = interpret_command(user_input)
-            status_messages = []
-            context = {}  # Context to track if VSCode was opened
-            
-            # Execute each action
-            for i, action_data in enumerate(actions):
-                # For multi-step commands involving VSCode, add extra delay
-                if i > 0 and action_data.get('action') == 'create_file' and actions[i-1].get('action') == 'open_app' and actions[i-1].get('app', '').lower() == 'vscode':
-                    print("Waiting for VSCode to fully initialize before creating file...")
-                    time.sleep(3)  # Increased wait time for VSCode to fully initialize
-                
-                # Special handling for quit action
-                if action_data.get('action') == 'quit':
-                    self.root.quit()
-                    return
-                
-                # Execute the action and get status
-                status = execute_action(action_data, context)
-                status_messages.append(status)
-            
-            # Update status display
-            self.status_label.config(text="; ".join(status_messages))
+            speculation = self.speculator.claim(user_input) if typed and self.speculator else None
+            job = self.pipeline.submit(user_input, speculation=speculation)
+            if job is None:
+                self.status_label.config(text="Too many commands queued, please wait")
+                return
+            self.status_label.config(text=f"Queued: {user_input}")
             self.entry.delete(0, tk.END)  # Clear the input field
 
+    def on_cancel(self):
+        """Cancel the commands that are queued or running."""
+        if self.pipeline.cancel():
+            self.status_label.config(text="Cancelling...")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,183 @@
+"""
+Shared audio capture for CommandCompanion
+
+A single long-lived microphone stream writes into a preallocated ring
+buffer. The wake word detector and the command recognizer each read from
+it with their own cursor, so the stream is never reopened between them
+and audio captured right after the wake word (or just before it, as
+pre-roll) is still available when the command is recorded.
+
+The microphone is opened on the capture thread, and reopened with backoff
+when it fails or disappears, so a busy or unplugged device never blocks
+the caller.
+"""
+
+import threading
+import time
+from array import array
+
+# Backoff between attempts to (re)open the microphone
+REOPEN_INITIAL_DELAY = 0.5
+REOPEN_MAX_DELAY = 5.0
+
+class RingBuffer:
+    def __init__(self, capacity):
+        """
+        Initialize a fixed-size buffer of 16-bit samples.
+
+        Positions passed to read() are absolute sample counts since the
+        buffer was created, so readers never need to care about wrap-around.
+
+        Args:
+            capacity (int): Number of samples kept
+        """
+        self.capacity = capacity
+        self._samples = array('h', bytes(capacity * 2))
+        self._bytes = memoryview(self._samples).cast('B')
+        self.position = 0  # Total samples ever written
+
+    @property
+    def oldest(self):
+        """Absolute position of the oldest sample still held."""
+        return max(0, self.position - self.capacity)
+
+    def write(self, frame):
+        """Append raw 16-bit little-endian samples, overwriting the oldest ones."""
+        frame = memoryview(frame).cast('B')
+        count = len(frame) // 2
+        if count > self.capacity:
+            frame = frame[-self.capacity * 2:]
+            self.position += count - self.capacity
+            count = self.capacity
+        start = self.position % self.capacity
+        first = min(count, self.capacity - start)
+        self._bytes[start * 2:(start + first) * 2] = frame[:first * 2]
+        if first < count:
+            self._bytes[:(count - first) * 2] = frame[first * 2:count * 2]
+        self.position += count
+
+    def read(self, start, end=None):
+        """
+        Return the samples between two absolute positions as bytes.
+
+        Positions older than the buffer holds are clamped to the oldest sample.
+        """
+        end = self.position if end is None else min(end, self.position)
+        start = max(start, self.oldest)
+        if start >= end:
+            return b''
+        first_index = start % self.capacity
+        last_index = end % self.capacity or self.capacity
+        if first_index < last_index:
+            return bytes(self._bytes[first_index * 2:last_index * 2])
+        return bytes(self._bytes[first_index * 2:]) + bytes(self._bytes[:last_index * 2])
+
+class AudioStream:
+    def __init__(self, microphone, buffer_seconds=8.0, on_error=None, on_open=None):
+        """
+        Initialize a shared capture stream for a microphone.
+
+        Args:
+            microphone (sr.Microphone): Microphone to capture from, or anything
+                with the same SAMPLE_RATE/SAMPLE_WIDTH/CHUNK and context manager
+                interface, such as a MicrophoneManager
+            buffer_seconds (float): Seconds of audio kept for readers
+            on_error (callable, optional): Called with the exception when the
+                microphone cannot be opened (once per run of failures)
+            on_open (callable, optional): Called each time the microphone was opened
+        """
+        self.microphone = microphone
+        self.sample_rate = microphone.SAMPLE_RATE
+        self.sample_width = microphone.SAMPLE_WIDTH
+        self.chunk = microphone.CHUNK
+        self.buffer = RingBuffer(int(buffer_seconds * self.sample_rate))
+        self.last_capture_time = None
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+        self._source = None
+        self.on_error = on_error
+        self.on_open = on_open
+
+    @property
+    def position(self):
+        """Absolute sample position of the newest captured audio."""
+        return self.buffer.position
+
+    def seconds_to_samples(self, seconds):
+        return int(seconds * self.sample_rate)
+
+    def start(self):
+        """Start capturing on a background thread; the microphone is opened there."""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._capture_loop, name="audio-capture", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop capturing and release the microphone."""
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1)
+        self._close()
+        with self._condition:
+            self._condition.notify_all()
+
+    @property
+    def is_open(self):
+        return self._source is not None
+
+    def _open(self):
+        self._source = self.microphone.__enter__()
+        if self.on_open:
+            self.on_open()
+
+    def _close(self):
+        if self._source is not None:
+            self._source = None
+            self.microphone.__exit__(None, None, None)
+
+    def _capture_loop(self):
+        delay = REOPEN_INITIAL_DELAY
+        reported = False
+        while self._running:
+            if self._source is None:
+                try:
+                    self._open()
+                except Exception as e:
+                    if not reported and self.on_error:
+                        self.on_error(e)
+                    reported = True
+                    time.sleep(delay)
+                    delay = min(delay * 2, REOPEN_MAX_DELAY)
+                    continue
+                delay, reported = REOPEN_INITIAL_DELAY, False
+            try:
+                frame = self._source.stream.read(self.chunk)
+            except Exception as e:
+                # Device unplugged or taken over; reopen (possibly another device)
+                print(f"Error reading from microphone: {str(e)}")
+                self._close()
+                continue
+            with self._condition:
+                self.buffer.write(frame)
+                self.last_capture_time = time.monotonic()
+                self._condition.notify_all()
+
+    def read(self, cursor, timeout=0.5):
+        """
+        Wait for audio newer than cursor and return it.
+
+        Args:
+            cursor (int): Absolute position the reader has consumed up to
+            timeout (float): Seconds to wait for new audio
+
+        Returns:
+            tuple: (bytes, new_cursor); bytes is empty if nothing arrived in time
+        """
+        with self._condition:
+            if self.buffer.position <= cursor:
+                self._condition.wait(timeout)
+            end = self.buffer.position
+            return self.buffer.read(cursor, end), end
@@ -0,0 +1,136 @@
+"""
+Microphone device management for CommandCompanion
+
+Input devices are enumerated through PyAudio without recording anything.
+The device that last opened successfully is remembered in the cache
+directory and tried first next time. The manager can be used wherever an
+sr.Microphone is expected: the device is only opened when the stream is
+entered, and every open re-enumerates the devices, so a microphone that
+was plugged in later or was busy at startup is picked up on the next try.
+"""
+
+import json
+import os
+import speech_recognition as sr
+from utils.helpers import get_cache_dir
+
+# Bytes per sample of the paInt16 format sr.Microphone records in
+SAMPLE_WIDTH = 2
+
+def _state_path():
+    return os.path.join(get_cache_dir(), "microphone.json")
+
+def list_input_devices(sample_rate=None):
+    """
+    Enumerate input devices without opening a stream.
+
+    Args:
+        sample_rate (int, optional): Only include devices that support this
+            rate for mono 16-bit capture
+
+    Returns:
+        list: Dicts with 'index', 'name' and 'default', default device first
+    """
+    pyaudio = sr.Microphone.get_pyaudio()
+    audio = pyaudio.PyAudio()
+    try:
+        try:
+            default_index = audio.get_default_input_device_info()['index']
+        except (IOError, OSError):
+            default_index = None
+        devices = []
+        for index in range(audio.get_device_count()):
+            info = audio.get_device_info_by_index(index)
+            if info.get('maxInputChannels', 0) <= 0:
+                continue
+            if sample_rate:
+                try:
+                    audio.is_format_supported(sample_rate, input_device=index, input_channels=1,
+                                              input_format=pyaudio.paInt16)
+                except ValueError:
+                    continue
+            devices.append({'index': index, 'name': info.get('name', ''),
+                            'default': index == default_index})
+    finally:
+        audio.terminate()
+    devices.sort(key=lambda device: not device['default'])
+    return devices
+
+class MicrophoneManager:
+    def __init__(self, sample_rate, chunk_size=1024):
+        """
+        Initialize the manager. No device is touched until the stream is opened.
+
+        Args:
+            sample_rate (int): Capture rate
+            chunk_size (int): Samples per read from the stream
+        """
+        self.SAMPLE_RATE = sample_rate
+        self.SAMPLE_WIDTH = SAMPLE_WIDTH
+        self.CHUNK = chunk_size
+        self.device_name = self._load_last_device()
+        self._microphone = None
+
+    def _load_last_device(self):
+        try:
+            with open(_state_path()) as f:
+                return json.load(f).get('name')
+        except (OSError, ValueError):
+            return None
+
+    def _save_last_device(self, name):
+        if name == self.device_name:
+            return
+        self.device_name = name
+        try:
+            with open(_state_path(), 'w') as f:
+                json.dump({'name': name}, f)
+        except OSError as e:
+            print(f"Could not remember microphone: {str(e)}")
+
+    def candidates(self):
+        """
+        Return the input devices in the order they are tried.
+
+        The last working device comes first (matched by name, since PortAudio
+        indexes change when devices are plugged in), then the system default.
+        """
+        devices = list_input_devices(self.SAMPLE_RATE)
+        devices.sort(key=lambda device: device['name'] != self.device_name)
+        return devices
+
+    def __enter__(self):
+        """
+        Open the first device that works and return its source.
+
+        Raises:
+            Exception: The error of the first device tried if none could be
+                opened, e.g. device busy or permission denied
+        """
+        first_error = None
+        devices = self.candidates()
+        if not devices:
+            raise OSError("No microphone found")
+        for device in devices:
+            microphone = sr.Microphone(device_index=device['index'], sample_rate=self.SAMPLE_RATE,
+                                       chunk_size=self.CHUNK)
+            try:
+                source = microphone.__enter__()
+            except Exception as e:
+                print(f"Could not open microphone '{device['name']}': {str(e)}")
+                first_error = first_error or e
+                continue
+            self._microphone = microphone
+            self._save_last_device(device['name'])
+            print(f"Using microphone '{device['name']}'")
+            return source
+        raise first_error
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._microphone is not None:
+            microphone, self._microphone = self._microphone, None
+            try:
+                microphone.__exit__(exc_type, exc_value, traceback)
+            except Exception as e:
+                # The device may already be gone after being unplugged
+                print(f"Error closing microphone: {str(e)}")
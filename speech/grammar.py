@@ -0,0 +1,188 @@
+"""
+Offline command recognition for CommandCompanion
+
+Builds a JSGF grammar from the commands the local parser understands
+(app names, allowed system tasks and the command verbs in
+config/settings.py) and decodes spoken commands against it with
+pocketsphinx. Decoding against a small grammar is fast and needs no
+network.
+
+A closed grammar forces any utterance onto its nearest path, and the
+posterior over grammar paths stays high even for speech the grammar does
+not cover. Every decode is therefore cross-checked against an
+unconstrained phone loop over the same audio: speech the grammar really
+describes scores almost as well as the phone loop, out-of-grammar speech
+such as file creation with a free-form topic scores clearly worse and is
+left to the cloud recognizer.
+"""
+
+import os
+from config.settings import app_aliases, app_synonyms, allowed_tasks, COMMAND_VERBS, SPEECH_CONFIG
+from speech.wake_word import DECODER_SAMPLE_RATE, model_files
+
+GRAMMAR_NAME = "commands"
+PHONE_LOOP_NAME = "phones"
+
+# pocketsphinx computes features at 100 frames per second
+FRAMES_PER_SECOND = 100
+
+def _load_dictionary_words(dictionary_path):
+    """Return the set of words the pronunciation dictionary knows."""
+    words = set()
+    with open(dictionary_path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            word = line.split(' ', 1)[0]
+            # Alternative pronunciations are listed as word(2), word(3), ...
+            words.add(word.split('(', 1)[0].lower())
+    return words
+
+def _alternatives(phrases, known_words=None):
+    """Join phrases into a JSGF alternative, dropping those with unknown words."""
+    kept = []
+    for phrase in phrases:
+        words = phrase.lower().split()
+        if words and (known_words is None or all(w in known_words for w in words)):
+            kept.append(' '.join(words))
+    return ' | '.join(sorted(set(kept)))
+
+def build_jsgf(known_words=None):
+    """
+    Generate the command grammar from the settings.
+
+    Args:
+        known_words (set, optional): Words the decoder can pronounce; phrases
+            containing other words are left out of the grammar
+
+    Returns:
+        str: JSGF grammar text
+    """
+    app_names = _alternatives(list(app_aliases) + list(app_synonyms), known_words)
+
+    task_verbs = COMMAND_VERBS['system_task']
+    task_phrases = []
+    for task in allowed_tasks:
+        words = task.split('_')
+        if words[0] in task_verbs:
+            # "empty trash" also accepts "clear the trash"
+            task_phrases += [f"{verb} {' '.join(words[1:])}" for verb in task_verbs]
+            task_phrases += [f"{verb} the {' '.join(words[1:])}" for verb in task_verbs]
+        else:
+            task_phrases.append(' '.join(words))
+
+    rules = {
+        'open_verb': _alternatives(COMMAND_VERBS['open_app'], known_words),
+        'app': app_names,
+        'task': _alternatives(task_phrases, known_words),
+        'quit': _alternatives(COMMAND_VERBS['quit'], known_words)
+    }
+    steps = []
+    if rules['open_verb'] and rules['app']:
+        steps.append("<open_verb> [the] <app> [app]")
+    if rules['task']:
+        steps.append("<task>")
+    if rules['quit']:
+        steps.append("<quit> [the app]")
+    if not steps:
+        raise ValueError("No command phrases left for the grammar")
+
+    lines = ["#JSGF V1.0;", f"grammar {GRAMMAR_NAME};",
+             "public <command> = <step> [(and | then | and then) <step>];",
+             f"<step> = {' | '.join(steps)};"]
+    lines += [f"<{name}> = {body};" for name, body in rules.items() if body]
+    return '\n'.join(lines) + '\n'
+
+def _create_grammar_decoder():
+    """
+    Create a pocketsphinx decoder with the command grammar and a phone loop search.
+
+    Raises:
+        FileNotFoundError: If the phone loop model is missing, since decodes
+            could not be checked for out-of-grammar speech without it
+    """
+    from pocketsphinx import Decoder
+
+    files = model_files()
+    if not os.path.exists(files['phone_lm']):
+        raise FileNotFoundError(f"Phone loop model not found: {files['phone_lm']}")
+    grammar = build_jsgf(_load_dictionary_words(files['dict']))
+    try:
+        config = Decoder.default_config()
+    except AttributeError:
+        # pocketsphinx 5 takes the configuration as keyword arguments
+        decoder = Decoder(hmm=files['hmm'], dict=files['dict'], lm=None, loglevel='FATAL')
+        decoder.add_jsgf_string(GRAMMAR_NAME, grammar)
+        decoder.add_allphone_file(PHONE_LOOP_NAME, files['phone_lm'])
+        return decoder
+    config.set_string('-hmm', files['hmm'])
+    config.set_string('-dict', files['dict'])
+    config.set_string('-logfn', os.devnull)
+    decoder = Decoder(config)
+    decoder.set_jsgf_string(GRAMMAR_NAME, grammar)
+    decoder.set_allphone_file(PHONE_LOOP_NAME, files['phone_lm'])
+    return decoder
+
+def _activate_search(decoder, name):
+    try:
+        decoder.activate_search(name)
+    except AttributeError:
+        # pocketsphinx 0.1.x
+        decoder.set_search(name)
+
+class GrammarRecognizer:
+    def __init__(self, min_acoustic_ratio=None):
+        """
+        Load the decoder and compile the command grammar.
+
+        Args:
+            min_acoustic_ratio (float, optional): Lowest per-frame likelihood
+                ratio of the grammar decode to the phone loop decode for the
+                speech to count as in-grammar, defaults to
+                SPEECH_CONFIG["grammar_min_acoustic_ratio"]
+        """
+        self.decoder = _create_grammar_decoder()
+        if min_acoustic_ratio is None:
+            min_acoustic_ratio = SPEECH_CONFIG.get("grammar_min_acoustic_ratio", 0.8)
+        self.min_acoustic_ratio = min_acoustic_ratio
+
+    def _decode(self, search, raw):
+        """Decode raw audio with one search and return (hypothesis, acoustic score)."""
+        _activate_search(self.decoder, search)
+        self.decoder.start_utt()
+        self.decoder.process_raw(raw, False, True)
+        self.decoder.end_utt()
+        hypothesis = self.decoder.hyp()
+        if hypothesis is None:
+            return None, None
+        return hypothesis, sum(segment.ascore for segment in self.decoder.seg())
+
+    def recognize(self, audio):
+        """
+        Decode a recorded command against the grammar.
+
+        Args:
+            audio (sr.AudioData): The recorded command
+
+        Returns:
+            tuple: (text, confidence) with confidence between 0 and 1;
+            text is None if nothing in the grammar matched or the speech was
+            rejected as out-of-grammar
+        """
+        raw = audio.get_raw_data(convert_rate=DECODER_SAMPLE_RATE, convert_width=2)
+        hypothesis, grammar_score = self._decode(GRAMMAR_NAME, raw)
+        if hypothesis is None or not hypothesis.hypstr:
+            return None, 0.0
+        logmath = self.decoder.get_logmath()
+        confidence = logmath.exp(hypothesis.prob)
+
+        _, phone_score = self._decode(PHONE_LOOP_NAME, raw)
+        if phone_score is None:
+            print("Phone loop decode failed, rejecting offline decode")
+            return None, 0.0
+        frames = max(1, len(raw) * FRAMES_PER_SECOND // (2 * DECODER_SAMPLE_RATE))
+        # The phone loop is the best any word sequence could score, so this is at most about 1
+        ratio = logmath.exp(int(min(0, grammar_score - phone_score) / frames))
+        if ratio < self.min_acoustic_ratio:
+            print(f"Rejected '{hypothesis.hypstr}' as out-of-grammar "
+                  f"(acoustic ratio {ratio:.2f} < {self.min_acoustic_ratio:.2f})")
+            return None, 0.0
+        return hypothesis.hypstr, min(max(confidence, 0.0), 1.0)
@@ -3,23 +3,32 @@ Speech recognition functionality for CommandCompanion
 """
 
 import os
+import re
 import speech_recognition as sr
 import threading
 import time
-import pyttsx3
 import subprocess
-import tkinter as tk
-from tkinter import messagebox
 from config.settings import SPEECH_CONFIG
+from speech.wake_word import WakeWordDetector, DECODER_SAMPLE_RATE
+from speech.audio_buffer import AudioStream
+from speech.devices import MicrophoneManager
+from speech.grammar import GrammarRecognizer
+from speech.tts import FeedbackSpeaker
+from speech.vad import VoiceActivityDetector, NoiseFloorTracker, rms
 
 class SpeechRecognizer:
-    def __init__(self, command_callback, status_callback=None):
+    def __init__(self, command_callback, status_callback=None, microphone=None):
         """
         Initialize speech recognition with wake word detection.
+
+        Nothing is recorded or opened here; the microphone is opened by the
+        capture thread once wake word detection starts.
         
         Args:
             command_callback: Function to call with recognized text
             status_callback: Function to update UI status (optional)
+            microphone: Microphone to capture from (optional), defaults to a
+                MicrophoneManager that picks a working input device
         """
         self.command_callback = command_callback
         self.status_callback = status_callback
@@ -27,7 +36,15 @@ class SpeechRecognizer:
         self.is_listening = False
         self.is_running = False
         self.thread = None
-        self.microphone = None
+        self.wake_detector = None
+        self.vad = None
+        self.gate_wake_word = SPEECH_CONFIG.get("vad_enabled", True)
+        self._reported_threshold = None
+        self.audio_stream = None
+        self.pre_roll = SPEECH_CONFIG.get("pre_roll_seconds", 0.5)
+        self.service = SPEECH_CONFIG.get("recognition_service", "google").lower()
+        self.grammar_recognizer = None
+        self.recognition_stats = {"offline": 0, "fallback": 0}
         
         # Get settings from config
         self.wake_word = SPEECH_CONFIG.get("wake_word", "comp").lower()
@@ -36,51 +53,30 @@ class SpeechRecognizer:
         
         # Initialize text-to-speech engine if audio feedback is enabled
         if self.enable_audio_feedback:
-            self.tts_engine = pyttsx3.init()
+            self.speaker = FeedbackSpeaker()
         
-        # Check for microphone permission first
-        if not self._check_microphone_access():
-            print("Microphone access not granted. Speech recognition disabled.")
-            if status_callback:
-                status_callback("Error: Microphone access required")
-            return
-            
-        # Initialize microphone after permission is granted
-        try:
-            self.microphone = sr.Microphone()
-            # Adjust for ambient noise once on startup
-            with self.microphone as source:
-                self.recognizer.adjust_for_ambient_noise(source)
-                print("Ambient noise threshold adjusted")
-        except Exception as e:
-            print(f"Error initializing microphone: {str(e)}")
-            if status_callback:
-                status_callback(f"Error: {str(e)}")
+        # Wake word decoding works on 16 kHz audio, so capture at that rate.
+        # There is no startup calibration: the noise floor tracker sets the
+        # energy threshold from the live stream
+        self.microphone = microphone or MicrophoneManager(sample_rate=DECODER_SAMPLE_RATE)
     
-    def _check_microphone_access(self):
-        """Check if microphone access is available and request if needed"""
-        try:
-            # Attempt to create and use microphone
-            test_mic = sr.Microphone()
-            with test_mic as source:
-                # Just try to get a very short recording
-                audio = self.recognizer.listen(source, timeout=1, phrase_time_limit=0.5)
-                return True
-        except OSError as e:
-            if "device busy" in str(e).lower():
-                print("Microphone seems to be in use by another application")
-                self._show_mic_error("Microphone is being used by another application. Please close any app using the microphone and restart CommandCompanion.")
-            elif "permission" in str(e).lower() or "access" in str(e).lower():
-                print("Microphone permission denied")
-                self._request_permission()
-            else:
-                print(f"Microphone error: {str(e)}")
-                self._show_mic_error(f"Error accessing microphone: {str(e)}")
-            return False
-        except Exception as e:
-            print(f"Error checking microphone: {str(e)}")
-            self._show_mic_error(f"Error accessing microphone: {str(e)}")
-            return False
+    def _handle_microphone_error(self, error):
+        """Explain why the microphone could not be opened; the stream keeps retrying."""
+        message = str(error)
+        if "busy" in message.lower() or "unavailable" in message.lower():
+            print("Microphone seems to be in use by another application")
+            self._show_mic_error("Microphone is being used by another application. "
+                                 "CommandCompanion will start listening once it is free.")
+        elif "permission" in message.lower() or "access" in message.lower():
+            print("Microphone permission denied")
+            self._request_permission()
+        else:
+            print(f"Microphone error: {message}")
+            self._show_mic_error(f"Error accessing microphone: {message}")
+
+    def _handle_microphone_open(self):
+        if self.status_callback:
+            self.status_callback(self._idle_status())
     
     def _request_permission(self):
         """Guide the user to grant microphone permissions"""
@@ -89,8 +85,7 @@ class SpeechRecognizer:
             "On Fedora/Linux, please:\n"
             "1. Open System Settings\n"
             "2. Go to Privacy > Microphone\n"
-            "3. Enable access for CommandCompanion\n"
-            "4. Restart CommandCompanion"
+            "3. Enable access for CommandCompanion"
         )
         
         # Try to launch system settings directly
@@ -106,106 +101,245 @@ class SpeechRecognizer:
         self._show_mic_error(message)
     
     def _show_mic_error(self, message):
-        """Show error message to user about microphone permissions"""
+        """Report a microphone problem in the status bar and on the console"""
+        # Called from the capture thread, so no dialog is created here
         if self.status_callback:
-            self.status_callback("Error: Microphone access required")
-            
-        # Create a separate window for the error
-        try:
-            dialog_root = tk.Tk()
-            dialog_root.withdraw()  # Hide the main window
-            messagebox.showerror("Microphone Permission Required", message)
-            dialog_root.destroy()
-        except Exception:
-            # If we can't create a window, print to console
-            print("\n" + "="*50)
-            print("MICROPHONE PERMISSION REQUIRED")
-            print("="*50)
-            print(message)
-            print("="*50 + "\n")
+            self.status_callback("Error: Microphone unavailable, retrying...")
+        print("\n" + "="*50)
+        print("MICROPHONE UNAVAILABLE")
+        print("="*50)
+        print(message)
+        print("="*50 + "\n")
     
     def start_wake_detection(self):
         """Start background wake word detection"""
         if self.is_running or self.microphone is None:
             return
             
+        if self.audio_stream is None:
+            self.audio_stream = AudioStream(self.microphone, SPEECH_CONFIG.get("ring_buffer_seconds", 8.0),
+                                            on_error=self._handle_microphone_error,
+                                            on_open=self._handle_microphone_open)
         self.is_running = True
         self.thread = threading.Thread(target=self._wake_detection_loop)
         self.thread.daemon = True
         self.thread.start()
         
         if self.status_callback:
-            self.status_callback(f"Listening for wake word: '{self.wake_word}'...")
+            self.status_callback("Starting speech recognition...")
     
+    def _create_vad(self):
+        """Create the voice activity detector and noise floor tracker for the live stream."""
+        adaptive = SPEECH_CONFIG.get("adaptive_noise_floor", True)
+        if not self.gate_wake_word and not adaptive:
+            return None
+        tracker = None
+        if adaptive:
+            tracker = NoiseFloorTracker(
+                frame_seconds=self.microphone.CHUNK / self.microphone.SAMPLE_RATE,
+                window_seconds=SPEECH_CONFIG.get("noise_floor_window_seconds", 3.0),
+                ratio=SPEECH_CONFIG.get("noise_threshold_ratio", 3.0),
+                min_threshold=SPEECH_CONFIG.get("min_energy_threshold", 100)
+            )
+            # The tracker replaces speech_recognition's own threshold adjustment
+            self.recognizer.dynamic_energy_threshold = False
+        return VoiceActivityDetector(self.microphone.SAMPLE_RATE, self.recognizer.energy_threshold,
+                                     noise_tracker=tracker)
+
+    def _idle_status(self):
+        """Status text shown while waiting for the wake word."""
+        status = f"Listening for wake word: '{self.wake_word}'..."
+        if self.vad and self.vad.noise_tracker and self.vad.noise_tracker.noise_floor is not None:
+            status += (f" (noise floor {self.vad.noise_tracker.noise_floor:.0f}, "
+                       f"threshold {self.vad.energy_threshold:.0f})")
+        return status
+
+    def _track_noise_floor(self):
+        """Apply the tracked threshold and report it when it moved noticeably."""
+        threshold = self.vad.energy_threshold
+        self.recognizer.energy_threshold = threshold
+        previous = self._reported_threshold
+        if previous is None or abs(threshold - previous) > 0.25 * previous:
+            self._reported_threshold = threshold
+            if self.status_callback and not self.is_listening:
+                self.status_callback(self._idle_status())
+
     def stop(self):
         """Stop all speech recognition"""
         self.is_running = False
         if self.thread:
             self.thread.join(timeout=1)
+        if self.enable_audio_feedback:
+            self.speaker.stop()
+        if self.audio_stream:
+            self.audio_stream.stop()
+        if self.wake_detector:
+            print(f"Wake word detector stats: {self.wake_detector.get_stats()}")
+        if self.vad:
+            print(f"Voice activity stats: {self.vad.get_stats()}")
+        if self.service == "grammar":
+            print(f"Command recognition stats: {self.recognition_stats}")
     
     def _wake_detection_loop(self):
         """Main detection loop for wake word"""
-        print(f"Wake word detection started - listening for '{self.wake_word}'")
+        # The decoder takes a moment to load, so it is created here rather than at startup
+        try:
+            if self.wake_detector is None:
+                self.wake_detector = WakeWordDetector(self.wake_word, self.sensitivity)
+            if self.vad is None:
+                self.vad = self._create_vad()
+        except Exception as e:
+            print(f"Error initializing wake word detection: {str(e)}")
+            if self.status_callback:
+                self.status_callback(f"Error: {str(e)}")
+            self.is_running = False
+            return
+        if self.service == "grammar" and self.grammar_recognizer is None:
+            try:
+                self.grammar_recognizer = GrammarRecognizer()
+            except Exception as e:
+                print(f"Offline command recognition unavailable ({str(e)}), using cloud recognition")
+        self.audio_stream.start()
+        print(f"Wake word detection started - listening for '{self.wake_word}' "
+              f"({self.wake_detector.backend_name} backend)")
         
+        cursor = self.audio_stream.position
         while self.is_running:
             try:
-                with self.microphone as source:
-                    audio = self.recognizer.listen(source, phrase_time_limit=2)
-                
-                # Use Sphinx for wake word detection (works offline)
-                try:
-                    text = self.recognizer.recognize_sphinx(audio).lower()
-                    print(f"Potential wake word detected: {text}")
-                    
-                    # Check if wake word is in the recognized text
-                    if self.wake_word in text:
-                        print(f"Wake word '{self.wake_word}' detected!")
-                        if not self.is_listening:
-                            # Start active listening in a new thread
-                            threading.Thread(target=self._listen_for_command).start()
-                
-                except sr.UnknownValueError:
-                    # No speech detected, continue listening
-                    pass
-                except sr.RequestError as e:
-                    print(f"Sphinx error; {e}")
+                frame, cursor = self.audio_stream.read(cursor)
+                if not frame:
+                    continue
+                frames, segment_ended = [frame], False
+                if self.vad:
+                    vad_frames, vad_segment_ended = self.vad.filter(frame)
+                    if self.vad.noise_tracker:
+                        self._track_noise_floor()
+                    if self.gate_wake_word:
+                        # Only speech reaches the decoder; silence and hum are skipped
+                        frames, segment_ended = vad_frames, vad_segment_ended
+                detected = False
+                for speech_frame in frames:
+                    if self.wake_detector.process(speech_frame, captured_at=self.audio_stream.last_capture_time):
+                        detected = True
+                if segment_ended:
+                    self.wake_detector.reset()
+                if detected and not self.is_listening:
+                    print(f"Wake word '{self.wake_word}' detected!")
+                    self.is_listening = True
+                    # Start active listening in a new thread; detection keeps reading the stream
+                    threading.Thread(target=self._listen_for_command, args=(cursor,), daemon=True).start()
             
             except Exception as e:
                 print(f"Error in wake word detection: {str(e)}")
                 time.sleep(1)  # Prevent tight error loop
     
-    def _listen_for_command(self):
+    def _capture_command(self, detected_at, timeout, phrase_time_limit=10, prompt_seconds=0):
+        """
+        Record a command from the shared stream, starting with pre-roll audio.
+
+        Audio from just before the wake word was detected is included so a
+        command spoken in the same breath as the wake word is not cut off.
+        Recording ends after recognizer.pause_threshold seconds of silence.
+
+        Args:
+            detected_at (int): Stream position at which the wake word was detected
+            timeout (float): Seconds to wait for speech to start
+            phrase_time_limit (float): Maximum length of the command
+            prompt_seconds (float): Length of the spoken prompt playing while
+                recording starts; during it only sound well above the energy
+                threshold starts the command, so the prompt's own playback does not
+
+        Returns:
+            sr.AudioData: The recorded command
+        """
+        stream = self.audio_stream
+        width = stream.sample_width
+        cursor = max(stream.buffer.oldest, detected_at - stream.seconds_to_samples(self.pre_roll))
+        # Pre-roll is kept but does not count as the start of the command
+        audio = bytearray(stream.buffer.read(cursor, detected_at))
+        cursor = detected_at
+
+        pause_samples = stream.seconds_to_samples(self.recognizer.pause_threshold)
+        timeout_samples = stream.seconds_to_samples(timeout)
+        prompt_end = detected_at + stream.seconds_to_samples(prompt_seconds)
+        prompt_threshold = self.recognizer.energy_threshold * SPEECH_CONFIG.get("prompt_threshold_ratio", 2.0)
+        limit_samples = stream.seconds_to_samples(phrase_time_limit)
+        started, waited, silence, recorded = False, 0, 0, 0
+
+        while self.is_running:
+            frame, cursor = stream.read(cursor)
+            if not frame:
+                continue
+            samples = len(frame) // width
+            energy = rms(frame, width)
+            speech = energy > self.recognizer.energy_threshold
+            audio.extend(frame)
+            if not started:
+                waited += samples
+                if speech and (cursor > prompt_end or energy > prompt_threshold):
+                    started = True
+                elif waited >= timeout_samples:
+                    raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+                continue
+            recorded += samples
+            silence = 0 if speech else silence + samples
+            if silence >= pause_samples or recorded >= limit_samples:
+                break
+
+        return sr.AudioData(bytes(audio), stream.sample_rate, width)
+
+    def _strip_wake_word(self, text):
+        """Remove the wake word if the pre-roll caught it at the start of the command."""
+        return re.sub(rf"^\s*{re.escape(self.wake_word)}\b[\s,.!?]*", "", text, flags=re.IGNORECASE)
+
+    def _speech_under_way(self, detected_at):
+        """
+        Check whether the user kept talking after the wake word, as in "comp, open firefox".
+
+        Args:
+            detected_at (int): Stream position at which the wake word was detected
+
+        Returns:
+            bool: True if most of the audio just after detection is speech
+        """
+        stream = self.audio_stream
+        seconds = SPEECH_CONFIG.get("continuation_seconds", 0.3)
+        end = detected_at + stream.seconds_to_samples(seconds)
+        deadline = time.monotonic() + seconds + 0.5
+        cursor, speech, total = detected_at, 0, 0
+        while self.is_running and cursor < end and time.monotonic() < deadline:
+            frame, cursor = stream.read(cursor)
+            if not frame:
+                continue
+            samples = len(frame) // stream.sample_width
+            total += samples
+            if rms(frame, stream.sample_width) > self.recognizer.energy_threshold:
+                speech += samples
+        # The tail of the wake word alone should not count
+        return total > 0 and speech * 2 >= total
+
+    def _listen_for_command(self, detected_at):
         """Listen for a command after wake word detection"""
-        if self.is_listening:
-            return
-            
         self.is_listening = True
         
         if self.status_callback:
             self.status_callback("Listening for command...")
         
-        # Audio feedback
-        if self.enable_audio_feedback:
-            self._speak_feedback("Yes?")
+        # Audio feedback plays while recording starts, unless the command
+        # is already being spoken in the same breath as the wake word
+        prompt_seconds = 0
+        if not self._speech_under_way(detected_at):
+            prompt_seconds = self._speak_feedback("Yes?") or 0
         
         try:
-            with self.microphone as source:
-                timeout = SPEECH_CONFIG.get("speech_recognition_timeout", 5)
-                audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=10)
+            timeout = SPEECH_CONFIG.get("speech_recognition_timeout", 5)
+            audio = self._capture_command(detected_at, timeout=timeout, phrase_time_limit=10,
+                                          prompt_seconds=prompt_seconds)
             
             if self.status_callback:
                 self.status_callback("Processing speech...")
             
-            # Use Google's speech recognition 
-            service = SPEECH_CONFIG.get("recognition_service", "google").lower()
-            
-            if service == "google":
-                text = self.recognizer.recognize_google(audio)
-            elif service == "sphinx":
-                text = self.recognizer.recognize_sphinx(audio)
-            else:
-                # Default to Google if unknown service
-                text = self.recognizer.recognize_google(audio)
+            text = self._strip_wake_word(self._recognize(audio))
             
             if self.status_callback:
                 self.status_callback(f"Recognized: {text}")
@@ -236,15 +370,44 @@ class SpeechRecognizer:
         finally:
             self.is_listening = False
             if self.status_callback:
-                self.status_callback(f"Listening for wake word: '{self.wake_word}'...")
+                self.status_callback(self._idle_status())
+    
+    def _recognize(self, audio):
+        """
+        Turn a recorded command into text.
+
+        In 'grammar' mode the command is decoded offline against the command
+        grammar first, and the cloud recognizer is only used when that decode
+        is not confident enough.
+        """
+        service = self.service
+        if service == "grammar":
+            if self.grammar_recognizer:
+                try:
+                    text, confidence = self.grammar_recognizer.recognize(audio)
+                except Exception as e:
+                    print(f"Offline decode failed: {str(e)}")
+                    text, confidence = None, 0.0
+                if text and confidence >= SPEECH_CONFIG.get("grammar_min_confidence", 0.5):
+                    self.recognition_stats["offline"] += 1
+                    print(f"Offline decode: '{text}' (confidence {confidence:.2f})")
+                    return text
+                print(f"Low confidence offline decode ('{text}', {confidence:.2f}), using cloud recognition")
+            self.recognition_stats["fallback"] += 1
+            service = SPEECH_CONFIG.get("fallback_recognition_service", "google").lower()
+
+        if service == "sphinx":
+            return self.recognizer.recognize_sphinx(audio)
+        # Default to Google if unknown service
+        return self.recognizer.recognize_google(audio)
     
     def _speak_feedback(self, text):
-        """Provide audio feedback"""
+        """
+        Provide audio feedback without blocking.
+
+        Returns:
+            float: Duration of the phrase if it was pre-rendered, else None
+        """
         if not self.enable_audio_feedback:
-            return
-            
-        try:
-            self.tts_engine.say(text)
-            self.tts_engine.runAndWait()
-        except Exception as e:
-            print(f"Error in speech feedback: {str(e)}")
\ No newline at end of file
+            return None
+        return self.speaker.say(text)
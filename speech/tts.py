@@ -0,0 +1,109 @@
+"""
+Spoken feedback for CommandCompanion
+
+A dedicated worker thread owns the pyttsx3 engine and speaks queued
+phrases, so callers never block on runAndWait(). The fixed feedback
+phrases are synthesized to WAV files once and then played with the
+system audio player, without going through the TTS engine again.
+"""
+
+import hashlib
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import wave
+import pyttsx3
+from config.settings import SPEECH_CONFIG
+from utils.helpers import get_cache_dir, ensure_directory_exists
+
+# Players tried in order for pre-rendered phrases
+AUDIO_PLAYERS = [['pw-play'], ['paplay'], ['aplay', '-q']]
+
+class FeedbackSpeaker:
+    def __init__(self, phrases=None):
+        """
+        Start the TTS worker and pre-render the fixed feedback phrases.
+
+        Args:
+            phrases (list, optional): Phrases to pre-render, defaults to
+                SPEECH_CONFIG["feedback_phrases"]
+        """
+        self.phrases = phrases if phrases is not None else SPEECH_CONFIG.get("feedback_phrases", [])
+        self.cache_dir = ensure_directory_exists(os.path.join(get_cache_dir(), "tts"))
+        self.player = next((p for p in AUDIO_PLAYERS if shutil.which(p[0])), None)
+        self.rendered = {}  # phrase -> (wav path, duration in seconds)
+        self.engine = None
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._worker, name="tts-worker", daemon=True)
+        self._thread.start()
+
+    def say(self, text):
+        """
+        Speak text without waiting for it to finish.
+
+        Returns:
+            float: Expected duration in seconds if the phrase is pre-rendered, else None
+        """
+        rendered = self.rendered.get(text)
+        if rendered and self.player:
+            self._play(rendered[0])
+            return rendered[1]
+        self._queue.put(text)
+        return None
+
+    def stop(self):
+        """Stop the worker thread."""
+        self._queue.put(None)
+        self._thread.join(timeout=1)
+
+    def _play(self, path):
+        try:
+            subprocess.Popen(self.player + [path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except Exception as e:
+            print(f"Error playing feedback sound: {str(e)}")
+
+    def _cache_path(self, text):
+        voice = self.engine.getProperty('voice')
+        rate = self.engine.getProperty('rate')
+        key = hashlib.sha256(f"{voice}|{rate}|{text}".encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    def _render(self, text):
+        """Synthesize a phrase to WAV (once per voice and rate) and record its duration."""
+        path = self._cache_path(text)
+        if not os.path.exists(path):
+            self.engine.save_to_file(text, path)
+            self.engine.runAndWait()
+        try:
+            with wave.open(path) as wav:
+                duration = wav.getnframes() / wav.getframerate()
+        except (OSError, wave.Error, EOFError):
+            # Some engines write formats the wave module cannot read; skip them
+            return
+        self.rendered[text] = (path, duration)
+
+    def _worker(self):
+        try:
+            self.engine = pyttsx3.init()
+        except Exception as e:
+            print(f"Error initializing text-to-speech: {str(e)}")
+            return
+
+        if self.player:
+            for phrase in self.phrases:
+                try:
+                    self._render(phrase)
+                except Exception as e:
+                    print(f"Could not pre-render '{phrase}': {str(e)}")
+
+        while True:
+            text = self._queue.get()
+            if text is None:
+                break
+            try:
+                self.engine.say(text)
+                self.engine.runAndWait()
+            except Exception as e:
+                print(f"Error in speech feedback: {str(e)}")
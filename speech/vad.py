@@ -0,0 +1,190 @@
+"""
+Voice activity detection for CommandCompanion
+
+A cheap energy and zero-crossing-rate detector that runs on raw 16-bit
+frames before they reach the wake word decoder, so silence and steady
+background noise (hum, fans, hiss) never cost a decode. An optional
+noise floor tracker keeps the energy threshold in step with the room.
+"""
+
+from collections import deque
+import numpy as np
+
+# NumPy sample types for the sample widths PyAudio captures in
+SAMPLE_DTYPES = {1: np.int8, 2: np.int16, 4: np.int32}
+
+def rms(frame, width=2):
+    """
+    Return the RMS level of a frame of raw signed samples.
+
+    Args:
+        frame (bytes): Raw audio
+        width (int): Bytes per sample
+
+    Returns:
+        float: RMS in sample units, 0.0 for an empty frame
+    """
+    samples = np.frombuffer(frame, dtype=SAMPLE_DTYPES[width])
+    if not len(samples):
+        return 0.0
+    samples = samples.astype(np.float64)
+    return float(np.sqrt(np.mean(samples * samples)))
+
+class NoiseFloorTracker:
+    def __init__(self, frame_seconds, window_seconds=3.0, ratio=3.0, min_threshold=100,
+                 smoothing=0.1):
+        """
+        Track the background noise level from a live stream.
+
+        The floor is the minimum sub-frame energy seen over a rolling window;
+        speech always has gaps, so the minimum follows the noise rather than
+        the voice. It is smoothed with an exponential moving average.
+
+        Args:
+            frame_seconds (float): Duration of each frame passed to update()
+            window_seconds (float): Length of the rolling minimum window
+            ratio (float): Energy threshold as a multiple of the noise floor
+            min_threshold (float): Lower bound for the energy threshold
+            smoothing (float): Weight of each new window minimum in the moving average
+        """
+        self.ratio = ratio
+        self.min_threshold = min_threshold
+        self.smoothing = smoothing
+        self._minima = deque(maxlen=max(1, int(round(window_seconds / frame_seconds))))
+        self.noise_floor = None
+
+    @property
+    def threshold(self):
+        """Energy threshold derived from the current noise floor."""
+        if self.noise_floor is None:
+            return None
+        return max(self.min_threshold, self.noise_floor * self.ratio)
+
+    def update(self, energy):
+        """
+        Add a frame's sub-frame energies and return the updated threshold.
+
+        Args:
+            energy (np.ndarray): RMS energy per sub-frame
+        """
+        self._minima.append(float(energy.min()))
+        window_floor = min(self._minima)
+        if self.noise_floor is None:
+            self.noise_floor = window_floor
+        else:
+            self.noise_floor += self.smoothing * (window_floor - self.noise_floor)
+        return self.threshold
+
+class VoiceActivityDetector:
+    def __init__(self, sample_rate, energy_threshold=300, frame_ms=20, hangover_ms=300,
+                 onset_ms=200, zcr_range=(0.01, 0.35), noise_tracker=None):
+        """
+        Initialize the detector.
+
+        Args:
+            sample_rate (int): Sample rate of the incoming audio
+            energy_threshold (float): RMS level (in 16-bit sample units) above which
+                a sub-frame may be speech; the same scale as Recognizer.energy_threshold
+            frame_ms (int): Length of the sub-frames energy and ZCR are computed over
+            hangover_ms (int): Audio passed on after the last speech sub-frame, so
+                short pauses inside a word do not split it
+            onset_ms (int): Audio from just before speech started that is passed on
+                with it, so the decoder sees the start of the word
+            zcr_range (tuple): Zero-crossing rates (crossings per sample) considered
+                speech; mains hum is far below and hiss far above this range
+            noise_tracker (NoiseFloorTracker, optional): Adapts energy_threshold
+                to the background noise on every frame
+        """
+        self.sample_rate = sample_rate
+        self.energy_threshold = energy_threshold
+        self.frame_samples = max(1, sample_rate * frame_ms // 1000)
+        self.hangover_samples = sample_rate * hangover_ms // 1000
+        self.onset_samples = sample_rate * onset_ms // 1000
+        self.zcr_min, self.zcr_max = zcr_range
+        self.noise_tracker = noise_tracker
+
+        self._onset = deque()
+        self._onset_length = 0
+        self._since_speech = None  # Samples since the last speech sub-frame, None when idle
+        self.stats = {"frames": 0, "passed_frames": 0, "skipped_frames": 0, "segments": 0}
+
+    def analyze(self, frame):
+        """
+        Compute per-sub-frame RMS energy and zero-crossing rate.
+
+        Returns:
+            tuple: (energy, zcr) NumPy arrays with one value per sub-frame
+        """
+        samples = np.frombuffer(frame, dtype=np.int16)
+        count = len(samples) // self.frame_samples
+        if count == 0:
+            samples = samples.reshape(1, -1)
+        else:
+            samples = samples[:count * self.frame_samples].reshape(count, self.frame_samples)
+        samples = samples.astype(np.float32)
+        energy = np.sqrt(np.mean(samples * samples, axis=1))
+        signs = np.signbit(samples)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / max(1, samples.shape[1] - 1)
+        return energy, zcr
+
+    def is_speech(self, frame):
+        """Check whether any sub-frame of frame looks like speech."""
+        return self._is_speech(*self.analyze(frame))
+
+    def _is_speech(self, energy, zcr):
+        speech = (energy > self.energy_threshold) & (zcr >= self.zcr_min) & (zcr <= self.zcr_max)
+        return bool(speech.any())
+
+    def filter(self, frame):
+        """
+        Decide which audio to pass on to the decoder.
+
+        Args:
+            frame (bytes): Raw 16-bit mono audio
+
+        Returns:
+            tuple: (frames, segment_ended) where frames is a list of frames to
+            decode (empty while idle) and segment_ended is True when a speech
+            segment has just finished
+        """
+        samples = len(frame) // 2
+        self.stats["frames"] += 1
+
+        energy, zcr = self.analyze(frame)
+        if self.noise_tracker:
+            self.energy_threshold = self.noise_tracker.update(energy)
+
+        if self._is_speech(energy, zcr):
+            if self._since_speech is None:
+                self.stats["segments"] += 1
+            self._since_speech = 0
+            frames = list(self._onset) + [frame]
+            self._onset.clear()
+            self._onset_length = 0
+            self.stats["passed_frames"] += 1
+            return frames, False
+
+        if self._since_speech is not None:
+            self._since_speech += samples
+            self.stats["passed_frames"] += 1
+            if self._since_speech >= self.hangover_samples:
+                self._since_speech = None
+                return [frame], True
+            return [frame], False
+
+        # Idle: keep a little audio in case speech starts with the next frame
+        self._onset.append(frame)
+        self._onset_length += samples
+        while self._onset and self._onset_length - len(self._onset[0]) // 2 >= self.onset_samples:
+            self._onset_length -= len(self._onset.popleft()) // 2
+        self.stats["skipped_frames"] += 1
+        return [], False
+
+    def get_stats(self):
+        """Return frame counters, including the share of frames skipped."""
+        stats = dict(self.stats)
+        stats["skipped_ratio"] = stats["skipped_frames"] / stats["frames"] if stats["frames"] else 0.0
+        stats["energy_threshold"] = self.energy_threshold
+        if self.noise_tracker:
+            stats["noise_floor"] = self.noise_tracker.noise_floor
+        return stats
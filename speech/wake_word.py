@@ -1,106 +1,203 @@
 """
-Speech recognition functionality for CommandCompanion
+Wake word detection for CommandCompanion
+
+Detectors consume raw 16-bit mono audio frame by frame. The default
+backend uses pocketsphinx keyphrase spotting, which only tracks the wake
+word instead of decoding full sentences. The original behaviour of
+decoding whole phrases with recognize_sphinx is kept as the 'sphinx'
+backend for comparison and as a fallback.
 """
 
-import speech_recognition as sr
-import threading
+import os
 import time
-import pyttsx3
-from .wake_word import WakeWordDetector
+import speech_recognition as sr
+from config.settings import SPEECH_CONFIG
+
+# Sample rate pocketsphinx acoustic models are trained on
+DECODER_SAMPLE_RATE = 16000
+
+def sensitivity_to_threshold(sensitivity):
+    """
+    Map a 0-1 sensitivity to a pocketsphinx keyphrase threshold.
+
+    Higher sensitivity gives a lower threshold, so the wake word is accepted
+    more easily at the cost of more false detections.
+    """
+    sensitivity = min(max(sensitivity, 0.0), 1.0)
+    return 10 ** -(10 + 40 * sensitivity)
+
+def model_files():
+    """
+    Locate the US English model files of the installed pocketsphinx.
+
+    pocketsphinx 0.1.x keeps them directly in get_model_path(), 5.x in an
+    en-us subfolder of it.
+
+    Returns:
+        dict: Paths of the acoustic model ('hmm'), the pronunciation
+        dictionary ('dict') and the phonetic language model ('phone_lm')
+
+    Raises:
+        FileNotFoundError: If neither layout is present
+    """
+    from pocketsphinx import get_model_path
+
+    model_path = get_model_path()
+    for base in (model_path, os.path.join(model_path, 'en-us')):
+        hmm = os.path.join(base, 'en-us')
+        dictionary = os.path.join(base, 'cmudict-en-us.dict')
+        if os.path.isdir(hmm) and os.path.exists(dictionary):
+            return {'hmm': hmm, 'dict': dictionary,
+                    'phone_lm': os.path.join(base, 'en-us-phone.lm.bin')}
+    raise FileNotFoundError(f"No en-us pocketsphinx model found under {model_path}")
 
-class SpeechRecognizer:
-    def __init__(self, command_callback, status_callback=None):
+def _create_keyphrase_decoder(keyphrase, threshold):
+    """Create a pocketsphinx decoder that spots a single keyphrase."""
+    from pocketsphinx import Decoder
+
+    files = model_files()
+    try:
+        config = Decoder.default_config()
+    except AttributeError:
+        # pocketsphinx 5 takes the configuration as keyword arguments
+        return Decoder(hmm=files['hmm'], dict=files['dict'], keyphrase=keyphrase,
+                       kws_threshold=threshold, lm=None, loglevel='FATAL')
+    config.set_string('-hmm', files['hmm'])
+    config.set_string('-dict', files['dict'])
+    config.set_string('-keyphrase', keyphrase)
+    config.set_float('-kws_threshold', threshold)
+    config.set_string('-logfn', os.devnull)
+    return Decoder(config)
+
+class KeyphraseBackend:
+    """Frame-level keyword spotting with pocketsphinx."""
+
+    name = "keyphrase"
+
+    def __init__(self, wake_word, sensitivity, sample_rate, sample_width):
+        if sample_rate != DECODER_SAMPLE_RATE or sample_width != 2:
+            raise ValueError(f"Keyphrase spotting needs {DECODER_SAMPLE_RATE} Hz 16-bit audio")
+        self.decoder = _create_keyphrase_decoder(wake_word, sensitivity_to_threshold(sensitivity))
+        self.in_utterance = False
+
+    def reset(self):
+        """Forget any partially spotted keyphrase."""
+        if self.in_utterance:
+            self.decoder.end_utt()
+            self.in_utterance = False
+
+    def process(self, frame):
+        """Feed one frame and report whether the keyphrase was spotted."""
+        if not self.in_utterance:
+            self.decoder.start_utt()
+            self.in_utterance = True
+        self.decoder.process_raw(frame, False, False)
+        if self.decoder.hyp() is not None:
+            # Restart so the same detection is not reported again
+            self.reset()
+            return True
+        return False
+
+class PhraseDecodeBackend:
+    """Decode fixed-length phrases with recognize_sphinx and look for the wake word."""
+
+    name = "sphinx"
+
+    def __init__(self, wake_word, sensitivity, sample_rate, sample_width, phrase_seconds=2.0):
+        self.wake_word = wake_word
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.phrase_bytes = int(phrase_seconds * sample_rate) * sample_width
+        self.recognizer = sr.Recognizer()
+        self.buffer = bytearray()
+
+    def reset(self):
+        self.buffer.clear()
+
+    def process(self, frame):
+        self.buffer.extend(frame)
+        if len(self.buffer) < self.phrase_bytes:
+            return False
+        audio = sr.AudioData(bytes(self.buffer), self.sample_rate, self.sample_width)
+        self.buffer.clear()
+        try:
+            text = self.recognizer.recognize_sphinx(audio).lower()
+        except sr.UnknownValueError:
+            return False
+        print(f"Potential wake word detected: {text}")
+        return self.wake_word in text
+
+BACKENDS = {
+    KeyphraseBackend.name: KeyphraseBackend,
+    PhraseDecodeBackend.name: PhraseDecodeBackend
+}
+
+class WakeWordDetector:
+    def __init__(self, wake_word=None, sensitivity=None, backend=None,
+                 sample_rate=DECODER_SAMPLE_RATE, sample_width=2):
         """
-        Initialize speech recognition.
-        
+        Initialize a wake word detector.
+
         Args:
-            command_callback: Function to call with recognized text
-            status_callback: Function to update UI status (optional)
+            wake_word (str, optional): Word to listen for, defaults to SPEECH_CONFIG["wake_word"]
+            sensitivity (float, optional): Detection sensitivity (0-1), defaults to
+                SPEECH_CONFIG["sensitivity"]
+            backend (str, optional): 'keyphrase' or 'sphinx', defaults to
+                SPEECH_CONFIG["wake_word_backend"]
+            sample_rate (int): Sample rate of the frames passed to process()
+            sample_width (int): Bytes per sample of the frames passed to process()
         """
-        self.command_callback = command_callback
-        self.status_callback = status_callback
-        self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
-        self.wake_detector = None
-        self.is_listening = False
-        self.tts_engine = pyttsx3.init()
-        
-        # Adjust for ambient noise once on startup
-        with self.microphone as source:
-            self.recognizer.adjust_for_ambient_noise(source)
-            
-    def start_wake_detection(self):
-        """Start background wake word detection"""
-        self.wake_detector = WakeWordDetector(self._wake_word_callback)
-        self.wake_detector.start()
-        if self.status_callback:
-            self.status_callback("Listening for wake word...")
-            
-    def stop(self):
-        """Stop all speech recognition"""
-        if self.wake_detector:
-            self.wake_detector.stop()
-        self.is_listening = False
-            
-    def _wake_word_callback(self):
-        """Called when wake word is detected"""
-        if self.is_listening:
-            return
-            
-        # Start active listening in a new thread
-        threading.Thread(target=self._listen_for_command).start()
-        
-    def _listen_for_command(self):
-        """Listen for a command after wake word detection"""
-        self.is_listening = True
-        
-        if self.status_callback:
-            self.status_callback("Listening for command...")
-            
-        # Play audio feedback to indicate listening started
-        self._speak_feedback("Yes?")
-        
+        self.wake_word = (wake_word or SPEECH_CONFIG.get("wake_word", "comp")).lower()
+        self.sensitivity = SPEECH_CONFIG.get("sensitivity", 0.6) if sensitivity is None else sensitivity
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        backend = backend or SPEECH_CONFIG.get("wake_word_backend", "keyphrase")
+
         try:
-            with self.microphone as source:
-                # Shorter timeout for command
-                audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=10)
-                
-            if self.status_callback:
-                self.status_callback("Processing speech...")
-                
-            # Use Google's speech recognition
-            text = self.recognizer.recognize_google(audio)
-            
-            if self.status_callback:
-                self.status_callback(f"Recognized: {text}")
-                
-            print(f"Speech recognized: {text}")
-            
-            # Send the recognized text to the command processor
-            if text and self.command_callback:
-                self.command_callback(text)
-                
-        except sr.WaitTimeoutError:
-            if self.status_callback:
-                self.status_callback("Listening timed out")
-            self._speak_feedback("Sorry, I didn't hear anything")
-            
-        except sr.UnknownValueError:
-            if self.status_callback:
-                self.status_callback("Could not understand audio")
-            self._speak_feedback("Sorry, I didn't catch that")
-            
+            self.backend = BACKENDS[backend](self.wake_word, self.sensitivity, sample_rate, sample_width)
         except Exception as e:
-            print(f"Error in speech recognition: {str(e)}")
-            if self.status_callback:
-                self.status_callback(f"Error: {str(e)}")
-                
-        finally:
-            self.is_listening = False
-            if self.status_callback:
-                self.status_callback("Listening for wake word...")
-    
-    def _speak_feedback(self, text):
-        """Provide audio feedback"""
-        self.tts_engine.say(text)
-        self.tts_engine.runAndWait()
\ No newline at end of file
+            if backend == PhraseDecodeBackend.name:
+                raise
+            print(f"Wake word backend '{backend}' unavailable ({str(e)}), using full Sphinx decodes")
+            self.backend = PhraseDecodeBackend(self.wake_word, self.sensitivity, sample_rate, sample_width)
+
+        self.stats = {"frames": 0, "audio_seconds": 0.0, "cpu_seconds": 0.0,
+                      "detections": 0, "last_latency": None}
+
+    @property
+    def backend_name(self):
+        return self.backend.name
+
+    def reset(self):
+        """Discard partially processed audio, e.g. after the stream was reopened."""
+        self.backend.reset()
+
+    def process(self, frame, captured_at=None):
+        """
+        Process one frame of audio.
+
+        Args:
+            frame (bytes): Raw audio in the detector's sample format
+            captured_at (float, optional): time.monotonic() when the frame's
+                last sample was captured, used to measure detection latency
+
+        Returns:
+            bool: True if the wake word was detected
+        """
+        cpu_start = time.thread_time()
+        detected = self.backend.process(frame)
+        self.stats["cpu_seconds"] += time.thread_time() - cpu_start
+        self.stats["frames"] += 1
+        self.stats["audio_seconds"] += len(frame) / (self.sample_rate * self.sample_width)
+        if detected:
+            self.stats["detections"] += 1
+            if captured_at is not None:
+                self.stats["last_latency"] = time.monotonic() - captured_at
+        return detected
+
+    def get_stats(self):
+        """Return processing counters, including CPU time per second of audio."""
+        stats = dict(self.stats, backend=self.backend_name)
+        audio = stats["audio_seconds"]
+        stats["cpu_per_audio_second"] = stats["cpu_seconds"] / audio if audio else 0.0
+        return stats
@@ -0,0 +1,121 @@
+"""
+Streaming a plan from Gemini into the executor
+
+ActionStreamParser has to return the same actions wherever the response
+is split into chunks, and execute_plan has to run steps from a generator
+as they arrive while still honouring dependencies on earlier steps.
+"""
+
+import threading
+import time
+import unittest
+from unittest import mock
+
+from core.action_stream import ActionStreamParser
+import core.executor as executor
+
+def parse_split(text, points):
+    """Feed text to a fresh parser in chunks cut at the given offsets."""
+    parser = ActionStreamParser()
+    bounds = [0] + sorted(points) + [len(text)]
+    chunks = [text[start:end] for start, end in zip(bounds, bounds[1:])]
+    return list(parser.parse(chunks)), parser.errors
+
+class ActionStreamParserTest(unittest.TestCase):
+    def assertParsesAnywhere(self, text, expected, errors=0):
+        # Every single split, and a few three-way splits
+        splits = [[i] for i in range(len(text) + 1)]
+        splits += [[i, j] for i in range(0, len(text), 7) for j in range(i, len(text), 11)]
+        for points in splits:
+            with self.subTest(points=points):
+                actions, failed = parse_split(text, points)
+                self.assertEqual(actions, expected)
+                self.assertEqual(len(failed), errors)
+
+    def test_braces_inside_topic(self):
+        text = ('[{"action": "create_file", "type": "python", "topic": "parse {a: [1, 2]} dicts"},'
+                ' {"action": "open_app", "app": "firefox"}]')
+        self.assertParsesAnywhere(text, [
+            {'action': 'create_file', 'type': 'python', 'topic': 'parse {a: [1, 2]} dicts'},
+            {'action': 'open_app', 'app': 'firefox'}])
+
+    def test_apostrophes(self):
+        text = ('[{"action": "create_file", "type": "website", "topic": "my cat\'s toys"},'
+                ' {\'action\': \'create_file\', \'type\': \'text\', \'topic\': "dad\'s \\"jokes\\""}]')
+        self.assertParsesAnywhere(text, [
+            {'action': 'create_file', 'type': 'website', 'topic': "my cat's toys"},
+            {'action': 'create_file', 'type': 'text', 'topic': 'dad\'s "jokes"'}])
+
+    def test_fenced_output(self):
+        text = ('Here is the plan:\n```json\n[\n  {"action": "open_app", "app": "vscode"},\n'
+                '  {"action": "create_file", "type": "python", "topic": "snake game"}\n]\n```\n')
+        self.assertParsesAnywhere(text, [
+            {'action': 'open_app', 'app': 'vscode'},
+            {'action': 'create_file', 'type': 'python', 'topic': 'snake game'}])
+
+    def test_undecodable_object_is_reported(self):
+        text = '[{"action": "open_app", "app": }, {"action": "quit"}]'
+        with mock.patch('builtins.print'):
+            self.assertParsesAnywhere(text, [{'action': 'quit'}], errors=1)
+
+class ExecuteStreamedPlanTest(unittest.TestCase):
+    def setUp(self):
+        self.events = []
+        self.lock = threading.Lock()
+        self.vscode_started = threading.Event()
+        patches = [
+            mock.patch.object(executor, 'open_app', self.fake_open_app),
+            mock.patch.object(executor, 'create_file', self.fake_create_file),
+            mock.patch.object(executor, 'wait_until_ready', self.fake_wait_until_ready),
+            mock.patch.object(executor, 'system_task', lambda task: self.fail("no system task expected")),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def record(self, event):
+        with self.lock:
+            self.events.append(event)
+
+    def fake_open_app(self, app, reuse_window=False):
+        self.record(f"open {app}")
+        if app == 'vscode':
+            self.vscode_started.set()
+            time.sleep(0.05)
+        self.record(f"opened {app}")
+        return f"Opened {app}"
+
+    def fake_wait_until_ready(self, app, cancel_event=None):
+        self.record(f"ready {app}")
+        return True
+
+    def fake_create_file(self, content_type, topic, reuse_vscode=False, wait_for=None, **kwargs):
+        self.record(f"generate {topic}")
+        if wait_for:
+            wait_for()
+        self.record(f"place {topic}")
+        return f"Created {topic}"
+
+    def stream(self):
+        yield {'action': 'open_app', 'app': 'vscode'}
+        # The first step is already running before the rest of the plan arrives
+        self.assertTrue(self.vscode_started.wait(1))
+        time.sleep(0.01)
+        yield {'action': 'open_app', 'app': 'firefox'}
+        yield {'action': 'create_file', 'type': 'python', 'topic': 'snake game'}
+
+    def test_runs_steps_as_they_arrive(self):
+        statuses = executor.execute_plan(self.stream())
+        self.assertEqual(statuses, ["Opened vscode", "Opened firefox", "Created snake game"])
+
+    def test_late_step_waits_for_its_dependency(self):
+        context = {}
+        executor.execute_plan(self.stream(), context=context)
+        events = self.events
+        # Generation overlaps with the launch, but the file is placed only once VSCode is ready
+        self.assertLess(events.index("opened vscode"), events.index("ready vscode"))
+        self.assertLess(events.index("ready vscode"), events.index("place snake game"))
+        self.assertTrue(context.get('vscode_opened'))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+"""
+The local fast path for common commands
+
+Commands the parser accepts must come out exactly as Gemini would have
+interpreted them. Anything it cannot handle with certainty must return
+None, so the command goes to Gemini instead of running the wrong plan.
+"""
+
+import unittest
+from unittest import mock
+
+from config.settings import DESKTOP_INDEX_CONFIG
+from core.local_parser import parse_command
+
+ACCEPTED = [
+    ("open firefox", [{'action': 'open_app', 'app': 'firefox'}]),
+    ("launch google chrome", [{'action': 'open_app', 'app': 'chrome'}]),
+    ("Open Firefox.", [{'action': 'open_app', 'app': 'firefox'}]),
+    ("empty the trash", [{'action': 'system_task', 'task': 'empty_trash'}]),
+    ("quit", [{'action': 'quit'}]),
+    ("close the app", [{'action': 'quit'}]),
+    ("create a python file for a snake game",
+     [{'action': 'create_file', 'type': 'python', 'topic': 'snake game'}]),
+    ("open firefox and create a python file for a snake game",
+     [{'action': 'open_app', 'app': 'firefox'},
+      {'action': 'create_file', 'type': 'python', 'topic': 'snake game'}]),
+    ("open vscode then make a website about cats and dogs",
+     [{'action': 'open_app', 'app': 'vscode'},
+      {'action': 'create_file', 'type': 'website', 'topic': 'cats and dogs'}]),
+    ("create a website for cats and dogs",
+     [{'action': 'create_file', 'type': 'website', 'topic': 'cats and dogs'}]),
+    ("write an html page about cats and dogs and then open firefox",
+     [{'action': 'create_file', 'type': 'website', 'topic': 'cats and dogs'},
+      {'action': 'open_app', 'app': 'firefox'}]),
+]
+
+REJECTED = [
+    "close firefox",
+    "run python",
+    "create a python file for a snake game in vscode",
+    "open firefox and chrome",
+    "make a python file",
+    "open",
+    "what is the weather",
+]
+
+class ParseCommandTest(unittest.TestCase):
+    def setUp(self):
+        # Keep results independent of the applications installed here
+        patch = mock.patch.dict(DESKTOP_INDEX_CONFIG, {'enabled': False})
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_accepted(self):
+        for command, expected in ACCEPTED:
+            with self.subTest(command=command):
+                self.assertEqual(parse_command(command), expected)
+
+    def test_rejected(self):
+        for command in REJECTED:
+            with self.subTest(command=command):
+                self.assertIsNone(parse_command(command))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Forcing regeneration of a cached generated file
+
+Covers the path from a spoken or typed command to create_file: the local
+parser and schema carry the regenerate flag, and the executor passes it
+on so the generated file cache is bypassed and refreshed.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from core import cache, clients
+from core.local_parser import parse_command
+from core.schema import SchemaError, validate_action
+from core.executor import execute_action
+import actions.file_creator as file_creator
+from benchmarks.fake_gemini import FakeModel
+
+class ParseRegenerateTest(unittest.TestCase):
+    def test_regenerate_verb(self):
+        self.assertEqual(parse_command("regenerate a python file for flask hello world"),
+                         [{'action': 'create_file', 'type': 'python',
+                           'topic': 'flask hello world', 'regenerate': True}])
+
+    def test_fresh_modifier(self):
+        actions = parse_command("open vscode and make a fresh python file for a cnn model")
+        self.assertEqual(actions[1].get('regenerate'), True)
+
+    def test_plain_create_has_no_flag(self):
+        actions = parse_command("create a python file for flask hello world")
+        self.assertNotIn('regenerate', actions[0])
+
+class SchemaRegenerateTest(unittest.TestCase):
+    def test_flag_is_kept(self):
+        action = validate_action({'action': 'create_file', 'type': 'python',
+                                  'topic': 'snake game', 'regenerate': True})
+        self.assertIs(action['regenerate'], True)
+
+    def test_flag_must_be_boolean(self):
+        with self.assertRaises(SchemaError):
+            validate_action({'action': 'create_file', 'type': 'python',
+                             'topic': 'snake game', 'regenerate': 'yes'})
+
+class CreateFileRegenerateTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.model = FakeModel(latency=0, jitter=0, chunk_interval=0, file_lines=3)
+        clients.set_model_factory(lambda name: self.model)
+        self.addCleanup(clients.set_model_factory, None)
+        patches = [
+            mock.patch.object(cache, '_file_cache',
+                              cache.GeneratedFileCache(os.path.join(self.directory.name, 'cache'))),
+            mock.patch.dict(cache.FILE_CACHE_CONFIG, {'enabled': True}),
+            mock.patch.object(file_creator, '_open_file',
+                              lambda content_type, path, filename, *rest: f"Created {filename}"),
+            mock.patch.dict(file_creator.vscode_info, {'folder': self.directory.name})
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.addCleanup(self.directory.cleanup)
+
+    def test_regenerate_bypasses_cache(self):
+        action = parse_command("create a python file for flask hello world")[0]
+        self.assertNotIn("from cache", execute_action(action))
+        self.assertIn("from cache", execute_action(action))
+        self.assertEqual(self.model.stats["calls"], 1)
+
+        regenerate = parse_command("regenerate a python file for flask hello world")[0]
+        self.assertNotIn("from cache", execute_action(regenerate))
+        self.assertEqual(self.model.stats["calls"], 2)
+        self.assertEqual(cache.get_file_cache_stats()["regenerations"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,197 @@
+"""
+Executable discovery index for CommandCompanion
+
+Scans PATH, the common install directories and the installed Flatpak
+apps once, persists the result in the user's cache directory and answers
+lookups from memory. The cached index is reused while the mtimes of the
+scanned directories are unchanged; when one changes the stale index keeps
+serving lookups while a fresh scan runs in the background.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from utils.helpers import get_cache_dir
+
+# Install locations outside PATH that apps are commonly found in on Fedora
+COMMON_INSTALL_DIRS = [
+    '/opt/brave.com/brave',
+    '/opt/brave',
+    '/usr/lib/brave-browser',
+    '/app/bin',
+    '/var/lib/flatpak/exports/bin',
+    os.path.expanduser('~/.local/share/flatpak/exports/bin'),
+    os.path.expanduser('~/.local/bin')
+]
+
+# Flatpak installations; each subdirectory is an installed application ID
+FLATPAK_APP_DIRS = [
+    '/var/lib/flatpak/app',
+    os.path.expanduser('~/.local/share/flatpak/app')
+]
+
+INDEX_VERSION = 1
+
+def _dir_mtime(directory):
+    try:
+        return os.stat(directory).st_mtime
+    except OSError:
+        return None
+
+class ExecutableIndex:
+    def __init__(self, path=None):
+        """
+        Initialize the index from its on-disk cache, scanning if there is none.
+
+        Args:
+            path (str, optional): Where to persist the index, defaults to the user's cache dir
+        """
+        self.path = path or os.path.join(get_cache_dir(), "executables.json")
+        self.executables = {}   # name -> full path of the first match in search order
+        self.paths = set()      # every indexed full path
+        self.flatpaks = set()   # installed Flatpak application IDs
+        self.dir_mtimes = {}
+        self._lock = threading.Lock()
+        self._refresh_thread = None
+
+        if not self._load():
+            self.refresh()
+        elif self.is_stale():
+            self.refresh_in_background()
+
+    def _search_dirs(self):
+        dirs = [d for d in os.environ.get('PATH', '').split(os.pathsep) if d]
+        return list(dict.fromkeys(dirs + COMMON_INSTALL_DIRS))
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("version") != INDEX_VERSION:
+            return False
+        self.executables = data.get("executables", {})
+        self.paths = set(self.executables.values()) | set(data.get("extra_paths", []))
+        self.flatpaks = set(data.get("flatpaks", []))
+        self.dir_mtimes = data.get("dir_mtimes", {})
+        return True
+
+    def _save(self):
+        data = {
+            "version": INDEX_VERSION,
+            "executables": self.executables,
+            "extra_paths": sorted(self.paths - set(self.executables.values())),
+            "flatpaks": sorted(self.flatpaks),
+            "dir_mtimes": self.dir_mtimes,
+            "scanned_at": time.time()
+        }
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Could not save executable index: {str(e)}")
+
+    def is_stale(self):
+        """Check whether any scanned directory changed since the index was built."""
+        watched = self._search_dirs() + FLATPAK_APP_DIRS
+        if set(watched) != set(self.dir_mtimes):
+            return True
+        return any(_dir_mtime(d) != self.dir_mtimes[d] for d in watched)
+
+    def refresh(self):
+        """Rescan every directory and persist the result."""
+        executables, paths, mtimes = {}, set(), {}
+        for directory in self._search_dirs():
+            mtimes[directory] = _dir_mtime(directory)
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_file() and os.access(entry.path, os.X_OK):
+                        paths.add(entry.path)
+                        executables.setdefault(entry.name, entry.path)
+                except OSError:
+                    continue
+
+        flatpaks = set()
+        for directory in FLATPAK_APP_DIRS:
+            mtimes[directory] = _dir_mtime(directory)
+            try:
+                flatpaks.update(os.listdir(directory))
+            except OSError:
+                continue
+
+        with self._lock:
+            self.executables, self.paths, self.flatpaks = executables, paths, flatpaks
+            self.dir_mtimes = mtimes
+        self._save()
+
+    def refresh_in_background(self):
+        """Rescan on a background thread while the current index keeps serving lookups."""
+        if self._refresh_thread is None or not self._refresh_thread.is_alive():
+            self._refresh_thread = threading.Thread(target=self.refresh, daemon=True)
+            self._refresh_thread.start()
+        return self._refresh_thread
+
+    def which(self, name):
+        """
+        Return the full path of an executable, like shutil.which.
+
+        Falls back to shutil.which for names the index has not seen, which
+        also schedules a rescan since something was installed since.
+        """
+        if os.sep in name:
+            return name if self.is_executable(name) else None
+        path = self.executables.get(name)
+        if path:
+            return path
+        path = shutil.which(name)
+        if path:
+            self.refresh_in_background()
+        return path
+
+    def command_path(self, name):
+        """
+        Return what to run an executable as.
+
+        Names found on PATH are returned unchanged. Names only found in
+        COMMON_INSTALL_DIRS are returned as full paths, since Popen searches
+        PATH alone and would not find them by name.
+
+        Returns:
+            str: The name or full path, or None if the executable is not found
+        """
+        path = self.which(name)
+        if path is None or os.sep in name:
+            return path
+        path_dirs = [d for d in os.environ.get('PATH', '').split(os.pathsep) if d]
+        return name if os.path.dirname(path) in path_dirs else path
+
+    def is_executable(self, path):
+        """Check whether a full path is an executable file."""
+        if path in self.paths:
+            return True
+        return os.path.isfile(path) and os.access(path, os.X_OK)
+
+    def has_flatpak(self, app_id):
+        """Check whether a Flatpak application is installed."""
+        return app_id in self.flatpaks
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_executable_index():
+    """Return the shared executable index, loading or building it on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = ExecutableIndex()
+    return _index
@@ -1,8 +1,9 @@
 import json
 import re
-import shutil
 import os
+from utils.tracing import traced
 
+@traced("extract_json")
 def extract_json(text):
     """
     Extract JSON object or array from the response text.
@@ -43,7 +44,9 @@ def is_app_available(app_cmd):
     Check if an application exists in the system path.
     Optimized for Fedora OS.
     """
-    return shutil.which(app_cmd) is not None
+    # Imported here because the index itself depends on this module
+    from utils.executables import get_executable_index
+    return get_executable_index().which(app_cmd) is not None
 
 def sanitize_filename(name):
     """
@@ -58,4 +61,12 @@ def ensure_directory_exists(directory):
     """
     if not os.path.exists(directory):
         os.makedirs(directory)
-    return directory
\ No newline at end of file
+    return directory
+
+def get_cache_dir():
+    """
+    Return the CommandCompanion cache directory, creating it if necessary.
+    Follows the XDG base directory convention used on Fedora.
+    """
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser("~"), ".cache")
+    return ensure_directory_exists(os.path.join(base, "commandcompanion"))
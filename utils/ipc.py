@@ -0,0 +1,34 @@
+"""
+Local socket protocol shared by the CommandCompanion daemon and client
+
+Messages are JSON objects, one per line, over a Unix domain socket. This
+module only uses the standard library so the client starts in a few
+milliseconds.
+"""
+
+import json
+import os
+
+def socket_path():
+    """Return the path of the daemon's socket, in the user's runtime directory if there is one."""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "commandcompanion.sock")
+    return f"/tmp/commandcompanion-{os.getuid()}.sock"
+
+def send_message(sock_file, message):
+    """Write one message to a file object made with socket.makefile('rwb')."""
+    sock_file.write(json.dumps(message).encode('utf-8') + b"\n")
+    sock_file.flush()
+
+def read_message(sock_file):
+    """
+    Read one message.
+
+    Returns:
+        dict: The message, or None when the other side closed the connection
+    """
+    line = sock_file.readline()
+    if not line:
+        return None
+    return json.loads(line)
@@ -0,0 +1,223 @@
+"""
+Latency tracing for CommandCompanion
+
+Each command gets a trace made of timed spans (interpretation, Gemini
+calls, JSON parsing, each action, content generation, app launches).
+Finished traces are appended to a JSON lines file, one line per command.
+Summarize them with:
+    python -m utils.tracing summary [traces.jsonl]
+
+Tracing is off unless TRACING_CONFIG["enabled"] is set or the
+COMMANDCOMPANION_TRACE environment variable is 1 (or a file path). When
+off, no trace is started and span() returns a shared no-op object, so an
+instrumented call costs one context variable lookup.
+"""
+
+import contextvars
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+
+TRACE_ENV = "COMMANDCOMPANION_TRACE"
+
+_current = contextvars.ContextVar('commandcompanion_trace', default=None)
+_write_lock = threading.Lock()
+
+def _config():
+    # Imported lazily: config.settings indirectly imports utils.helpers, which uses this module
+    from config.settings import TRACING_CONFIG
+    return TRACING_CONFIG
+
+def trace_path():
+    """Return the file finished traces are appended to."""
+    env = os.environ.get(TRACE_ENV, "")
+    if env not in ("", "0", "1"):
+        return env
+    if _config().get("path"):
+        return _config()["path"]
+    from utils.helpers import get_cache_dir
+    return os.path.join(get_cache_dir(), "traces.jsonl")
+
+def is_enabled():
+    env = os.environ.get(TRACE_ENV)
+    if env is not None:
+        return env != "0"
+    return _config().get("enabled", False)
+
+class Trace:
+    def __init__(self, command):
+        """
+        Collect the spans of a single command.
+
+        Args:
+            command (str): The command being traced
+        """
+        self.id = uuid.uuid4().hex[:12]
+        self.command = command
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, name, start, duration, attrs):
+        span = {"name": name, "start": round(start - self.start, 6),
+                "duration": round(duration, 6), "thread": threading.current_thread().name}
+        span.update(attrs)
+        with self._lock:
+            self.spans.append(span)
+
+    def finish(self, **attrs):
+        """Write the trace as one JSON line."""
+        record = {"trace_id": self.id, "command": self.command, "started_at": self.started_at,
+                  "duration": round(time.perf_counter() - self.start, 6)}
+        record.update(attrs)
+        with self._lock:
+            record["spans"] = sorted(self.spans, key=lambda span: span["start"])
+        path = trace_path()
+        try:
+            with _write_lock, open(path, 'a') as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            print(f"Could not write trace to {path}: {str(e)}")
+
+class _Span:
+    def __init__(self, trace, name, attrs):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        """Attach attributes that are only known while the span runs."""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.trace.add(self.name, self.start, time.perf_counter() - self.start, self.attrs)
+        return False
+
+class _NoopSpan:
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+def start_trace(command):
+    """
+    Start a trace for a command.
+
+    Returns:
+        Trace: The new trace, or None when tracing is disabled
+    """
+    return Trace(command) if is_enabled() else None
+
+def current_trace():
+    return _current.get()
+
+def activate(trace):
+    """
+    Make trace the current trace of this thread.
+
+    Returns:
+        contextvars.Token: Pass to deactivate() to restore the previous trace
+    """
+    return _current.set(trace)
+
+def deactivate(token):
+    _current.reset(token)
+
+def span(name, **attrs):
+    """
+    Time a block as part of the current trace.
+
+    Usage:
+        with span("gemini", model=AI_MODEL) as s:
+            ...
+            s.set(chars=len(text))
+    """
+    trace = _current.get()
+    if trace is None:
+        return _NOOP_SPAN
+    return _Span(trace, name, attrs)
+
+def traced(name):
+    """Decorator that records each call of a function as a span."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = _current.get()
+            if trace is None:
+                return func(*args, **kwargs)
+            with _Span(trace, name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def bind(func):
+    """Wrap func so it runs under the current trace on another thread."""
+    trace = _current.get()
+    if trace is None:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _current.set(trace)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return wrapper
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def summarize(path=None):
+    """
+    Print p50/p95/p99 durations per stage over all traces in a file.
+
+    Args:
+        path (str, optional): Trace file, defaults to trace_path()
+    """
+    path = path or trace_path()
+    durations = {"total": []}
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            durations["total"].append(record["duration"])
+            for s in record.get("spans", []):
+                durations.setdefault(s["name"], []).append(s["duration"])
+
+    print(f"{len(durations['total'])} traces from {path}")
+    print(f"{'stage':<22}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}")
+    stages = [(name, values) for name, values in durations.items() if values]
+    for name, values in sorted(stages, key=lambda item: -_percentile(item[1], 0.5)):
+        print(f"{name:<22}{len(values):>7}" +
+              "".join(f"{_percentile(values, p) * 1000:>8.1f}ms" for p in (0.5, 0.95, 0.99)))
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] != "summary" or len(argv) > 2:
+        print("Usage: python -m utils.tracing summary [traces.jsonl]")
+        return 1
+    summarize(argv[1] if len(argv) > 1 else None)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())